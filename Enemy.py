@@ -1,203 +1,274 @@
 """
 Enemy module for managing enemy units and their behaviors.
+
+The Enemy manager keeps the enemy units of a simulation in a list, with
+their patrol state (mode, counter, threshold) in parallel NumPy arrays.
+update() advances every enemy with array operations and only calls into the
+level grid for units whose face or marching state changed. Headings are read
+from the units' faces, which anything may set through the level grid.
+
+NumPy is imported when the first enemy is added, so importing the simulation
+does not pay for it.
 """
+from __future__ import annotations
 
 import random
-from typing import List, Dict, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from enums import UnitClan, UnitType
 from grid_position import GridPosition
-from Unit.Unit import Unit
-from enums import UnitClan
-from level_grid import LevelGrid
+from level_grid import FreeCellIndex, LevelGrid
+from Unit import UNIT_CLASSES
+from Unit.SwordUnit import SwordUnit
+from Unit.Unit import FACE_CODES, FACES, Unit
 
-class EnemyPatrolConfig:
-    """
-    Configuration class for enemy patrol behavior.
-    """
+# Patrol modes
+FORWARD = 0
+BACKWARD = 1
+
+# Compass letters of FACES
+FACE_LETTERS = dict(zip('NESW', FACES))
+
+# Board edges enemies spawn on, and the direction they face when they appear
+SPAWN_FACES = {
+    'bottom': FACE_LETTERS['N'],
+    'top': FACE_LETTERS['S'],
+    'left': FACE_LETTERS['E'],
+    'right': FACE_LETTERS['W'],
+}
 
 
 class Enemy:
     """
     Enemy class to manage all enemy units and their behaviors.
+
+    Iterating, indexing and len() go over the managed units.
     """
+    enemy_units: List[Unit]
 
-    south = GridPosition(0, 1)
-    north = GridPosition(0, -1)
-    east = GridPosition(1, 0)
-    west = GridPosition(-1, 0)
-    
-    def __init__(self, level_grid: LevelGrid):
+    def __init__(self, level_grid: LevelGrid, rng: Optional[random.Random] = None, capacity: int = 64):
         """
         Initialize the Enemy manager.
-        
+
         Args:
             level_grid: The level grid where units are placed
-            grid_rows: Number of rows in the grid
-            grid_cols: Number of columns in the grid
+            rng: Random generator for spawns and patrols, e.g. the simulation's; a new one if None
+            capacity: Initial size of the patrol state arrays; they grow as needed
         """
         self.level_grid = level_grid
-        self.enemy_units: List[Unit]
-        self.patrol_states: Dict[str, Dict] = {}  # Maps unit UUID to patrol state
-        
-    def spawn_enemy(self, unit_type: str = "Enemy", count: int = 1) -> List[Unit]:
+        self.rng = rng if rng is not None else random.Random()
+        # per-tick rolls are drawn in bulk; seeded from rng now so a seeded game stays reproducible
+        self._np_seed = self.rng.getrandbits(64)
+        self._capacity = capacity
+        self.np_rng = None
+
+        self.enemy_units = []
+        # patrol state of enemy_units[i] is at index i; the arrays are made by the first add()
+        self.mode = None
+        self.counter = None
+        self.threshold = None
+
+    def __len__(self) -> int:
+        return len(self.enemy_units)
+
+    def __iter__(self) -> Iterator[Unit]:
+        return iter(self.enemy_units)
+
+    def __getitem__(self, index: int) -> Unit:
+        return self.enemy_units[index]
+
+    def add(self, unit: Unit) -> None:
+        """Manage a unit that is already on the level grid"""
+        if self.np_rng is None:
+            self._allocate()
+        i = len(self.enemy_units)
+        if i == len(self.mode):
+            self._grow()
+        self.enemy_units.append(unit)
+        self.mode[i] = FORWARD
+        self.counter[i] = 0
+        self.threshold[i] = self.np_rng.integers(3, 8)  # patrol distance of 3 to 7 ticks
+
+    def _allocate(self) -> None:
+        # imported here so the simulation does not pay for numpy until it has enemies
+        import numpy as np
+        self.np_rng = np.random.default_rng(self._np_seed)
+        self.mode = np.zeros(self._capacity, dtype=np.int8)
+        self.counter = np.zeros(self._capacity, dtype=np.int32)
+        self.threshold = np.zeros(self._capacity, dtype=np.int32)
+
+    def _grow(self) -> None:
+        import numpy as np
+        for name in ('mode', 'counter', 'threshold'):
+            array = getattr(self, name)
+            grown = np.zeros(len(array) * 2, dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def spawn_enemy(self, count: int = 1, zone: str = 'bottom') -> List[Unit]:
+        """
+        Spawn up to count sword enemies on free cells of a board edge, facing into the board.
+
+        Args:
+            count: Number of enemies to spawn
+            zone: Edge to spawn on, a SPAWN_FACES key
+
+        Returns:
+            The spawned units; fewer than count (possibly none) if the zone is full
+        """
+        free_cells = self._spawn_zone(zone)
+        face = SPAWN_FACES[zone]
+
         spawned_units = []
-        
         for _ in range(count):
-            # Choose a random edge (0: top, 1: right, 2: bottom, 3: left)
-            edge = random.randint(0, 3)
-            
-            if edge == 0:  # Top edge
-                x = random.randint(0, self.grid_cols - 1)
-                y = self.grid_rows - 1
-                face = self.patrol_directions['S']  # Face south
-            elif edge == 1:  # Right edge
-                x = self.grid_cols - 1
-                y = random.randint(0, self.grid_rows - 1)
-                face = self.patrol_directions['W']  # Face west
-            elif edge == 2:  # Bottom edge
-                x = random.randint(0, self.grid_cols - 1)
-                y = 0
-                face = self.patrol_directions['N']  # Face north
-            else:  # Left edge
-                x = 0
-                y = random.randint(0, self.grid_rows - 1)
-                face = self.patrol_directions['E']  # Face east
-                
-            pos = GridPosition(x, y)
-            
-            # Create the unit
-            unit = Unit(unit_type, UnitClan.Enemy, pos, face)
-            unit.is_marching = True
-            
-            # Add to level grid
-            self.level_grid.units[pos] = unit
-            self.enemy_units[pos] = unit
-            
-            # Initialize patrol state
-            self.patrol_states[unit.uuid] = {
-                'direction': face,
-                'patrol_mode': 'forward',  # 'forward' or 'backward'
-                'patrol_counter': 0,
-                'patrol_threshold': random.randint(3, 7)  # Random patrol distance
-            }
-            
+            pos = free_cells.sample(self.rng)
+            if pos is None:
+                break
+            unit = SwordUnit(f"S{self.rng.getrandbits(8):02x}", UnitClan.Enemy, pos, face)
+            unit.set_group_id(-1)
+            self.level_grid.move(unit, unit.loc)
+            self.add(unit)
             spawned_units.append(unit)
-            
         return spawned_units
-    
+
+    def _spawn_zone(self, zone: str) -> FreeCellIndex:
+        """The free-cell index of a spawn edge, registered with the level grid on first use"""
+        try:
+            return self.level_grid.zone(zone)
+        except KeyError:
+            return self.level_grid.add_zone(zone, self.level_grid.edge_cells(zone))
+
     def spawn_enemy_preset(self, preset: List[Dict]) -> List[Unit]:
         """
         Spawn enemy units according to a preset configuration.
-        
+
         Args:
             preset: List of dictionaries with unit configurations
-                   Each dict should have: 'x', 'y', 'face', 'unit_type'
-                   
+                   Each dict should have: 'x', 'y', 'face' (N/E/S/W), 'unit_type'
+                   and optionally 'name'
+
         Returns:
             List of spawned units
         """
         spawned_units = []
-        
+
         for unit_config in preset:
-            x = unit_config.get('x', 0)
-            y = unit_config.get('y', 0)
-            face_direction = unit_config.get('face', 'N')
-            unit_type = unit_config.get('unit_type', 'Enemy')
-            
-            pos = GridPosition(x, y)
-            face = self.patrol_directions.get(face_direction, self.patrol_directions['N'])
-            
-            # Create the unit
-            unit = Unit(unit_type, UnitClan.Enemy, pos, face)
-            unit.is_marching = True
-            
-            # Add to level grid
-            self.level_grid.units[pos] = unit
-            self.enemy_units[pos] = unit
-            
-            # Initialize patrol state
-            self.patrol_states[unit.uuid] = {
-                'direction': face,
-                'patrol_mode': 'forward',
-                'patrol_counter': 0,
-                'patrol_threshold': random.randint(3, 7)
-            }
-            
+            unit_class = UNIT_CLASSES[UnitType(unit_config.get('unit_type', 'Sword'))]
+            pos = GridPosition(unit_config.get('x', 0), unit_config.get('y', 0))
+            face = FACE_LETTERS[unit_config.get('face', 'N')]
+
+            unit = unit_class(unit_config.get('name', unit_class.__name__[0]), UnitClan.Enemy, pos, face)
+            unit.set_group_id(-1)
+            self.level_grid.move(unit, unit.loc)
+            self.add(unit)
             spawned_units.append(unit)
-            
+
         return spawned_units
-    
+
+    def remove_dead(self) -> int:
+        """
+        Drop every unit that is no longer on the level grid, compacting the patrol arrays.
+
+        Returns:
+            Number of units removed
+        """
+        units = self.enemy_units
+        n = len(units)
+        is_placed = self.level_grid.is_placed
+        keep = [i for i in range(n) if is_placed(units[i])]
+        if len(keep) == n:
+            return 0
+
+        k = len(keep)
+        for array in (self.mode, self.counter, self.threshold):
+            array[:k] = array[keep]
+        self.enemy_units = [units[i] for i in keep]
+        return n - k
+
     def update_patrol(self) -> None:
         """
         Update all enemy units' patrol behavior.
+
+        A unit that has patrolled for its threshold turns around and switches
+        mode; every unit toggles marching with a 30% chance.
         """
-        for unit in list(self.enemy_units.values()):
-            if unit.uuid not in self.patrol_states:
-                continue
-                
-            patrol_state = self.patrol_states[unit.uuid]
-            
-            # Check if unit has reached patrol threshold
-            if patrol_state['patrol_counter'] >= patrol_state['patrol_threshold']:
-                # Change patrol mode
-                if patrol_state['patrol_mode'] == 'forward':
-                    patrol_state['patrol_mode'] = 'backward'
-                    # Reverse direction
-                    patrol_state['direction'] = GridPosition(
-                        -patrol_state['direction'].x,
-                        -patrol_state['direction'].y
-                    )
-                    unit.face = patrol_state['direction']
-                else:
-                    patrol_state['patrol_mode'] = 'forward'
-                    # Reverse direction again
-                    patrol_state['direction'] = GridPosition(
-                        -patrol_state['direction'].x,
-                        -patrol_state['direction'].y
-                    )
-                    unit.face = patrol_state['direction']
-                
-                patrol_state['patrol_counter'] = 0
-                
-            # Update marching state based on patrol rules
-            # For example, march every 3 turns
-            if random.random() < 0.3:  # 30% chance to change marching state
-                unit.is_marching = not unit.is_marching
-                
-            # Increment patrol counter
-            patrol_state['patrol_counter'] += 1
-            
+        n = len(self.enemy_units)
+        if not n:
+            return
+        mode, counter, threshold = self.mode[:n], self.counter[:n], self.threshold[:n]
+
+        turning = counter >= threshold
+        mode[turning] ^= 1
+        counter[turning] = 0
+        toggling = self.np_rng.random(n) < 0.3
+        counter += 1
+
+        units, level_grid = self.enemy_units, self.level_grid
+        for i in turning.nonzero()[0]:
+            unit = units[i]
+            level_grid.set_face(unit, FACES[(FACE_CODES[unit.face] + 2) % 4])  # reverse
+        for i in toggling.nonzero()[0]:
+            level_grid.set_marching(units[i], not units[i].is_marching)
+
     def update_face_direction(self) -> None:
-        """
-        Update face direction of enemy units based on certain rules.
-        """
-        for unit in self.enemy_units.values():
-            if unit.uuid not in self.patrol_states:
-                continue
-                
-            # Example rule: 10% chance to change direction randomly
-            if random.random() < 0.1:
-                # Choose a random direction
-                direction_key = random.choice(list(self.patrol_directions.keys()))
-                new_direction = self.patrol_directions[direction_key]
-                
-                # Update unit's face direction
-                unit.face = new_direction
-                
-                # Update patrol state
-                self.patrol_states[unit.uuid]['direction'] = new_direction
-                
+        """Turn each enemy unit to a random direction with a 10% chance"""
+        n = len(self.enemy_units)
+        if not n:
+            return
+        turning = self.np_rng.random(n) < 0.1
+        new_direction = self.np_rng.integers(0, 4, n, dtype='int8')
+        self._turn(turning.nonzero()[0].tolist(), new_direction.tolist())
+
+    def randomize_directions(self) -> None:
+        """Turn every enemy unit to a random direction"""
+        n = len(self.enemy_units)
+        if not n:
+            return
+        self._turn(range(n), self.np_rng.integers(0, 4, n, dtype='int8').tolist())
+
+    def _turn(self, indices: Iterable[int], new_direction: List[int]) -> None:
+        """Turn the units at indices to their FACES index in new_direction, calling into the grid only for changed faces"""
+        units, level_grid = self.enemy_units, self.level_grid
+        for i in indices:
+            unit, code = units[i], new_direction[i]
+            if FACE_CODES[unit.face] != code:
+                level_grid.set_face(unit, FACES[code])
+
+    def state(self) -> tuple:
+        """The managed units and their patrol state, to restore() later"""
+        units = list(self.enemy_units)
+        if self.np_rng is None:
+            return units, None
+        n = len(units)
+        return units, (self.mode[:n].copy(), self.counter[:n].copy(), self.threshold[:n].copy(),
+                       self.np_rng.bit_generator.state)
+
+    def restore(self, state: tuple) -> None:
+        """Go back to the units and patrol state returned by state()"""
+        units, patrol = state
+        self.enemy_units = list(units)
+        if patrol is None:
+            self.np_rng = None
+            self.mode = self.counter = self.threshold = None
+            return
+        n = len(units)
+        mode, counter, threshold, rng_state = patrol
+        self.mode[:n], self.counter[:n], self.threshold[:n] = mode, counter, threshold
+        self.np_rng.bit_generator.state = rng_state
+
     def update(self) -> None:
         """
-        Update all enemy behaviors.
+        Update all enemy behaviors: drop dead units, then advance patrols and turn.
         """
+        self.remove_dead()
         self.update_patrol()
         self.update_face_direction()
-        
+
     def get_all_units(self) -> Dict[GridPosition, Unit]:
         """
         Get all enemy units.
-        
+
         Returns:
             Dictionary of positions to units
         """
-        return self.enemy_units 
\ No newline at end of file
+        return {unit.loc: unit for unit in self.enemy_units}
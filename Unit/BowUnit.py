@@ -12,11 +12,11 @@ class BowUnit(Unit):
     Damage: 2
     """
     
+    relative_attack_range = [
+        GridPosition(0, 3),   # Three steps forward
+        GridPosition(0, 2),   # Two steps forward
+    ]
+
     def __init__(self, name: str, unit_clan, loc: GridPosition, face: GridPosition):
         """Initialize a SpearUnit with the same parameters as Unit"""
         super().__init__(name, unit_clan, loc, face)
-
-        self.relative_attack_range = [
-            GridPosition(0, 3),   # Three steps forward
-            GridPosition(0, 2),   # Two steps forward
-        ]
\ No newline at end of file
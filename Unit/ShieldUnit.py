@@ -7,13 +7,14 @@ from .Unit import Unit
 
 
 class ShieldUnit(Unit):
+    relative_attack_range = []
+    relative_defense_range = [
+        GridPosition(0, -1),
+    ]
+
     def __init__(self, name: str, unit_clan, loc: GridPosition, face: GridPosition):
         """Initialize a SpearUnit with the same parameters as Unit"""
         super().__init__(name, unit_clan, loc, face)
         self.attack = 0
-        self.relative_attack_range = []
         self.self_defense = 2
-        self.relative_defense_range = [
-            GridPosition(0, -1),
-        ]
         self.guardian_defense = 2
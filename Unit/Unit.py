@@ -4,6 +4,40 @@ from enums import UnitClan
 from grid_position import GridPosition
 import uuid
 
+FACES = [GridPosition(0, 1), GridPosition(1, 0), GridPosition(0, -1), GridPosition(-1, 0)]
+# index into FACES (clockwise from north) of each face
+FACE_CODES = {face: code for code, face in enumerate(FACES)}
+
+
+def rotate_range(relative_range: list[GridPosition]) -> dict[GridPosition, tuple[GridPosition, ...]]:
+    """Rotate a front-relative range for each of the four facings"""
+    return {face: tuple(pos.adjust_with_direction(face) for pos in relative_range) for face in FACES}
+
+
+class _Range:
+    """
+    A relative range whose rotations are kept in step with it. Classes set
+    it as a plain class attribute and share their rotations; assigning it on
+    a unit rotates the new range for that unit only. As with any range
+    change, a unit on a level grid must be taken off it first.
+    """
+
+    def __init__(self, rotations: str) -> None:
+        self.rotations = rotations
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.value = '_' + name
+
+    def __get__(self, unit: Unit | None, owner: type | None = None) -> list[GridPosition]:
+        return getattr(owner if unit is None else unit, self.value)
+
+    def __set__(self, unit: Unit, relative_range: list[GridPosition]) -> None:
+        setattr(unit, self.value, list(relative_range))
+        setattr(unit, self.rotations, rotate_range(relative_range))
+        unit._attack_range = None
+        unit._defense_range = None
+
+
 class Unit:
     uuid: str
     name: str
@@ -11,17 +45,27 @@ class Unit:
     is_marching: bool = False
     priority: int = 1
 
-    face = GridPosition
-    loc: GridPosition
     health = 5
     attack = 1
     friendly_fire = False
-    relative_attack_range: list[GridPosition] = [GridPosition(-1, 0), GridPosition(1, 0), GridPosition(0, 1)]  # relative position
+    _relative_attack_range: list[GridPosition] = [GridPosition(-1, 0), GridPosition(1, 0), GridPosition(0, 1)]  # relative position
+    relative_attack_range = _Range('_attack_rotations')
     group_id: int = 1
 
     self_defense: int = 0
     guardian_defense: int = 0
-    relative_defense_range: list[GridPosition] = []
+    _relative_defense_range: list[GridPosition] = []
+    relative_defense_range = _Range('_defense_rotations')
+
+    # relative ranges rotated for every facing, built once per class from the
+    # class-level relative_attack_range / relative_defense_range, or per unit
+    # when a range is assigned on it
+    _attack_rotations: dict[GridPosition, tuple[GridPosition, ...]]
+    _defense_rotations: dict[GridPosition, tuple[GridPosition, ...]]
+
+    # absolute ranges for the current loc and face, reset when either changes
+    _attack_range: list[GridPosition] | None = None
+    _defense_range: list[GridPosition] | None = None
 
     max_x: int
     max_y: int
@@ -40,28 +84,62 @@ class Unit:
     def set_priority(self, priority: int) -> None:
         self.priority = priority
 
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        for name in ('relative_attack_range', 'relative_defense_range'):
+            # a subclass's plain class attribute would hide the _Range of Unit
+            if name in cls.__dict__:
+                setattr(cls, '_' + name, cls.__dict__[name])
+                delattr(cls, name)
+        cls._build_rotations()
+
+    @classmethod
+    def _build_rotations(cls) -> None:
+        cls._attack_rotations = rotate_range(cls.relative_attack_range)
+        cls._defense_rotations = rotate_range(cls.relative_defense_range)
+
+    @property
+    def loc(self) -> GridPosition:
+        return self._loc
+
+    @loc.setter
+    def loc(self, loc: GridPosition) -> None:
+        self._loc = loc
+        self._attack_range = None
+        self._defense_range = None
+
     @property
-    def attack_range(self):
-        li = []
+    def face(self) -> GridPosition:
+        return self._face
 
-        # adjust relative attack range based on face direction
-        adjusted_relative_attack_range = [rng.adjust_with_direction(self.face) for rng in self.relative_attack_range]
-        for rel_pos in adjusted_relative_attack_range:
-            new_grid_position = self.loc + rel_pos
-            li.append(new_grid_position)
-        return li
+    @face.setter
+    def face(self, face: GridPosition) -> None:
+        self._face = face
+        self._attack_range = None
+        self._defense_range = None
 
     @property
-    def defense_range(self):
-        li = []
+    def attack_range(self) -> list[GridPosition]:
+        """Cells this unit attacks (shared list, do not mutate)"""
+        if self._attack_range is None:
+            x, y = self._loc
+            self._attack_range = [GridPosition(x + dx, y + dy) for dx, dy in self._attack_rotations[self._face]]
+        return self._attack_range
 
-        # adjust relative defense range based on face direction
-        adjusted_relative_defense_range = [rng.adjust_with_direction(self.face) for rng in self.relative_defense_range]
-        for rel_pos in adjusted_relative_defense_range:
-            new_grid_position = self.loc + rel_pos
-            li.append(new_grid_position)
+    @property
+    def defense_range(self) -> list[GridPosition]:
+        """Cells this unit guards (shared list, do not mutate)"""
+        if self._defense_range is None:
+            x, y = self._loc
+            self._defense_range = [GridPosition(x + dx, y + dy) for dx, dy in self._defense_rotations[self._face]]
+        return self._defense_range
 
-        return li
+    @property
+    def attacking_clans(self) -> tuple[UnitClan, ...]:
+        """Clans whose attack grids this unit's attacks count towards: its own, or both with friendly fire"""
+        if self.friendly_fire:
+            return UnitClan.Ally, UnitClan.Enemy
+        return self.unit_clan,
 
     @property
     def move_destination(self) -> GridPosition | None:
@@ -70,3 +148,6 @@ class Unit:
 
         new_position = self.loc + self.face
         return new_position
+
+
+Unit._build_rotations()
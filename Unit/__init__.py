@@ -2,7 +2,26 @@
 Unit package that contains the base Unit class and specialized unit classes.
 """
 
+from enums import UnitType
 from .Unit import Unit
 from .SpearUnit import SpearUnit
+from .BowUnit import BowUnit
+from .CaptainUnit import CaptainUnit
+from .GuardianUnit import GuardianUnit
+from .ShieldUnit import ShieldUnit
+from .SwordUnit import SwordUnit
+from .WarriorUnit import WarriorUnit
 
-__all__ = ['Unit', 'SpearUnit'] 
\ No newline at end of file
+# Unit class for each unit type that has one
+UNIT_CLASSES: dict[UnitType, type[Unit]] = {
+    UnitType.Sword: SwordUnit,
+    UnitType.Spear: SpearUnit,
+    UnitType.Bow: BowUnit,
+    UnitType.Captain: CaptainUnit,
+    UnitType.Shield: ShieldUnit,
+    UnitType.Warrior: WarriorUnit,
+    UnitType.Guardian: GuardianUnit,
+}
+
+__all__ = ['Unit', 'SpearUnit', 'BowUnit', 'CaptainUnit', 'GuardianUnit', 'ShieldUnit', 'SwordUnit',
+           'WarriorUnit', 'UNIT_CLASSES']
@@ -0,0 +1,154 @@
+"""
+Batch Monte Carlo runner.
+
+Plays many independent games from the same starting layout and turn script,
+one seed per game, spread over a process pool, and aggregates the outcomes.
+
+A turn script is a string of steps: 'M' processes movement requests and 'A'
+processes attacks, e.g. "MA" * 50 plays 50 move/attack rounds.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from enums import UnitClan
+from events import OFF, EventLog
+from simulation import DEFAULT_LAYOUT, Simulation
+
+CLANS = [UnitClan.Ally, UnitClan.Enemy]
+
+
+def play_game(layout: list[dict], script: str, seed: int, row_num: int = 15, col_num: int = 15) -> dict:
+    """
+    Play one game and return its outcome.
+
+    The game stops early once a clan that was on the board at the start has
+    no units left.
+
+    Returns:
+        Dict with 'seed', 'turns' (steps played), 'survivors' and
+        'damage_dealt' per clan name (without overkill: a hit counts for at
+        most the health its target had left), and 'turns_to_wipe' per clan
+        name (None if the clan was not wiped out)
+    """
+    simulation = Simulation(row_num, col_num, events=EventLog(OFF), seed=seed)
+    simulation.load_layout(layout)
+
+    units = simulation.level_grid.units
+    starting_clans = {unit.unit_clan for unit in units.values()}
+    damage_dealt = {clan: 0 for clan in CLANS}
+    turns_to_wipe = {clan: None for clan in CLANS}
+
+    turns = 0
+    for step in script:
+        if step == 'M':
+            simulation.process_movement_requests()
+        elif step == 'A':
+            for clan, damage in simulation.process_attacks().items():
+                damage_dealt[clan] += damage
+        else:
+            raise ValueError(f"Unknown turn script step: {step!r}")
+        turns += 1
+
+        alive = {unit.unit_clan for unit in units.values()}
+        for clan in starting_clans - alive:
+            if turns_to_wipe[clan] is None:
+                turns_to_wipe[clan] = turns
+        if starting_clans - alive:
+            break
+
+    survivors = {clan: 0 for clan in CLANS}
+    for unit in units.values():
+        survivors[unit.unit_clan] += 1
+
+    return {
+        'seed': seed,
+        'turns': turns,
+        'survivors': {clan.value: count for clan, count in survivors.items()},
+        'damage_dealt': {clan.value: damage for clan, damage in damage_dealt.items()},
+        'turns_to_wipe': {clan.value: turn for clan, turn in turns_to_wipe.items()},
+    }
+
+
+def _play(args: tuple) -> dict:
+    return play_game(*args)
+
+
+def aggregate(results: list[dict]) -> dict:
+    """Summarize a list of play_game outcomes"""
+    games = len(results)
+    summary = {'games': games, 'survivors': {}, 'damage_dealt': {}, 'wipe_rate': {}, 'mean_turns_to_wipe': {}}
+    for clan in CLANS:
+        name = clan.value
+        survivors = [result['survivors'][name] for result in results]
+        summary['survivors'][name] = {
+            'mean': sum(survivors) / games if games else 0.0,
+            'min': min(survivors, default=0),
+            'max': max(survivors, default=0),
+        }
+        damage = [result['damage_dealt'][name] for result in results]
+        summary['damage_dealt'][name] = sum(damage) / games if games else 0.0
+
+        wipes = [result['turns_to_wipe'][name] for result in results if result['turns_to_wipe'][name] is not None]
+        summary['wipe_rate'][name] = len(wipes) / games if games else 0.0
+        summary['mean_turns_to_wipe'][name] = sum(wipes) / len(wipes) if wipes else None
+    return summary
+
+
+def run_batch(layout: list[dict], script: str, seeds: range | list[int], workers: int = 1,
+              row_num: int = 15, col_num: int = 15) -> dict:
+    """
+    Play one game per seed and aggregate the outcomes.
+
+    Args:
+        layout: Starting layout, in the format of simulation.DEFAULT_LAYOUT
+        script: Turn script, e.g. "MA" * 50
+        seeds: One seed per game
+        workers: Number of worker processes; 1 plays every game in this process
+        row_num: Number of rows in the grid
+        col_num: Number of columns in the grid
+
+    Returns:
+        aggregate() summary with the per-game outcomes under 'results'
+    """
+    jobs = [(layout, script, seed, row_num, col_num) for seed in seeds]
+    if workers <= 1:
+        results = [_play(job) for job in jobs]
+    else:
+        # a few chunks per worker keeps the pool busy without per-game IPC overhead
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_play, jobs, chunksize=chunksize))
+
+    summary = aggregate(results)
+    summary['results'] = results
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Play many seeded games and report aggregate statistics")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--script', default="MA" * 50)
+    parser.add_argument('--layout', help="JSON file with a layout; defaults to the game's starting layout")
+    parser.add_argument('--rows', type=int, default=15)
+    parser.add_argument('--cols', type=int, default=15)
+    args = parser.parse_args()
+
+    layout = DEFAULT_LAYOUT
+    if args.layout:
+        with open(args.layout) as f:
+            layout = json.load(f)
+
+    seeds = range(args.first_seed, args.first_seed + args.games)
+    summary = run_batch(layout, args.script, seeds, args.workers, args.rows, args.cols)
+    del summary['results']
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
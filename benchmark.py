@@ -0,0 +1,255 @@
+"""
+Benchmark suite for the turn pipeline.
+
+Generates seeded boards of several sizes and unit densities and times each
+stage of a turn: building movement requests, the two phases of collision
+resolution (picking each destination's winner, then settling chains and
+cycles), applying moves, the attack result grids, process_attacks and
+paint_board. Reports ops/sec and latency percentiles per stage, per-turn
+latency percentiles and peak memory, times the lookahead planner, and
+writes JSON that can be diffed between commits:
+
+    python benchmark.py --sizes 15 100 500 --json before.json
+    python benchmark.py --sizes 15 100 500 --json after.json --compare before.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import game_state
+from enums import UnitClan
+from events import OFF, EventLog
+from grid_position import GridPosition
+from move_collision import pick_movement_winners, resolve_movement_chains
+from planner import Planner
+from simulation import Simulation
+from Unit import UNIT_CLASSES
+from Unit.Unit import FACES
+
+DEFAULT_SIZES = [15, 50, 100, 250]
+DEFAULT_DENSITIES = [0.05, 0.2]
+
+STAGES = [
+    'movement_request',
+    'pick_movement_winners',
+    'resolve_movement_chains',
+    'apply_moves',
+    'ally_attack_result_grid',
+    'enemy_attack_result_grid',
+    'process_attacks',
+    'paint_board',
+]
+
+
+def generate_board(size: int, density: float, seed: int) -> Simulation:
+    """A size x size simulation with about density * size^2 random units"""
+    rng = random.Random(seed)
+    simulation = Simulation(size, size, seed=seed)
+    level_grid = simulation.level_grid
+    unit_classes = list(UNIT_CLASSES.values())
+
+    cells = [(x, y) for x in range(size) for y in range(size)]
+    for i, (x, y) in enumerate(rng.sample(cells, int(size * size * density))):
+        unit_class = rng.choice(unit_classes)
+        clan = rng.choice([UnitClan.Ally, UnitClan.Enemy])
+        unit = unit_class(f"u{i}", clan, GridPosition(x, y), rng.choice(FACES))
+        unit.set_group_id(rng.randint(1, 5) if clan == UnitClan.Ally else -1)
+        unit.is_marching = rng.random() < 0.5
+        level_grid.move(unit, unit.loc)
+        if clan == UnitClan.Enemy:
+            simulation.enemies.add(unit)
+    return simulation
+
+
+def run_turn(simulation: Simulation, timings: dict[str, list[float]]) -> float:
+    """Play one move + attack turn, appending each stage's time; returns the turn time"""
+    level_grid = simulation.level_grid
+    clock = time.perf_counter
+    turn_start = clock()
+
+    start = clock()
+    requests = level_grid.movement_request
+    timings['movement_request'].append(clock() - start)
+
+    start = clock()
+    # same arguments as play_movement, so ties are broken by the simulation's seeded generator
+    targets = pick_movement_winners(requests, level_grid.ROW_NUM, level_grid.COL_NUM, simulation.events,
+                                    simulation.rng)
+    timings['pick_movement_winners'].append(clock() - start)
+
+    start = clock()
+    single = resolve_movement_chains(targets, level_grid.units, simulation.events)
+    timings['resolve_movement_chains'].append(clock() - start)
+
+    start = clock()
+    level_grid.move_all(single)
+    timings['apply_moves'].append(clock() - start)
+
+    start = clock()
+    level_grid.ally_attack_result_grid
+    timings['ally_attack_result_grid'].append(clock() - start)
+
+    start = clock()
+    level_grid.enemy_attack_result_grid
+    timings['enemy_attack_result_grid'].append(clock() - start)
+
+    start = clock()
+    simulation.process_attacks()
+    timings['process_attacks'].append(clock() - start)
+
+    start = clock()
+    game_state.paint_board()
+    timings['paint_board'].append(clock() - start)
+
+    return clock() - turn_start
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    mean = sum(samples) / len(samples)
+    return {
+        'ops_per_sec': 1.0 / mean if mean > 0 else float('inf'),
+        'mean_ms': mean * 1000,
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p90_ms': percentile(samples, 90) * 1000,
+        'p99_ms': percentile(samples, 99) * 1000,
+    }
+
+
+def bench_board(size: int, density: float, turns: int, seed: int) -> dict:
+    """Time `turns` turns on one generated board, then measure peak memory on a fresh copy"""
+    simulation = generate_board(size, density, seed)
+    game_state.set_simulation(simulation)
+    units = len(simulation.level_grid.units)
+
+    timings = {stage: [] for stage in STAGES}
+    turn_times = [run_turn(simulation, timings) for _ in range(turns)]
+
+    # tracemalloc slows everything down, so memory gets its own short run
+    tracemalloc.start()
+    simulation = generate_board(size, density, seed)
+    game_state.set_simulation(simulation)
+    run_turn(simulation, {stage: [] for stage in STAGES})
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'size': size,
+        'density': density,
+        'units': units,
+        'turns': turns,
+        'stages': {stage: summarize(samples) for stage, samples in timings.items()},
+        'turn': summarize(turn_times),
+        'peak_memory_bytes': peak,
+    }
+
+
+def bench_planner(seed: int, runs: int = 10, time_budget: float = 0.05) -> dict:
+    """
+    Time planning the five groups of the default board (with three more
+    enemies) for one turn: a full two-turn search, and the depth each group
+    reaches within time_budget.
+    """
+    full_times, depths = [], []
+    for run in range(runs):
+        simulation = Simulation(15, 15, seed=seed, events=EventLog(OFF))
+        simulation.initialize_game()
+        simulation.spawn_enemy(count=3, zone='top')
+        start = time.perf_counter()
+        Planner(simulation.level_grid, max_depth=2).plan_groups([1, 2, 3, 4, 5], time_budget=60.0)
+        full_times.append(time.perf_counter() - start)
+        plans = Planner(simulation.level_grid).plan_groups([1, 2, 3, 4, 5], time_budget=time_budget)
+        depths.append(min(plan.depth for plan in plans.values()))
+    return {
+        'depth_2_search': summarize(full_times),
+        'time_budget_ms': time_budget * 1000,
+        'min_depth_in_budget': min(depths),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict) -> None:
+    """Print the per-stage mean latency ratio (baseline / current, >1 is faster)"""
+    previous = {(result['size'], result['density']): result for result in baseline['results']}
+    for result in current['results']:
+        old = previous.get((result['size'], result['density']))
+        if old is None:
+            continue
+        print(f"size={result['size']} density={result['density']}")
+        for stage in ['turn'] + STAGES:
+            new_stats = result['turn'] if stage == 'turn' else result['stages'][stage]
+            old_stats = old['turn'] if stage == 'turn' else old['stages'].get(stage)
+            if not old_stats or not new_stats['mean_ms']:
+                continue
+            speedup = old_stats['mean_ms'] / new_stats['mean_ms']
+            print(f"  {stage:34s} {old_stats['mean_ms']:10.3f} ms -> {new_stats['mean_ms']:10.3f} ms  x{speedup:.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the turn pipeline")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="board side lengths, e.g. 15 100 1000")
+    parser.add_argument('--densities', type=float, nargs='+', default=DEFAULT_DENSITIES,
+                        help="fraction of cells holding a unit")
+    parser.add_argument('--turns', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="write results to this file")
+    parser.add_argument('--compare', help="baseline JSON to compare against")
+    args = parser.parse_args()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'turns': args.turns,
+        },
+        'results': [],
+    }
+
+    for size in args.sizes:
+        for density in args.densities:
+            result = bench_board(size, density, args.turns, args.seed)
+            report['results'].append(result)
+            turn = result['turn']
+            print(f"size={size:5d} density={density:.2f} units={result['units']:7d} "
+                  f"turn p50={turn['p50_ms']:9.2f} ms p99={turn['p99_ms']:9.2f} ms "
+                  f"peak={result['peak_memory_bytes'] / 1e6:8.1f} MB")
+
+    report['planner'] = bench_planner(args.seed)
+    planner = report['planner']
+    print(f"planner depth-2 search p50={planner['depth_2_search']['p50_ms']:.2f} ms, "
+          f"depth in {planner['time_budget_ms']:.0f} ms >= {planner['min_depth_in_budget']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+"""
+Bitboards of a level grid.
+
+The board is split into chunks of CHUNK_SIZE x CHUNK_SIZE cells (see
+world.py) and every chunk has its own bitboards: Python ints with one bit
+per cell, bit y * CHUNK_SIZE + x for the cell (x, y) inside the chunk.
+Bitboards holds one for the cells each clan occupies and one for the cells
+of marching units, kept up to date as units are placed, removed and
+ordered, so whole-board questions ("enemy cells covered by ally attacks",
+"covered cells with no unit") become a few bitwise operations per chunk.
+A chunk only has entries while units are in it, so boards of any size cost
+memory and time in proportion to their occupied chunks.
+
+Attack coverage is built with shift kernels: units are also grouped by
+their rotated attack range, and a clan's coverage of a chunk is the OR of
+each group's bitboard, in the chunk and its eight neighbours, shifted by
+every offset of its range. That is one shift per (range, offset) pair
+however many units there are. Ranges are assumed to reach less than a chunk.
+Coverage is rebuilt on first use after the groups around a chunk change.
+"""
+from __future__ import annotations
+
+from enums import UnitClan
+from grid_position import GridPosition
+from Unit import Unit
+from world import CHUNK_SIZE, chunk_neighbours
+
+Chunk = tuple[int, int]
+
+
+def bit_indices(bitboard: int) -> list[int]:
+    """Indices of the set bits, lowest first"""
+    digits = bin(bitboard)[:1:-1]
+    indices = []
+    i = digits.find('1')
+    while i != -1:
+        indices.append(i)
+        i = digits.find('1', i + 1)
+    return indices
+
+
+class Bitboards:
+    def __init__(self, row_num: int, col_num: int, chunk_size: int = CHUNK_SIZE) -> None:
+        self.row_num = row_num
+        self.col_num = col_num
+        self.chunk_size = chunk_size
+        # every cell of a chunk
+        self.full = (1 << (chunk_size * chunk_size)) - 1
+        # clan -> chunk -> cells the clan occupies
+        self.occupied: dict[UnitClan, dict[Chunk, int]] = {clan: {} for clan in UnitClan}
+        self.marching: dict[Chunk, int] = {}
+        # clan whose attack grid a unit stamps -> chunk -> rotated attack range -> cells of those units
+        self._groups: dict[UnitClan, dict[Chunk, dict[tuple[GridPosition, ...], int]]] = {
+            clan: {} for clan in UnitClan}
+        # clan -> chunk -> number of group changes in the chunk so far
+        self._versions: dict[UnitClan, dict[Chunk, int]] = {clan: {} for clan in UnitClan}
+        # clan -> chunk -> (versions of the chunk and its neighbours, coverage built from them)
+        self._coverage: dict[UnitClan, dict[Chunk, tuple[tuple[int, ...], int]]] = {clan: {} for clan in UnitClan}
+        self._neighbours: dict[Chunk, list[Chunk]] = {}
+        # what each unit has set in _groups: (clans, range, chunk, bit)
+        self._entries: dict[Unit, tuple[tuple[UnitClan, ...], tuple[GridPosition, ...], Chunk, int]] = {}
+        self._column_masks: dict[int, int] = {}
+        self._board_masks: dict[tuple[int, int], int] = {}
+
+    def locate(self, pos: GridPosition) -> tuple[Chunk | None, int]:
+        """The chunk and bit of an in-bounds cell, or (None, 0) for a cell off the board"""
+        x, y = pos
+        if 0 <= x < self.col_num and 0 <= y < self.row_num:
+            size = self.chunk_size
+            return (x // size, y // size), 1 << (y % size * size + x % size)
+        return None, 0
+
+    def place(self, unit: Unit, pos: GridPosition) -> None:
+        chunk, bit = self.locate(pos)
+        if chunk is None:
+            return
+        occupied = self.occupied[unit.unit_clan]
+        occupied[chunk] = occupied.get(chunk, 0) | bit
+        if unit.is_marching:
+            self.marching[chunk] = self.marching.get(chunk, 0) | bit
+
+    def remove(self, unit: Unit, pos: GridPosition) -> None:
+        chunk, bit = self.locate(pos)
+        if chunk is None:
+            return
+        _clear(self.occupied[unit.unit_clan], chunk, bit)
+        _clear(self.marching, chunk, bit)
+
+    def set_marching(self, pos: GridPosition, is_marching: bool) -> None:
+        chunk, bit = self.locate(pos)
+        if chunk is None:
+            return
+        if is_marching:
+            self.marching[chunk] = self.marching.get(chunk, 0) | bit
+        else:
+            _clear(self.marching, chunk, bit)
+
+    def stamp(self, unit: Unit) -> None:
+        """Add the unit to the range group of every clan whose attack grid it stamps (see LevelGrid._stamp)"""
+        chunk, bit = self.locate(unit.loc)
+        if chunk is None:
+            return
+        clans = unit.attacking_clans
+        attack_range = unit._attack_rotations[unit.face]
+        for clan in clans:
+            groups = self._groups[clan].get(chunk)
+            if groups is None:
+                groups = self._groups[clan][chunk] = {}
+            groups[attack_range] = groups.get(attack_range, 0) | bit
+            self._invalidate(clan, chunk)
+        self._entries[unit] = (clans, attack_range, chunk, bit)
+
+    def unstamp(self, unit: Unit) -> None:
+        entry = self._entries.pop(unit, None)
+        if entry is None:
+            return
+        clans, attack_range, chunk, bit = entry
+        for clan in clans:
+            chunk_groups = self._groups[clan]
+            groups = chunk_groups[chunk]
+            cells = groups[attack_range] ^ bit
+            if cells:
+                groups[attack_range] = cells
+            else:
+                del groups[attack_range]
+                if not groups:
+                    del chunk_groups[chunk]
+            self._invalidate(clan, chunk)
+
+    def _invalidate(self, clan: UnitClan, chunk: Chunk) -> None:
+        """Mark the groups of a chunk changed; coverage cached around it is rebuilt on next use"""
+        versions = self._versions[clan]
+        versions[chunk] = versions.get(chunk, 0) + 1
+
+    def _chunk_neighbours(self, chunk: Chunk) -> list[Chunk]:
+        neighbours = self._neighbours.get(chunk)
+        if neighbours is None:
+            neighbours = self._neighbours[chunk] = chunk_neighbours(chunk)
+        return neighbours
+
+    def coverage(self, clan: UnitClan, chunk: Chunk) -> int:
+        """On-board cells of a chunk in the clan's attack grid"""
+        neighbours = self._chunk_neighbours(chunk)
+        versions = self._versions[clan]
+        # coverage only changes when the groups of the chunk or a neighbour do
+        key = tuple([versions.get(neighbour, 0) for neighbour in neighbours])
+        cached = self._coverage[clan].get(chunk)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        coverage = 0
+        size = self.chunk_size
+        cx, cy = chunk
+        chunk_groups = self._groups[clan]
+        for neighbour in neighbours:
+            groups = chunk_groups.get(neighbour)
+            if not groups:
+                continue
+            # offset of the neighbour's cells in this chunk's frame
+            ox, oy = (neighbour[0] - cx) * size, (neighbour[1] - cy) * size
+            for attack_range, cells in groups.items():
+                for dx, dy in attack_range:
+                    coverage |= self.shift(cells, dx + ox, dy + oy)
+        coverage &= self.board_mask(chunk)
+        self._coverage[clan][chunk] = (key, coverage)
+        return coverage
+
+    def coverage_chunks(self, clan: UnitClan) -> set[Chunk]:
+        """Every chunk on the board the clan's attack grid can reach"""
+        chunks = set()
+        for chunk in self._groups[clan]:
+            chunks.update(self._chunk_neighbours(chunk))
+        return {chunk for chunk in chunks if self.board_mask(chunk)}
+
+    def occupied_any(self, chunk: Chunk) -> int:
+        """Cells of a chunk holding a unit of either clan"""
+        bits = 0
+        for occupied in self.occupied.values():
+            bits |= occupied.get(chunk, 0)
+        return bits
+
+    def active_chunks(self) -> set[Chunk]:
+        """Chunks holding at least one unit"""
+        chunks = set()
+        for occupied in self.occupied.values():
+            chunks.update(occupied)
+        return chunks
+
+    def shift(self, bitboard: int, dx: int, dy: int) -> int:
+        """Move every cell of a chunk bitboard by (dx, dy), dropping cells that leave the chunk"""
+        size = self.chunk_size
+        if not -size < dx < size or not -size < dy < size:
+            return 0
+        amount = dy * size + dx
+        shifted = bitboard << amount if amount >= 0 else bitboard >> -amount
+        if dx:
+            # cells shifted across the left or right edge wrap into the next row
+            shifted &= self._column_mask(dx)
+        return shifted & self.full
+
+    def _column_mask(self, dx: int) -> int:
+        """Cells in the columns a shift by dx can land on without wrapping"""
+        mask = self._column_masks.get(dx)
+        if mask is None:
+            size = self.chunk_size
+            if dx > 0:
+                row = ((1 << size) - 1) & ~((1 << dx) - 1)
+            else:
+                row = (1 << (size + dx)) - 1
+            mask = self._column_masks[dx] = self._repeat(row, size)
+        return mask
+
+    def board_mask(self, chunk: Chunk) -> int:
+        """Cells of a chunk that lie on the board; only chunks on the right and top edges are partial"""
+        size = self.chunk_size
+        width = min(size, self.col_num - chunk[0] * size)
+        height = min(size, self.row_num - chunk[1] * size)
+        if chunk[0] < 0 or chunk[1] < 0 or width <= 0 or height <= 0:
+            return 0
+        mask = self._board_masks.get((width, height))
+        if mask is None:
+            mask = self._board_masks[width, height] = self._repeat((1 << width) - 1, height)
+        return mask
+
+    def rect_mask(self, chunk: Chunk, x0: int, y0: int, x1: int, y1: int) -> int:
+        """Cells of a chunk inside the board rectangle from (x0, y0) to (x1, y1) inclusive"""
+        size = self.chunk_size
+        cx, cy = chunk[0] * size, chunk[1] * size
+        left, right = max(x0 - cx, 0), min(x1 - cx, size - 1)
+        bottom, top = max(y0 - cy, 0), min(y1 - cy, size - 1)
+        if left > right or bottom > top:
+            return 0
+        row = ((1 << (right + 1)) - 1) & ~((1 << left) - 1)
+        return self._repeat(row, top - bottom + 1) << (bottom * size)
+
+    def _repeat(self, row: int, height: int) -> int:
+        """A row pattern repeated on the first height rows of a chunk"""
+        size = self.chunk_size
+        return row * (((1 << (size * height)) - 1) // ((1 << size) - 1))
+
+    def cells(self, chunk: Chunk, bitboard: int) -> list[tuple[int, int]]:
+        """Board (x, y) of the set cells of a chunk bitboard, row by row"""
+        size = self.chunk_size
+        x0, y0 = chunk[0] * size, chunk[1] * size
+        return [(x0 + i % size, y0 + i // size) for i in bit_indices(bitboard)]
+
+
+def _clear(chunks: dict[Chunk, int], chunk: Chunk, bit: int) -> None:
+    """Clear one bit of a chunk, dropping the chunk once it is empty"""
+    bits = chunks.get(chunk, 0)
+    if bits & bit:
+        bits ^= bit
+        if bits:
+            chunks[chunk] = bits
+        else:
+            del chunks[chunk]
@@ -0,0 +1,87 @@
+"""
+Camera over the painted board.
+
+The window shows a viewport of the board: the camera holds the board cell
+at the top-left of the window and the zoom (pixels per cell), and maps
+board cells (row, col), as used by game_state, to screen rectangles.
+Painting and drawing only visit the cells the camera can see, so frame cost
+follows the window size rather than the board size.
+"""
+from __future__ import annotations
+
+
+class Camera:
+    def __init__(self, rows: int, cols: int, width: int, height: int, cell_size: int = 40,
+                 min_cell_size: int = 4, max_cell_size: int = 80) -> None:
+        """
+        Args:
+            rows, cols: Size of the board
+            width, height: Size of the window in pixels
+            cell_size: Starting zoom, in pixels per cell; also the zoom text sizes are given for
+            min_cell_size, max_cell_size: Zoom limits
+        """
+        self.rows = rows
+        self.cols = cols
+        self.width = width
+        self.height = height
+        self.base_cell_size = cell_size
+        self.cell_size = cell_size
+        self.min_cell_size = min_cell_size
+        self.max_cell_size = max_cell_size
+        # board cell shown at the top-left corner of the window
+        self.row = 0
+        self.col = 0
+
+    @property
+    def view_rows(self) -> int:
+        """Rows that fit in the window, counting a partly visible last one"""
+        return -(-self.height // self.cell_size)
+
+    @property
+    def view_cols(self) -> int:
+        return -(-self.width // self.cell_size)
+
+    @property
+    def view(self) -> tuple[int, int, int]:
+        """(row, col, cell_size); when it changes the whole window needs redrawing"""
+        return self.row, self.col, self.cell_size
+
+    def visible(self) -> tuple[int, int, int, int]:
+        """Visible cells as (first row, first col, end row, end col), ends exclusive"""
+        return (self.row, self.col,
+                min(self.rows, self.row + self.view_rows), min(self.cols, self.col + self.view_cols))
+
+    def contains(self, i: int, j: int) -> bool:
+        row0, col0, row1, col1 = self.visible()
+        return row0 <= i < row1 and col0 <= j < col1
+
+    def covers_board(self) -> bool:
+        """True if the whole board is in view"""
+        return self.visible() == (0, 0, self.rows, self.cols)
+
+    def screen_cell(self, i: int, j: int) -> tuple[int, int]:
+        """(row, col) of a board cell counted from the window's top-left cell"""
+        return i - self.row, j - self.col
+
+    def pan(self, rows: int, cols: int) -> None:
+        """Move the view by a number of cells, stopping at the board edges"""
+        self._move_to(self.row + rows, self.col + cols)
+
+    def center_on(self, i: int, j: int) -> None:
+        self._move_to(i - self.view_rows // 2, j - self.view_cols // 2)
+
+    def zoom(self, factor: float) -> None:
+        """Scale the cell size, keeping the cell at the center of the window in place"""
+        center = (self.row + self.view_rows // 2, self.col + self.view_cols // 2)
+        cell_size = int(round(self.cell_size * factor))
+        self.cell_size = max(self.min_cell_size, min(self.max_cell_size, cell_size))
+        self.center_on(*center)
+
+    def text_size(self, size: int) -> int:
+        """A font size given at the base zoom, scaled to the current zoom"""
+        return size * self.cell_size // self.base_cell_size
+
+    def _move_to(self, row: int, col: int) -> None:
+        # whole cells only; the last row and column may be partly visible
+        self.row = max(0, min(row, self.rows - self.height // self.cell_size))
+        self.col = max(0, min(col, self.cols - self.width // self.cell_size))
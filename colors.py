@@ -1,5 +1,4 @@
 from enum import Enum
-import pygame
 
 class GameColor(Enum):
     RED = (255, 0, 0)
@@ -0,0 +1,202 @@
+"""
+Array-backed board storage for LevelGrid.
+
+DenseBoard keeps the occupant of every cell in ROW_NUM x COL_NUM NumPy arrays
+and the units themselves in a struct-of-arrays table, while still behaving
+like the `dict[GridPosition, Unit]` that LevelGrid.units normally is.
+Arrays are indexed [y, x], matching GridPosition(x, y).
+"""
+from __future__ import annotations
+
+from collections.abc import Iterator, MutableMapping
+
+import numpy as np
+
+from enums import UnitClan
+from grid_position import GridPosition
+from Unit import Unit
+from Unit.Unit import FACE_CODES
+
+EMPTY = 0
+ALLY = 1
+ENEMY = 2
+CLAN_CODES = {UnitClan.Ally: ALLY, UnitClan.Enemy: ENEMY}
+
+# distinct (relative attack range, relative defense range) shapes seen so far,
+# shared by every board; the index is the unit's kind code
+KINDS: list[tuple[tuple[GridPosition, ...], tuple[GridPosition, ...]]] = []
+_KIND_CODES: dict[tuple[tuple[GridPosition, ...], tuple[GridPosition, ...]], int] = {}
+
+
+def kind_of(unit: Unit) -> int:
+    """Return the kind code for a unit's range shape, registering it on first use"""
+    kind = (tuple(unit.relative_attack_range), tuple(unit.relative_defense_range))
+    code = _KIND_CODES.get(kind)
+    if code is None:
+        code = len(KINDS)
+        KINDS.append(kind)
+        _KIND_CODES[kind] = code
+    return code
+
+
+class DenseBoard(MutableMapping):
+    """
+    Mapping of GridPosition -> Unit stored in NumPy arrays.
+
+    Per-cell arrays: occupant (unit table slot, -1 if empty), clan, health,
+    attack and defense (the occupant's self defense).
+    Unit table arrays, one entry per slot: x, y, face, clan, kind, health,
+    attack, self_defense, guardian_defense, priority, friendly_fire, marching
+    and alive.
+
+    Units are only ever placed off the board when LevelGrid.move is given
+    such a position (turns move units with LevelGrid.move_all, which never
+    leaves the board); those are kept in a small overflow dict.
+    Iteration follows unit table slot order rather than insertion order.
+    """
+
+    def __init__(self, row_num: int, col_num: int, capacity: int = 64) -> None:
+        self.row_num = row_num
+        self.col_num = col_num
+
+        shape = (row_num, col_num)
+        self.occupant = np.full(shape, -1, dtype=np.int32)
+        self.clan = np.zeros(shape, dtype=np.int8)
+        self.health = np.zeros(shape, dtype=np.int16)
+        self.attack = np.zeros(shape, dtype=np.int16)
+        self.defense = np.zeros(shape, dtype=np.int16)
+
+        self.unit_x = np.zeros(capacity, dtype=np.int32)
+        self.unit_y = np.zeros(capacity, dtype=np.int32)
+        self.unit_face = np.zeros(capacity, dtype=np.int8)
+        self.unit_clan = np.zeros(capacity, dtype=np.int8)
+        self.unit_kind = np.zeros(capacity, dtype=np.int16)
+        self.unit_health = np.zeros(capacity, dtype=np.int16)
+        self.unit_attack = np.zeros(capacity, dtype=np.int16)
+        self.unit_self_defense = np.zeros(capacity, dtype=np.int16)
+        self.unit_guardian_defense = np.zeros(capacity, dtype=np.int16)
+        self.unit_priority = np.zeros(capacity, dtype=np.int16)
+        self.unit_friendly_fire = np.zeros(capacity, dtype=bool)
+        self.unit_marching = np.zeros(capacity, dtype=bool)
+        self.unit_alive = np.zeros(capacity, dtype=bool)
+
+        self.unit_objects: list[Unit | None] = [None] * capacity
+        self._keys: list[GridPosition | None] = [None] * capacity
+        self._slot_of: dict[Unit, int] = {}
+        self._free: list[int] = list(reversed(range(capacity)))
+        self._overflow: dict[GridPosition, int] = {}
+
+    _TABLE_ARRAYS = ('unit_x', 'unit_y', 'unit_face', 'unit_clan', 'unit_kind', 'unit_health',
+                     'unit_attack', 'unit_self_defense', 'unit_guardian_defense', 'unit_priority',
+                     'unit_friendly_fire', 'unit_marching', 'unit_alive')
+
+    def _in_bounds(self, pos: GridPosition) -> bool:
+        return 0 <= pos.x < self.col_num and 0 <= pos.y < self.row_num
+
+    def _slot_at(self, pos: GridPosition) -> int:
+        if self._in_bounds(pos):
+            return int(self.occupant[pos.y, pos.x])
+        return self._overflow.get(pos, -1)
+
+    def _grow(self) -> None:
+        old = len(self.unit_objects)
+        new = old * 2
+        for name in self._TABLE_ARRAYS:
+            arr = getattr(self, name)
+            grown = np.zeros(new, dtype=arr.dtype)
+            grown[:old] = arr
+            setattr(self, name, grown)
+        self.unit_objects.extend([None] * old)
+        self._keys.extend([None] * old)
+        self._free.extend(reversed(range(old, new)))
+
+    def _alloc(self, unit: Unit) -> int:
+        if not self._free:
+            self._grow()
+        slot = self._free.pop()
+        self.unit_objects[slot] = unit
+        self._slot_of[unit] = slot
+        self.unit_alive[slot] = True
+        return slot
+
+    def _clear_cell(self, slot: int) -> None:
+        pos = self._keys[slot]
+        if self._in_bounds(pos):
+            self.occupant[pos.y, pos.x] = -1
+            self.clan[pos.y, pos.x] = EMPTY
+            self.health[pos.y, pos.x] = 0
+            self.attack[pos.y, pos.x] = 0
+            self.defense[pos.y, pos.x] = 0
+        else:
+            del self._overflow[pos]
+        self._keys[slot] = None
+
+    def __getitem__(self, pos: GridPosition) -> Unit:
+        slot = self._slot_at(pos)
+        if slot < 0:
+            raise KeyError(pos)
+        return self.unit_objects[slot]
+
+    def __contains__(self, pos: object) -> bool:
+        return isinstance(pos, GridPosition) and self._slot_at(pos) >= 0
+
+    def __setitem__(self, pos: GridPosition, unit: Unit) -> None:
+        if self._slot_at(pos) >= 0:
+            del self[pos]
+
+        slot = self._slot_of.get(unit)
+        if slot is None:
+            slot = self._alloc(unit)
+        else:
+            # a unit occupies a single cell
+            self._clear_cell(slot)
+
+        self._keys[slot] = pos
+        if self._in_bounds(pos):
+            self.occupant[pos.y, pos.x] = slot
+        else:
+            self._overflow[pos] = slot
+        self.unit_x[slot] = pos.x
+        self.unit_y[slot] = pos.y
+        self.unit_clan[slot] = CLAN_CODES[unit.unit_clan]
+        self.unit_kind[slot] = kind_of(unit)
+        self.unit_attack[slot] = unit.attack
+        self.unit_self_defense[slot] = unit.self_defense
+        self.unit_guardian_defense[slot] = unit.guardian_defense
+        self.unit_priority[slot] = unit.priority
+        self.unit_friendly_fire[slot] = unit.friendly_fire
+        self.sync_unit(unit)
+
+    def __delitem__(self, pos: GridPosition) -> None:
+        slot = self._slot_at(pos)
+        if slot < 0:
+            raise KeyError(pos)
+        self._clear_cell(slot)
+        unit = self.unit_objects[slot]
+        del self._slot_of[unit]
+        self.unit_objects[slot] = None
+        self.unit_alive[slot] = False
+        self._free.append(slot)
+
+    def __iter__(self) -> Iterator[GridPosition]:
+        for slot in np.flatnonzero(self.unit_alive):
+            yield self._keys[slot]
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def sync_unit(self, unit: Unit) -> None:
+        """Copy the mutable state of a unit (health, face, marching) into the arrays"""
+        slot = self._slot_of.get(unit)
+        if slot is None:
+            return
+        self.unit_health[slot] = unit.health
+        self.unit_face[slot] = FACE_CODES.get(unit.face, 0)
+        self.unit_marching[slot] = unit.is_marching
+
+        pos = self._keys[slot]
+        if self._in_bounds(pos):
+            self.clan[pos.y, pos.x] = self.unit_clan[slot]
+            self.health[pos.y, pos.x] = unit.health
+            self.attack[pos.y, pos.x] = unit.attack
+            self.defense[pos.y, pos.x] = unit.self_defense
@@ -5,6 +5,10 @@ class UnitClan(Enum):
     Ally = "Ally"
     Enemy = "Enemy"
 
+    # members are singletons, so identity hashing is exact; it runs in C,
+    # unlike Enum's default, and clans key many dicts on the hot paths
+    __hash__ = object.__hash__
+
 
 class UnitType(Enum):
     Sword = "Sword"
@@ -13,4 +17,5 @@ class UnitType(Enum):
     Captain = "Captain"
     Shield = "Shield"
     AntiSpear = "AntiSpear"
-    Warrior = "Warrior"
\ No newline at end of file
+    Warrior = "Warrior"
+    Guardian = "Guardian"
\ No newline at end of file
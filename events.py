@@ -0,0 +1,117 @@
+"""
+Structured event log for the rules engine.
+
+Collision resolution and combat report what happened as compact Event
+records instead of printing. Records go into a bounded ring buffer and to
+any registered sinks (callables taking an Event), so tests, replay tools and
+the game console can all consume the same stream.
+
+Every kind has a level. Producers check the level once per call before
+building any record, so a log at OFF costs a single comparison per turn.
+"""
+from __future__ import annotations
+
+from collections import deque
+from enum import Enum
+from typing import Callable, Iterator, NamedTuple
+
+from grid_position import GridPosition
+
+# Levels, lowest to highest; a log records kinds at or above its level
+DEBUG = 10
+INFO = 20
+OFF = 100
+
+
+class EventKind(Enum):
+    CollisionDropped = "collision-dropped"
+    TieBroken = "tie-broken"
+    OppositeClanBlocked = "opposite-clan-blocked"
+    DamageApplied = "damage-applied"
+    UnitDied = "unit-died"
+
+
+LEVELS = {
+    EventKind.CollisionDropped: DEBUG,
+    EventKind.TieBroken: DEBUG,
+    EventKind.OppositeClanBlocked: DEBUG,
+    EventKind.DamageApplied: INFO,
+    EventKind.UnitDied: INFO,
+}
+
+
+class Event(NamedTuple):
+    """
+    One engine event.
+
+    pos is the cell the event happened at (the contested destination for
+    collisions), unit the name of the unit involved and value a kind-specific
+    detail: the drop reason, the number of tied candidates or the damage.
+    """
+    turn: int
+    kind: EventKind
+    pos: GridPosition
+    unit: str | None = None
+    value: int | str | None = None
+
+
+class EventLog:
+    def __init__(self, level: int = INFO, capacity: int = 10000,
+                 sinks: list[Callable[[Event], None]] | None = None) -> None:
+        """
+        Args:
+            level: Lowest level recorded; OFF records nothing
+            capacity: Number of events kept, oldest dropped first
+            sinks: Callables receiving every recorded event
+        """
+        self.level = level
+        self.turn = 0
+        self.events: deque[Event] = deque(maxlen=capacity)
+        self.sinks = list(sinks) if sinks else []
+
+    def enabled(self, level: int) -> bool:
+        return level >= self.level
+
+    def emit(self, kind: EventKind, pos: GridPosition, unit: str | None = None,
+             value: int | str | None = None) -> None:
+        if LEVELS[kind] < self.level:
+            return
+        event = Event(self.turn, kind, pos, unit, value)
+        self.events.append(event)
+        for sink in self.sinks:
+            sink(event)
+
+    def add_sink(self, sink: Callable[[Event], None]) -> None:
+        self.sinks.append(sink)
+
+    def of_kind(self, kind: EventKind) -> list[Event]:
+        return [event for event in self.events if event.kind == kind]
+
+    def drain(self) -> list[Event]:
+        """Return the buffered events and empty the buffer"""
+        events = list(self.events)
+        self.events.clear()
+        return events
+
+    def clear(self) -> None:
+        self.events.clear()
+
+    def __iter__(self) -> Iterator[Event]:
+        return iter(self.events)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+
+def active(events: EventLog | None, level: int) -> EventLog | None:
+    """The log if it records this level, else None; call once before a hot loop"""
+    if events is not None and level >= events.level:
+        return events
+    return None
+
+
+def print_sink(event: Event) -> None:
+    """Sink writing one readable line per event to stdout"""
+    detail = f" ({event.value})" if event.value is not None else ""
+    unit = f" {event.unit}" if event.unit is not None else ""
+    print(f"[turn {event.turn}] {event.kind.value}{unit} at {event.pos}{detail}")
@@ -1,47 +1,71 @@
 """
 Game state module to store global variables and state.
 This module serves as a central location for game state management.
+The rules engine is a headless Simulation; this module adds the painted
+board on top of it and draws it through renderer, which only imports
+pygame when the first frame is drawn.
+
+The painted board is stored in chunked layers (see world.ChunkedGrid)
+addressed by (row, col), so a huge, mostly empty board only stores the
+chunks that were painted. The window is a camera viewport on the board:
+paint_board() only paints, and draw_grid() only draws, the cells in view,
+and a minimap of the whole board is drawn when it does not fit.
 """
-import uuid
-
-import pygame
 import random
 
-from Unit.BowUnit import BowUnit
-from Unit.CaptainUnit import CaptainUnit
-from Unit.GuardianUnit import GuardianUnit
-from Unit.ShieldUnit import ShieldUnit
-from Unit.SwordUnit import SwordUnit
-from Unit.WarriorUnit import WarriorUnit
+import numpy as np
+
 from grid_position import GridPosition
-from level_grid import LevelGrid
-from Unit import Unit, SpearUnit
 from enums import UnitClan
 from colors import GameColor, combine_colors
-from move_collision import resolve_movement_collision
-
-# Initialize Pygame
-pygame.init()
+from simulation import Simulation
+from world import ChunkedGrid
+from camera import Camera
+from Unit import Unit, UNIT_CLASSES
+import renderer
 
 # Constants
 CELL_SIZE = 40
 GRID_M = 15  # Number of rows
 GRID_N = 15  # Number of columns
-WINDOW_WIDTH = GRID_N * CELL_SIZE
-WINDOW_HEIGHT = GRID_M * CELL_SIZE
+# Larger boards are shown through the camera
+MAX_WINDOW_WIDTH = 1200
+MAX_WINDOW_HEIGHT = 800
+WINDOW_WIDTH = min(GRID_N * CELL_SIZE, MAX_WINDOW_WIDTH)
+WINDOW_HEIGHT = min(GRID_M * CELL_SIZE, MAX_WINDOW_HEIGHT)
+# Longest side of the minimap, in pixels
+MINIMAP_SIZE = 160
 
-# Set up the display
-screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-pygame.display.set_caption("Grid Game")
+# Part of the board shown in the window
+camera = Camera(GRID_M, GRID_N, WINDOW_WIDTH, WINDOW_HEIGHT, CELL_SIZE)
 
 # Initialize grid data
-grid_colors = [[GameColor.WHITE.value for _ in range(GRID_N)] for _ in range(GRID_M)]
-grid_texts = [['' for _ in range(GRID_N)] for _ in range(GRID_M)]
-grid_text_sizes = [[24 for _ in range(GRID_N)] for _ in range(GRID_M)]  # Default font size
+grid_colors = ChunkedGrid(GRID_M, GRID_N, GameColor.WHITE.value)
+grid_texts = ChunkedGrid(GRID_M, GRID_N, '')
+grid_text_sizes = ChunkedGrid(GRID_M, GRID_N, 24)  # Default font size
+
+# Cells (row, col) whose color, text or text size changed since the last draw_grid()
+dirty_cells: set[tuple[int, int]] = set()
+
+# Colors of the cells in view as composited by paint_board(), top row first, and the
+# camera.visible() rect they cover; None while the board is painted cell by cell into grid_colors
+view_colors: np.ndarray | None = None
+view_colors_rect: tuple[int, int, int, int] | None = None
 
-# Fonts
-font = pygame.font.Font(None, 24)
-large_font = pygame.font.Font(None, 36)  # Larger font for selected units
+# Whether the next draw_grid() redraws every cell in view
+_redraw_view = True
+
+# Unit colors by clan and marching state
+UNIT_COLORS = {
+    (UnitClan.Ally, True): GameColor.BLUE.value,
+    (UnitClan.Ally, False): GameColor.LIGHT_BLUE.value,
+    (UnitClan.Enemy, True): GameColor.PURPLE.value,
+    (UnitClan.Enemy, False): GameColor.ORANGE.value,
+}
+
+# Furthest a unit's defense range reaches from the unit, on either axis
+DEFENSE_REACH = max([abs(c) for cls in [Unit, *UNIT_CLASSES.values()]
+                     for pos in cls.relative_defense_range for c in pos], default=0)
 
 # Available colors for painting
 AVAILABLE_COLORS = [
@@ -60,144 +84,97 @@ current_position = 0
 # Flag to toggle between board states
 show_board = False
 
-# Selected units (list to store multiple units)
-selected_units = []
+# Rules engine (singleton)
+simulation = Simulation(GRID_M, GRID_N)
+level_grid = simulation.level_grid
+
+# Colors picked by paint_cell; kept apart from the simulation's generator so
+# painting never changes how a game plays out
+paint_rng = random.Random()
+
+# Minimap colors and the (board hash, size) they were built for
+_minimap: tuple[tuple[int, int, int], np.ndarray] | None = None
+
 
-# Level grid (singleton)
-level_grid = LevelGrid(GRID_M, GRID_N)
+def set_simulation(new_simulation: Simulation):
+    """Switch to another engine, resizing the painted board, window and camera to its grid"""
+    global simulation, level_grid, GRID_M, GRID_N, grid_colors, grid_texts, grid_text_sizes, paint_rng
+    global WINDOW_WIDTH, WINDOW_HEIGHT, camera, _minimap, view_colors, view_colors_rect, _redraw_view
 
-# Game units
-ally1 = GuardianUnit("G", UnitClan.Ally, GridPosition(1, 1), GridPosition(0, 1))  # Facing north
-ally2 = ShieldUnit("S", UnitClan.Ally, GridPosition(2, 2), GridPosition(1, 0))  # Facing east
-ally3 = CaptainUnit("C", UnitClan.Ally, GridPosition(3, 3), GridPosition(1, 0))
-ally4 = BowUnit("B", UnitClan.Ally, GridPosition(4, 4), GridPosition(1, 0))
-ally5 = WarriorUnit("W", UnitClan.Ally, GridPosition(5, 5), GridPosition(1, 0))
+    simulation = new_simulation
+    level_grid = simulation.level_grid
+    GRID_M, GRID_N = level_grid.ROW_NUM, level_grid.COL_NUM
+    grid_colors = ChunkedGrid(GRID_M, GRID_N, GameColor.WHITE.value)
+    grid_texts = ChunkedGrid(GRID_M, GRID_N, '')
+    grid_text_sizes = ChunkedGrid(GRID_M, GRID_N, 24)
+    dirty_cells.clear()
+    view_colors = view_colors_rect = None
+    _redraw_view = True
+    paint_rng = random.Random(simulation.seed)
+    WINDOW_WIDTH = min(GRID_N * CELL_SIZE, MAX_WINDOW_WIDTH)
+    WINDOW_HEIGHT = min(GRID_M * CELL_SIZE, MAX_WINDOW_HEIGHT)
+    camera = Camera(GRID_M, GRID_N, WINDOW_WIDTH, WINDOW_HEIGHT, CELL_SIZE)
+    _minimap = None
 
 
-# enemy1 = SwordUnit("C", UnitClan.Enemy, GridPosition(1, 4), GridPosition(0, -1))  # Facing south
-# enemy2 = WarriorUnit("D", UnitClan.Enemy, GridPosition(4, 1), GridPosition(-1, 0))  # Facing west
+def open_window():
+    """Open the game window"""
+    return renderer.get_screen(WINDOW_WIDTH, WINDOW_HEIGHT)
+
 
-# Initialize game units
 def initialize_game():
     """Initialize the game state with units and their positions"""
-    global ally1, ally2, ally3, ally4, ally5, selected_units
-    # enemy1, enemy2,
-
-    # Set group IDs
-    ally1.set_group_id(1)
-    ally2.set_group_id(2)
-    ally3.set_group_id(3)
-    ally4.set_group_id(4)
-    ally5.set_group_id(5)
-    # enemy1.set_group_id(2)
-    # enemy2.set_group_id(2)
-
-    # Place units on the grid
-    level_grid.move(ally1, ally1.loc)
-    level_grid.move(ally2, ally2.loc)
-    level_grid.move(ally3, ally3.loc)
-    level_grid.move(ally4, ally4.loc)
-    level_grid.move(ally5, ally5.loc)
-    # level_grid.move(enemy1, GridPosition(1, 4))
-    # level_grid.move(enemy2, GridPosition(4, 1))
-
-    # Set the selected units to ally1 and ally2 initially (group 1)
+    simulation.initialize_game()
     select_units_by_group(1)
 
 
 def select_units_by_group(group_id: int):
     """Select all units that belong to the specified group"""
-    global selected_units
-
-    # Clear the current selection
-    selected_units = []
-
     # Reset all text sizes to default
-    for i in range(GRID_M):
-        for j in range(GRID_N):
-            grid_text_sizes[i][j] = 24
+    for i, j in list(grid_text_sizes.cells_not(24)):
+        grid_text_sizes.set(i, j, 24)
+        dirty_cells.add((i, j))
 
-    # Find all units with the specified group_id
-    for unit in level_grid.units.values():
-        if unit.group_id == group_id:
-            selected_units.append(unit)
-
-            # Set larger font size for selected units
-            python_pos = unit.loc.to_python(GRID_M)
-            row, col = python_pos
-            if 0 <= row < GRID_M and 0 <= col < GRID_N:
-                grid_text_sizes[row][col] = 36
+    selected_units = simulation.select_units_by_group(group_id)
 
     # If no units found, print a message
     if not selected_units:
         print(f"No units found in group {group_id}")
 
+    for unit in selected_units:
+        # Set larger font size for selected units
+        python_pos = unit.loc.to_python(GRID_M)
+        row, col = python_pos
+        if 0 <= row < GRID_M and 0 <= col < GRID_N:
+            grid_text_sizes.set(row, col, 36)
+            dirty_cells.add((row, col))
+
 
 def update_selected_units_face(direction):
     """Update the face direction of all selected units"""
-    global selected_units
-
-    if not selected_units:
-        return
-
-    # Update the face direction based on the input
-    if direction == 'W':  # North
-        new_face = GridPosition(0, 1)
-    elif direction == 'S':  # South
-        new_face = GridPosition(0, -1)
-    elif direction == 'A':  # West
-        new_face = GridPosition(-1, 0)
-    elif direction == 'D':  # East
-        new_face = GridPosition(1, 0)
-    else:
-        return
-
-    # Update all selected units
-    for unit in selected_units:
-        unit.face = new_face
+    simulation.update_selected_units_face(direction)
 
 
 def toggle_selected_units_marching():
     """Toggle the marching state of all selected units"""
-    global selected_units
-
-    if not selected_units:
-        return
-
-    # Toggle marching state for all selected units
-    for unit in selected_units:
-        unit.is_marching = not unit.is_marching
-
-
-enemies: list[Unit] = []
-counter: int = 0
+    simulation.toggle_selected_units_marching()
 
 
 def process_movement_requests():
     """Process movement requests from the level grid"""
-    global enemies, counter
-
-    # Get movement requests
-    movement_requests = level_grid.movement_request
-    # Resolve movement collision
-    movement_requests_single = resolve_movement_collision(movement_requests, level_grid.units, level_grid.ROW_NUM,
-                                                          level_grid.COL_NUM)
-
-    # Process each movement request
-    for destination, unit in movement_requests_single.items():
-        level_grid.move(unit, GridPosition(-1, -1))
+    simulation.process_movement_requests()
 
-    for destination, unit in movement_requests_single.items():
-        level_grid.move(unit, destination)
 
-    counter += 1
-    if counter % 6 == 0:
-        randomize_enemy_direction()
-        spawn_enemy()
+def process_attacks():
+    """Process attack requests from both ally and enemy units"""
+    simulation.process_attacks()
 
 
-def paint_cell(grid_pos: GridPosition):
-    """Paint the cell at the given grid position with a random color, overlaying the current color"""
+def paint_cell(grid_pos: GridPosition, rng: random.Random | None = None):
+    """
+    Paint the cell at the given grid position with a random color, overlaying the current color.
+    The color is drawn from rng, or paint_rng if none is given.
+    """
     global current_position
 
     # Convert grid position to Python coordinates
@@ -206,17 +183,38 @@ def paint_cell(grid_pos: GridPosition):
 
     if 0 <= row < GRID_M and 0 <= col < GRID_N:
         # Get the current color of the cell
-        current_color = grid_colors[row][col]
+        current_color = cell_color(row, col)
 
         # Pick a random color from the available colors
-        new_color = random.choice(AVAILABLE_COLORS)
+        new_color = (rng or paint_rng).choice(AVAILABLE_COLORS)
 
         # Combine the current color with the new color (50% new color, 50% current color)
         # This creates an overlay effect
         blended_color = combine_colors(new_color, current_color, 0.5)
 
         # Update the cell color
-        grid_colors[row][col] = blended_color
+        if _in_view_colors(row, col):
+            row0, col0, _, _ = view_colors_rect
+            view_colors[row - row0, col - col0] = blended_color
+        else:
+            grid_colors.set(row, col, blended_color)
+        dirty_cells.add((row, col))
+
+
+def _in_view_colors(row: int, col: int) -> bool:
+    """Whether a cell's color is held in view_colors rather than grid_colors"""
+    if view_colors is None:
+        return False
+    row0, col0, row1, col1 = view_colors_rect
+    return row0 <= row < row1 and col0 <= col < col1
+
+
+def cell_color(row: int, col: int) -> tuple[int, int, int]:
+    """The painted color of a cell, from view_colors if it covers the cell, else from grid_colors"""
+    if _in_view_colors(row, col):
+        row0, col0, _, _ = view_colors_rect
+        return tuple(view_colors[row - row0, col - col0].tolist())
+    return grid_colors.get(row, col)
 
 
 def set_cell_text(grid_pos: GridPosition, text: str, font_size: int = 24):
@@ -226,234 +224,277 @@ def set_cell_text(grid_pos: GridPosition, text: str, font_size: int = 24):
     row, col = python_pos
 
     if 0 <= row < GRID_M and 0 <= col < GRID_N:
-        grid_texts[row][col] = str(text)
-        grid_text_sizes[row][col] = font_size
-
-
-def paint_board():
-    """Paint the board based on the level_grid's units and their attack ranges"""
-    global grid_colors, grid_texts, grid_text_sizes
-
-    # Clear the grid
-    for i in range(GRID_M):
-        for j in range(GRID_N):
-            grid_colors[i][j] = GameColor.WHITE.value
-            grid_texts[i][j] = ''
-            grid_text_sizes[i][j] = 24  # Reset font sizes
-
-    # First, paint the attack ranges
-    # Get attack grids
-    ally_attack_grid = level_grid.ally_attack_grid
-    enemy_attack_grid = level_grid.enemy_attack_grid
-
-    # Paint ally attack positions (light blue)
-    for grid_position in ally_attack_grid:
-        python_pos = grid_position.to_python(GRID_M)
-        row, col = python_pos
-
-        if 0 <= row < GRID_M and 0 <= col < GRID_N:
-            # Only paint if there's no unit at this position
-            if grid_position not in level_grid.units:
-                # Get the current color (should be white at this point)
-                current_color = grid_colors[row][col]
-
-                # Overlay light blue (70% light blue, 30% current color)
-                blended_color = combine_colors(GameColor.LIGHT_BLUE.value, current_color, 0.7)
-
-                # Update the cell color
-                grid_colors[row][col] = blended_color
-
-    # Paint enemy attack positions (orange)
-    for grid_position in enemy_attack_grid:
-        python_pos = grid_position.to_python(GRID_M)
-        row, col = python_pos
-
-        if 0 <= row < GRID_M and 0 <= col < GRID_N:
-            # Only paint if there's no unit at this position
-            if grid_position not in level_grid.units:
-                # Get the current color
-                current_color = grid_colors[row][col]
-
-                # If this position is already painted with ally attack color, blend with orange
-                if current_color != GameColor.WHITE.value:
-                    # Overlay orange (70% orange, 30% current color)
-                    blended_color = combine_colors(GameColor.ORANGE.value, current_color, 0.7)
+        if grid_texts.get(row, col) != str(text) or grid_text_sizes.get(row, col) != font_size:
+            grid_texts.set(row, col, str(text))
+            grid_text_sizes.set(row, col, font_size)
+            dirty_cells.add((row, col))
+
+
+def _paint_range(grid_positions, color: tuple[int, int, int], blend_with_white: bool):
+    """
+    Overlay a color (70% color, 30% current color) on every empty in-bounds cell of a grid.
+    If blend_with_white is False, white cells take the plain color instead.
+    """
+    units = level_grid.units
+    position = level_grid.positions.get
+    white = GameColor.WHITE.value
+    for x, y in grid_positions:
+        if 0 <= x < GRID_N and 0 <= y < GRID_M:
+            # Only paint if there's no unit at this position; a dense board only takes GridPosition keys
+            if position(x, y) not in units:
+                row = GRID_M - y - 1
+                current_color = grid_colors.get(row, x)
+                if blend_with_white or current_color != white:
+                    grid_colors.set(row, x, combine_colors(color, current_color, 0.7))
                 else:
-                    # Just use orange
-                    blended_color = GameColor.ORANGE.value
-
-                # Update the cell color
-                grid_colors[row][col] = blended_color
-
-    # paint ally defense grid
-    for grid_position in level_grid.ally_defense_grid:
-        python_pos = grid_position.to_python(GRID_M)
-        row, col = python_pos
-
-        if 0 <= row < GRID_M and 0 <= col < GRID_N:
-            # Only paint if there's no unit at this position
-            if grid_position not in level_grid.units:
-                # Get the current color
-                current_color = grid_colors[row][col]
-
-                # If this position is already painted with ally attack color, blend with orange
-                if current_color != GameColor.WHITE.value:
-                    # Overlay orange (70% orange, 30% current color)
-                    blended_color = combine_colors(GameColor.GRAY.value, current_color, 0.7)
-                else:
-                    # Just use orange
-                    blended_color = GameColor.GRAY.value
-
-                # Update the cell color
-                grid_colors[row][col] = blended_color
-
-    # paint ally defense grid
-    for grid_position in level_grid.enemy_defense_grid:
-        python_pos = grid_position.to_python(GRID_M)
-        row, col = python_pos
-
-        if 0 <= row < GRID_M and 0 <= col < GRID_N:
-            # Only paint if there's no unit at this position
-            if grid_position not in level_grid.units:
-                # Get the current color
-                current_color = grid_colors[row][col]
-
-                # If this position is already painted with ally attack color, blend with orange
-                if current_color != GameColor.WHITE.value:
-                    # Overlay orange (70% orange, 30% current color)
-                    blended_color = combine_colors(GameColor.GRAY.value, current_color, 0.7)
-                else:
-                    # Just use orange
-                    blended_color = GameColor.GRAY.value
-
-                # Update the cell color
-                grid_colors[row][col] = blended_color
+                    grid_colors.set(row, x, color)
+
+
+def _paint_cells(cells, color: tuple[int, int, int], blend_with_white: bool):
+    """Like _paint_range for (x, y) cells already known to be on the board and empty"""
+    white = GameColor.WHITE.value
+    for x, y in cells:
+        row = GRID_M - y - 1
+        current_color = grid_colors.get(row, x)
+        if blend_with_white or current_color != white:
+            grid_colors.set(row, x, combine_colors(color, current_color, 0.7))
+        else:
+            grid_colors.set(row, x, color)
+
+
+def _view_rect() -> tuple[int, int, int, int]:
+    """The cells in the camera's view as a board rectangle (x0, y0, x1, y1), inclusive"""
+    row0, col0, row1, col1 = camera.visible()
+    return col0, GRID_M - row1, col1 - 1, GRID_M - row0 - 1
+
+
+def _defense_cells(clan: UnitClan, x0: int, y0: int, x1: int, y1: int) -> set[tuple[int, int]]:
+    """Cells of the clan's defense grid inside a board rectangle, found from the units near it"""
+    reach = DEFENSE_REACH
+    cells = set()
+    for unit in level_grid.units_in_rect(x0 - reach, y0 - reach, x1 + reach, y1 + reach, clan):
+        cells.update(pos for pos in unit.defense_range if x0 <= pos[0] <= x1 and y0 <= pos[1] <= y1)
+    return cells
+
+
+def _view_chunks(x0: int, y0: int, x1: int, y1: int) -> list[tuple[int, int]]:
+    """Chunks overlapping a board rectangle"""
+    size = level_grid.bitboards.chunk_size
+    return [(cx, cy) for cx in range(x0 // size, x1 // size + 1) for cy in range(y0 // size, y1 // size + 1)]
+
+
+def _paint_view_cells(x0: int, y0: int, x1: int, y1: int):
+    """Paint the colors of the cells in a board rectangle one by one with combine_colors"""
+    bitboards = level_grid.bitboards
+    # First, paint the attack ranges on cells with no unit, visiting only the chunks in view
+    for clan, color, blend_with_white in ((UnitClan.Ally, GameColor.LIGHT_BLUE.value, True),
+                                          (UnitClan.Enemy, GameColor.ORANGE.value, False)):
+        # ally attack positions (light blue), then enemy attack positions (orange),
+        # blended with ally attack color where both apply
+        for chunk in _view_chunks(x0, y0, x1, y1):
+            empty_covered = (bitboards.coverage(clan, chunk) & ~bitboards.occupied_any(chunk)
+                             & bitboards.rect_mask(chunk, x0, y0, x1, y1))
+            _paint_cells(bitboards.cells(chunk, empty_covered), color, blend_with_white)
+    # paint ally and enemy defense grids (gray)
+    _paint_range(_defense_cells(UnitClan.Ally, x0, y0, x1, y1), GameColor.GRAY.value, False)
+    _paint_range(_defense_cells(UnitClan.Enemy, x0, y0, x1, y1), GameColor.GRAY.value, False)
 
     # Then, paint the units (blending with any attack range colors)
-    for grid_position, unit in level_grid.units.items():
-        # Convert grid position to Python coordinates
-        python_pos = grid_position.to_python(GRID_M)
-        row, col = python_pos
-
-        if 0 <= row < GRID_M and 0 <= col < GRID_N:
-            # Get the current color (might be an attack range color)
-            current_color = grid_colors[row][col]
-
-            # Set color based on unit clan and marching state
-            if unit.unit_clan == UnitClan.Ally and unit.is_marching == True:
-                # Blend blue with current color (70% blue, 30% current color)
-                blended_color = combine_colors(GameColor.BLUE.value, current_color, 0.7)
-            elif unit.unit_clan == UnitClan.Ally and unit.is_marching == False:
-                # Blend green with current color (70% green, 30% current color)
-                blended_color = combine_colors(GameColor.LIGHT_BLUE.value, current_color, 0.7)
-            elif unit.unit_clan == UnitClan.Enemy and unit.is_marching == True:
-                # Blend purple with current color (70% purple, 30% current color)
-                blended_color = combine_colors(GameColor.PURPLE.value, current_color, 0.7)
-            else:  # Enemy not marching
-                # Blend red with current color (70% red, 30% current color)
-                blended_color = combine_colors(GameColor.ORANGE.value, current_color, 0.7)
-
-            # Update the cell color
-            grid_colors[row][col] = blended_color
-
-            # Set text to unit name and health
-            # Check if this unit is selected
-            font_size = 36 if unit in selected_units else 24
-            set_cell_text(grid_position, f"{unit.name}: {unit.health}", font_size)
+    for unit in level_grid.units_in_rect(x0, y0, x1, y1):
+        x, y = unit.loc
+        row = GRID_M - y - 1
+        # Blend the unit color with the current color (70% unit color, 30% current color)
+        grid_colors.set(row, x, combine_colors(UNIT_COLORS[unit.unit_clan, unit.is_marching],
+                                               grid_colors.get(row, x), 0.7))
+
+
+def bits_to_array(bitboard: int, size: int) -> np.ndarray:
+    """A chunk bitboard as a (size, size) bool array indexed [y][x] within the chunk"""
+    raw = np.frombuffer(bitboard.to_bytes((size * size + 7) // 8, 'little'), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder='little')[:size * size].reshape(size, size).view(bool)
+
+
+def combine_color_arrays(color1, color2: np.ndarray, ratio: float = 0.5) -> np.ndarray:
+    """
+    colors.combine_colors for arrays of colors.
+
+    Args:
+        color1: RGB color tuple, or (..., 3) array of colors
+        color2: (..., 3) uint8 array of colors
+        ratio: Ratio of color1 to color2 (0.0 to 1.0)
+
+    Returns:
+        (..., 3) uint8 array, equal channel for channel to combine_colors
+    """
+    ratio = max(0.0, min(1.0, ratio))
+    inv_ratio = 1.0 - ratio
+    # same float arithmetic as combine_colors; astype truncates like int()
+    combined = np.asarray(color1, dtype=np.float64) * ratio + color2.astype(np.float64) * inv_ratio
+    return combined.astype(np.uint8)
+
+
+def composite_view() -> np.ndarray:
+    """
+    Colors of the cells in the camera's view as a (rows, cols, 3) uint8 image, top row first.
+
+    The layers _paint_view_cells() paints cell by cell (ally attack, enemy
+    attack, ally defense, enemy defense, then units) are built as boolean
+    masks over the view and blended with combine_color_arrays, in the same
+    order and with the same 0.7 rules, so the colors match exactly.
+    """
+    x0, y0, x1, y1 = _view_rect()
+    height, width = y1 - y0 + 1, x1 - x0 + 1
+    bitboards = level_grid.bitboards
+    size = bitboards.chunk_size
+
+    # masks are indexed [y - y0][x - x0] until the image is flipped at the end
+    occupied = np.zeros((height, width), dtype=bool)
+    attack = {clan: np.zeros((height, width), dtype=bool) for clan in UnitClan}
+    for chunk in _view_chunks(x0, y0, x1, y1):
+        cx, cy = chunk[0] * size, chunk[1] * size
+        xa, xb = max(x0, cx), min(x1, cx + size - 1)
+        ya, yb = max(y0, cy), min(y1, cy + size - 1)
+        in_view = (slice(ya - y0, yb - y0 + 1), slice(xa - x0, xb - x0 + 1))
+        in_chunk = (slice(ya - cy, yb - cy + 1), slice(xa - cx, xb - cx + 1))
+        occupied_bits = bitboards.occupied_any(chunk)
+        if occupied_bits:
+            occupied[in_view] = bits_to_array(occupied_bits, size)[in_chunk]
+        for clan in UnitClan:
+            empty_covered = bitboards.coverage(clan, chunk) & ~occupied_bits
+            if empty_covered:
+                attack[clan][in_view] = bits_to_array(empty_covered, size)[in_chunk]
+
+    def defense_mask(clan: UnitClan) -> np.ndarray:
+        mask = np.zeros((height, width), dtype=bool)
+        cells = _defense_cells(clan, x0, y0, x1, y1)
+        if cells:
+            xs = np.fromiter((pos[0] for pos in cells), dtype=np.intp, count=len(cells))
+            ys = np.fromiter((pos[1] for pos in cells), dtype=np.intp, count=len(cells))
+            mask[ys - y0, xs - x0] = True
+        return mask & ~occupied
+
+    layers = [
+        (attack[UnitClan.Ally], GameColor.LIGHT_BLUE.value, True),
+        (attack[UnitClan.Enemy], GameColor.ORANGE.value, False),
+        (defense_mask(UnitClan.Ally), GameColor.GRAY.value, False),
+        (defense_mask(UnitClan.Enemy), GameColor.GRAY.value, False),
+    ]
+    white = GameColor.WHITE.value
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    for mask, color, blend_with_white in layers:
+        if not blend_with_white:
+            # white cells take the plain color
+            plain = mask & (image == white).all(axis=2)
+            image[plain] = color
+            mask = mask & ~plain
+        image[mask] = combine_color_arrays(color, image[mask], 0.7)
+
+    units = level_grid.units_in_rect(x0, y0, x1, y1)
+    if units:
+        xs = np.fromiter((unit.loc[0] for unit in units), dtype=np.intp, count=len(units)) - x0
+        ys = np.fromiter((unit.loc[1] for unit in units), dtype=np.intp, count=len(units)) - y0
+        unit_colors = np.array([UNIT_COLORS[unit.unit_clan, unit.is_marching] for unit in units], dtype=np.uint8)
+        image[ys, xs] = combine_color_arrays(unit_colors, image[ys, xs], 0.7)
+    return image[::-1]
+
+
+def paint_board(vectorized: bool = True):
+    """
+    Paint the cells in the camera's view based on the level_grid's units and their attack ranges.
+
+    Colors are composited as arrays into view_colors (see composite_view),
+    which draw_grid() blits as is, or painted cell by cell into grid_colors
+    with combine_colors if vectorized is False; both give the same board.
+    """
+    global view_colors, view_colors_rect, _redraw_view
+
+    # Take the previous board out, leaving a cleared grid, to find the cells that need redrawing
+    previous_colors = grid_colors.detach()
+    previous_texts = grid_texts.detach()
+    previous_sizes = grid_text_sizes.detach()
+    previous_view_colors, previous_rect = view_colors, view_colors_rect
+
+    x0, y0, x1, y1 = _view_rect()
+    if vectorized:
+        view_colors, view_colors_rect = composite_view(), camera.visible()
+        if previous_view_colors is not None and previous_rect == view_colors_rect:
+            row0, col0, _, _ = view_colors_rect
+            changed = np.argwhere((view_colors != previous_view_colors).any(axis=2)) + (row0, col0)
+            dirty_cells.update(map(tuple, changed.tolist()))
+        else:
+            _redraw_view = True
+    else:
+        _redraw_view = _redraw_view or previous_view_colors is not None
+        view_colors = view_colors_rect = None
+        _paint_view_cells(x0, y0, x1, y1)
+        dirty_cells.update(grid_colors.changed_cells(previous_colors))
+
+    # Set text to unit name and health, larger for selected units
+    selected_units = set(simulation.selected_units)
+    for unit in level_grid.units_in_rect(x0, y0, x1, y1):
+        x, y = unit.loc
+        row = GRID_M - y - 1
+        grid_texts.set(row, x, f"{unit.name}: {unit.health}")
+        grid_text_sizes.set(row, x, 36 if unit in selected_units else 24)
+
+    dirty_cells.update(grid_texts.changed_cells(previous_texts))
+    dirty_cells.update(grid_text_sizes.changed_cells(previous_sizes))
+
+
+def pan_camera(rows: int, cols: int):
+    """Move the view by a number of cells and paint the cells that came into view"""
+    camera.pan(rows, cols)
+    paint_board()
+
+
+def zoom_camera(factor: float):
+    """Scale the cell size around the center of the view and paint the cells that came into view"""
+    camera.zoom(factor)
+    paint_board()
+
+
+def minimap_colors() -> np.ndarray:
+    """
+    The whole board downsampled to at most MINIMAP_SIZE pixels a side, as a
+    (width, height, 3) uint8 array in pygame.surfarray order: white, with
+    each unit's pixel in its unit color. Rebuilt only when the board changes.
+    """
+    global _minimap
+    scale = MINIMAP_SIZE / max(GRID_M, GRID_N)
+    width, height = max(1, int(GRID_N * scale)), max(1, int(GRID_M * scale))
+    key = (level_grid.state_hash, width, height)
+    if _minimap is not None and _minimap[0] == key:
+        return _minimap[1]
+
+    colors = np.full((width, height, 3), 255, dtype=np.uint8)
+    units = [(x, y, UNIT_COLORS[unit.unit_clan, unit.is_marching])
+             for (x, y), unit in level_grid.units.items() if 0 <= x < GRID_N and 0 <= y < GRID_M]
+    if units:
+        xs, ys, unit_colors = zip(*units)
+        px = np.array(xs) * width // GRID_N
+        py = (GRID_M - 1 - np.array(ys)) * height // GRID_M
+        colors[px, py] = np.array(unit_colors, dtype=np.uint8)
+    _minimap = (key, colors)
+    return colors
 
 
 def draw_grid():
-    """Draw the grid with colors and text"""
-    screen.fill(GameColor.WHITE.value)
-
-    # Draw cells
-    for i in range(GRID_M):
-        for j in range(GRID_N):
-            # Draw cell background
-            pygame.draw.rect(screen, grid_colors[i][j],
-                             (j * CELL_SIZE, i * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-
-            # Draw cell border
-            pygame.draw.rect(screen, GameColor.BLACK.value,
-                             (j * CELL_SIZE, i * CELL_SIZE, CELL_SIZE, CELL_SIZE), 1)
-
-            # Draw cell text with appropriate font size
-            if grid_texts[i][j]:
-                # Choose font based on size
-                if grid_text_sizes[i][j] == 36:
-                    text_surface = large_font.render(grid_texts[i][j], True, GameColor.BLACK.value)
-                else:
-                    text_surface = font.render(grid_texts[i][j], True, GameColor.BLACK.value)
-
-                text_rect = text_surface.get_rect(center=(j * CELL_SIZE + CELL_SIZE // 2,
-                                                          i * CELL_SIZE + CELL_SIZE // 2))
-                screen.blit(text_surface, text_rect)
-
-
-def process_attacks():
-    """Process attack requests from both ally and enemy units"""
-    global enemies, counter
-
-    # Get attack grids
-    ally_attack_grid = level_grid.ally_attack_result_grid
-    enemy_attack_grid = level_grid.enemy_attack_result_grid
-
-    # Process ally attacks
-    for position, attack_count in ally_attack_grid.items():
-        if position in level_grid.units:
-            unit = level_grid.units[position]
-            if unit.unit_clan == UnitClan.Enemy:
-                # Apply damage based on attack count
-                level_grid.attack(position, attack_count)
-                print(f"Ally units attacked {unit.name} for {attack_count} damage")
-
-    # Process enemy attacks
-    for position, attack_count in enemy_attack_grid.items():
-        if position in level_grid.units:
-            unit = level_grid.units[position]
-            if unit.unit_clan == UnitClan.Ally:
-                # Apply damage based on attack count
-                level_grid.attack(position, attack_count)
-                print(f"Enemy units attacked {unit.name} for {attack_count} damage")
-
-    counter += 1
-    if counter % 6 == 0:
-        randomize_enemy_direction()
-        spawn_enemy()
-
-
-
-def spawn_enemy():
-    global enemies, level_grid
-
-    row_num = level_grid.ROW_NUM
-    col_num = level_grid.COL_NUM
-    li = [GridPosition(col, 0) for col in range(col_num)]
-    num = 0 # random.randint(0, 3)
-
-    while 1:
-        pos = random.choice(li)
-        if pos not in level_grid.units:
-            new_unit: Unit
-            if num == 0:
-                new_unit = SwordUnit(f"S{uuid.uuid4().hex[:2]}", UnitClan.Enemy, pos, GridPosition(0, 1))
-            elif num == 1:
-                new_unit = SpearUnit(f"P{uuid.uuid4().hex[:2]}", UnitClan.Enemy, pos, GridPosition(0, 1))
-            elif num == 2:
-                new_unit = WarriorUnit(f"W{uuid.uuid4().hex[:2]}", UnitClan.Enemy, pos, GridPosition(0, 1))
-            else:
-                new_unit = BowUnit(f"B{uuid.uuid4().hex[:2]}", UnitClan.Enemy, pos, GridPosition(0, 1))
-            new_unit.set_group_id(-1)
-            level_grid.move(new_unit, new_unit.loc)
-            enemies.append(new_unit)
-            break
-
-
-def randomize_enemy_direction():
-    global enemies
-
-    li = [GridPosition(-1, 0), GridPosition(1, 0), GridPosition(0, 1), GridPosition(0, -1)]
-
-    for enemy_unit in enemies:
-        new_direction = random.choice(li)
-        enemy_unit.face = new_direction
+    """
+    Draw the cells in view that changed since the last call, and the minimap
+    if the board does not fit in the window.
+
+    Returns:
+        Screen rects that need a pygame.display.update()
+    """
+    global _redraw_view
+    if view_colors is not None and view_colors_rect != camera.visible():
+        # the camera moved since the view was composited
+        paint_board()
+    rects = renderer.draw_grid(grid_colors, grid_texts, grid_text_sizes, camera.cell_size,
+                               None if _redraw_view else dirty_cells, camera, view_colors)
+    dirty_cells.clear()
+    _redraw_view = False
+    if rects and not camera.covers_board():
+        # redrawn cells may lie under the minimap
+        rects.append(renderer.draw_minimap(minimap_colors(), camera))
+    return rects
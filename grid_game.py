@@ -2,6 +2,8 @@
 Main game module that handles the game loop and user input.
 """
 
+import argparse
+import random
 import pygame
 import sys
 from grid_position import GridPosition
@@ -12,20 +14,47 @@ from game_state import (
     # Functions
     initialize_game, select_units_by_group, update_selected_units_face,
     toggle_selected_units_marching, process_movement_requests, paint_cell,
-    set_cell_text, paint_board, draw_grid, process_attacks
+    set_cell_text, paint_board, draw_grid, process_attacks, open_window
 )
 from colors import GameColor
+from events import print_sink
+from replay import record
+from simulation import Simulation
+import game_state
 
-# Initialize Pygame
-pygame.init()
+parser = argparse.ArgumentParser(description="Play the grid game.")
+parser.add_argument('--record', metavar='PATH', help="Save a replay of the game to PATH on exit")
+parser.add_argument('--seed', type=int, default=None, help="Seed of the game (random if not given)")
+args = parser.parse_args()
 
-# Constants
-font = pygame.font.Font(None, 24)
-large_font = pygame.font.Font(None, 36)  # Larger font for selected units
+# Recording needs a seeded engine so the replay plays out the same way
+replay = None
+if args.record or args.seed is not None:
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    game_state.set_simulation(Simulation(GRID_M, GRID_N, seed=seed))
+    if args.record:
+        replay = record(game_state.simulation)
+
+# Open the window (initializes pygame)
+open_window()
 
 # Initialize the game
 initialize_game()
-    
+
+# Report damage and deaths on the console
+game_state.simulation.events.add_sink(print_sink)
+
+# Arrow keys pan the view by a quarter of its size
+PAN_KEYS = {
+    pygame.K_UP: (-1, 0),
+    pygame.K_DOWN: (1, 0),
+    pygame.K_LEFT: (0, -1),
+    pygame.K_RIGHT: (0, 1),
+}
+
+# Limits the loop rate; frames with no changes draw nothing
+clock = pygame.time.Clock()
+
 running = True
 while running:
     for event in pygame.event.get():
@@ -82,9 +111,25 @@ while running:
             elif event.key == pygame.K_f:
                 toggle_selected_units_marching()
                 paint_board()
+
+            # Handle arrow keys for panning and +/- for zooming the view
+            elif event.key in PAN_KEYS:
+                rows, cols = PAN_KEYS[event.key]
+                step = max(1, min(game_state.camera.view_rows, game_state.camera.view_cols) // 4)
+                game_state.pan_camera(rows * step, cols * step)
+            elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                game_state.zoom_camera(1.25)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                game_state.zoom_camera(0.8)
         
-    draw_grid()
-    pygame.display.flip()
+    # Redraw only the cells that changed and push just those areas to the display
+    dirty_rects = draw_grid()
+    if dirty_rects:
+        pygame.display.update(dirty_rects)
+    clock.tick(60)
+
+if replay is not None:
+    replay.save(args.record)
 
 pygame.quit()
 sys.exit()
\ No newline at end of file
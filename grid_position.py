@@ -1,46 +1,101 @@
-from __future__ import annotations 
-from enums import UnitClan
+from __future__ import annotations
+from operator import itemgetter
 
-class GridPosition:
-    def __init__(self, x: int, y: int) -> None:
-        self.x = x
-        self.y = y
 
-    def __repr__(self) -> str:
-        return f"GridPosition({self.x}, {self.y})"
+class GridPosition(tuple):
+    """
+    Immutable (x, y) grid position.
+
+    Backed by a tuple so hashing and equality run in C and positions carry no
+    per-instance __dict__. Like a tuple, a GridPosition compares equal to the
+    plain tuple (x, y).
+    """
+    __slots__ = ()
 
-    def __eq__(self, other: object) -> bool:
-        if not isinstance(other, GridPosition):
-            return NotImplemented
-        return self.x == other.x and self.y == other.y
+    def __new__(cls, x: int, y: int) -> GridPosition:
+        return tuple.__new__(cls, (x, y))
 
-    def __hash__(self) -> int:
-        return hash((self.x, self.y))
+    def __getnewargs__(self) -> tuple[int, int]:
+        return tuple(self)
+
+    x = property(itemgetter(0))
+    y = property(itemgetter(1))
+
+    def __repr__(self) -> str:
+        return f"GridPosition({self[0]}, {self[1]})"
 
     def __add__(self, other: GridPosition) -> GridPosition:
-        return GridPosition(self.x + other.x, self.y + other.y)
+        return GridPosition(self[0] + other[0], self[1] + other[1])
 
     def __sub__(self, other: GridPosition) -> GridPosition:
-        return GridPosition(self.x - other.x, self.y - other.y)
+        return GridPosition(self[0] - other[0], self[1] - other[1])
 
     def check_bounds(self, row_num: int, col_num: int) -> bool:
-        return 0 <= self.x < col_num and 0 <= self.y < row_num
+        return 0 <= self[0] < col_num and 0 <= self[1] < row_num
 
     def adjust_with_direction(self, direction: GridPosition) -> GridPosition:
         # adjusted with front
-        if direction == GridPosition(0, 1):
+        if direction == _NORTH:
             return self
         # adjusted with right: rotate 90 degree
-        elif direction == GridPosition(1, 0):
-            return GridPosition(self.y, -self.x)
+        elif direction == _EAST:
+            return GridPosition(self[1], -self[0])
         # adjusted with back: rotate 180 degree
-        elif direction == GridPosition(0, -1):
-            return GridPosition(-self.x, -self.y)
+        elif direction == _SOUTH:
+            return GridPosition(-self[0], -self[1])
         # adjusted with left: rotate 270 degree
-        elif direction == GridPosition(-1, 0):
-            return GridPosition(-self.y, self.x)
+        elif direction == _WEST:
+            return GridPosition(-self[1], self[0])
 
     def to_python(self, max_row: int) -> tuple[int, int]:
         # in python, x means xth row, y means jth column, top left is the origin
         # in game, x means col index, y means row index, bottom left is the origin
-        return max_row - self.y - 1, self.x
+        return max_row - self[1] - 1, self[0]
+
+
+_NORTH = GridPosition(0, 1)
+_EAST = GridPosition(1, 0)
+_SOUTH = GridPosition(0, -1)
+_WEST = GridPosition(-1, 0)
+
+
+class PositionTable:
+    """
+    Intern table for the positions of one board.
+
+    Every in-bounds cell has exactly one GridPosition object, so positions
+    obtained through the table compare by identity in dict lookups. Positions
+    are created on first use, so memory follows the cells actually touched
+    rather than the board size. Out-of-bounds positions are returned as new
+    objects.
+    """
+
+    def __init__(self, row_num: int, col_num: int) -> None:
+        self.row_num = row_num
+        self.col_num = col_num
+        # y * col_num + x -> position
+        self._cells: dict[int, GridPosition] = {}
+        self._neighbours: dict[GridPosition, list[GridPosition]] = {}
+
+    def get(self, x: int, y: int) -> GridPosition:
+        if 0 <= x < self.col_num and 0 <= y < self.row_num:
+            index = y * self.col_num + x
+            pos = self._cells.get(index)
+            if pos is None:
+                pos = self._cells[index] = GridPosition(x, y)
+            return pos
+        return GridPosition(x, y)
+
+    def intern(self, pos: GridPosition) -> GridPosition:
+        return self.get(pos[0], pos[1])
+
+    def neighbours(self, pos: GridPosition) -> list[GridPosition]:
+        """The in-bounds cells surrounding a position, cached per position"""
+        cells = self._neighbours.get(pos)
+        if cells is None:
+            x, y = pos
+            cells = [self.get(x + dx, y + dy)
+                     for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                     if (dx or dy) and 0 <= x + dx < self.col_num and 0 <= y + dy < self.row_num]
+            self._neighbours[pos] = cells
+        return cells
@@ -1,36 +1,401 @@
+import functools
+import hashlib
+import struct
+
 from enums import UnitClan
-from grid_position import GridPosition
+from grid_position import GridPosition, PositionTable
+from spatial_index import SpatialIndex
+from bitboard import Bitboards
 from Unit import Unit
 from collections import defaultdict
 
+def zobrist_key(unit: Unit, face: GridPosition | None = None, is_marching: bool | None = None) -> int:
+    """
+    The 64-bit Zobrist key of a unit's current cell and state, or of the
+    state it would have with the given face and marching state.
+
+    Keys are derived from a hash of the state rather than drawn at random,
+    so they are the same in every process and hashes can be compared across runs.
+    """
+    if face is None:
+        face = unit.face
+    if is_marching is None:
+        is_marching = unit.is_marching
+    return _state_key((unit.loc[0], unit.loc[1], type(unit).__name__, unit.unit_clan.value,
+                       face[0], face[1], is_marching, unit.health))
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _state_key(state: tuple) -> int:
+    """Key of an (x, y, unit class name, clan, face x, face y, marching, health) state; recent ones are kept"""
+    data = struct.pack('<qq', state[0], state[1]) + repr(state[2:]).encode()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def hit_damage(attack: int, defense: int, surrounding: int) -> int | None:
+    """
+    Damage the attacks on a unit deal: attack minus defense plus the coop
+    bonus, or None if the defense is higher than the attack.
+
+    Args:
+        surrounding: Units of the attacking clan in the 8 cells around the target
+    """
+    damage = attack - defense
+    if damage < 0:
+        return None
+    # coop: if the unit under attack is surrounded by 2 opponent units, damage plus 1; if 3 or more, damage plus 2
+    if surrounding == 2:
+        damage += 1
+    elif surrounding >= 3:
+        damage += 2
+    return damage
+
+
+class RangeGrid:
+    """
+    Live per-cell counter for attack/defense coverage.
+
+    `values` maps a covered position to the summed amount. A position stays in
+    `values` as long as at least one unit covers it, even if the sum is 0, so
+    the key set matches a grid rebuilt from scratch.
+    """
+
+    def __init__(self) -> None:
+        self.values: dict[GridPosition, int] = {}
+        self._refs: dict[GridPosition, int] = {}
+
+    def add(self, positions: list[GridPosition], amount: int) -> None:
+        for pos in positions:
+            self._refs[pos] = self._refs.get(pos, 0) + 1
+            self.values[pos] = self.values.get(pos, 0) + amount
+
+    def remove(self, positions: list[GridPosition], amount: int) -> None:
+        for pos in positions:
+            refs = self._refs[pos] - 1
+            if refs == 0:
+                del self._refs[pos]
+                del self.values[pos]
+            else:
+                self._refs[pos] = refs
+                self.values[pos] -= amount
+
+
+class FreeCellIndex:
+    """
+    The free cells of one zone, for constant-time uniform sampling.
+
+    Cells live in a list with a position -> index map; occupying a cell
+    swaps the last cell into its slot, so every update is O(1).
+    """
+
+    def __init__(self, cells: list[GridPosition]) -> None:
+        self.cells = list(cells)
+        self._index = {pos: i for i, pos in enumerate(self.cells)}
+
+    def occupy(self, pos: GridPosition) -> None:
+        i = self._index.pop(pos, None)
+        if i is None:
+            return
+        last = self.cells.pop()
+        if i < len(self.cells):
+            self.cells[i] = last
+            self._index[last] = i
+
+    def release(self, pos: GridPosition) -> None:
+        if pos not in self._index:
+            self._index[pos] = len(self.cells)
+            self.cells.append(pos)
+
+    def sample(self, rng) -> GridPosition | None:
+        """A uniformly random free cell, or None if the zone is full"""
+        if not self.cells:
+            return None
+        return self.cells[rng.randrange(len(self.cells))]
+
+    def __contains__(self, pos: GridPosition) -> bool:
+        return pos in self._index
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+
+# undo journal entry kinds
+_PLACE = 'place'
+_REMOVE = 'remove'
+_HEALTH = 'health'
+_FACE = 'face'
+_MARCH = 'march'
+
+
 class LevelGrid:
     units: dict[GridPosition, Unit]
     COL_NUM: int
     ROW_NUM: int
 
-    def __init__(self, row_num: int, col_num: int) -> None:
+    def __init__(self, row_num: int, col_num: int, dense: bool = False) -> None:
         self.COL_NUM = col_num
         self.ROW_NUM = row_num
-        self.units = {}
+        # one shared GridPosition object per cell; positions stored on the board are interned
+        self.positions = PositionTable(row_num, col_num)
+
+        # dense mode stores the board in NumPy arrays; `units` is then a
+        # DenseBoard, which keeps the dict API as a view over the arrays
+        self.board = None
+        if dense:
+            # imported here so the default dict mode does not pay for numpy
+            from dense_board import DenseBoard
+            self.board = DenseBoard(row_num, col_num)
+            self.units = self.board
+        else:
+            self.units = {}
+
+        # attack/defense grids are kept up to date by delta on every placement,
+        # removal and face change, so reading them does not touch every unit
+        self._ally_attack = RangeGrid()
+        self._enemy_attack = RangeGrid()
+        self._ally_defense = RangeGrid()
+        self._enemy_defense = RangeGrid()
+        # what each unit on the board has added to the grids above
+        self._stamps: dict[Unit, list[tuple[RangeGrid, list[GridPosition], int]]] = {}
+
+        # free-cell indexes of named zones, and the zones each cell belongs to
+        self._zones: dict[str, FreeCellIndex] = {}
+        self._zones_of: dict[GridPosition, list[FreeCellIndex]] = {}
+
+        # undo journal; None unless a checkpoint() is active
+        self._journal: list[tuple] | None = None
+
+        # Zobrist hash of the board: XOR of the keys of every unit on it
+        self._hash = 0
+        self._unit_keys: dict[Unit, int] = {}
+
+        # units by clan and cell region, for neighbour, radius and rectangle queries
+        self.spatial = SpatialIndex()
+        # occupancy, marching and attack coverage as one bit per cell
+        self.bitboards = Bitboards(row_num, col_num)
+
+        # result grids derived from the live grids, memoized until a unit is
+        # stamped or unstamped (placed, removed or turned)
+        self._derived: dict[str, dict[GridPosition, int]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _stamp(self, unit: Unit) -> None:
+        """Add the unit's attack and defense coverage to the live grids"""
+        attack_range = unit.attack_range
+        stamps = [(self._ally_attack if clan == UnitClan.Ally else self._enemy_attack, attack_range, unit.attack)
+                  for clan in unit.attacking_clans]
+
+        defense_grid = self._ally_defense if unit.unit_clan == UnitClan.Ally else self._enemy_defense
+        stamps.append((defense_grid, unit.defense_range, unit.guardian_defense))
+        if unit.self_defense > 0:
+            stamps.append((defense_grid, [unit.loc], unit.self_defense))
+
+        for grid, positions, amount in stamps:
+            grid.add(positions, amount)
+        self._stamps[unit] = stamps
+        self.bitboards.stamp(unit)
+        if self._derived:
+            self._derived.clear()
+
+    def _unstamp(self, unit: Unit) -> None:
+        """Remove the unit's contribution from the live grids"""
+        for grid, positions, amount in self._stamps.pop(unit):
+            grid.remove(positions, amount)
+        self.bitboards.unstamp(unit)
+        if self._derived:
+            self._derived.clear()
+
+    def _hash_in(self, unit: Unit) -> None:
+        key = zobrist_key(unit)
+        self._hash ^= key ^ self._unit_keys.get(unit, 0)
+        self._unit_keys[unit] = key
+
+    def _hash_out(self, unit: Unit) -> None:
+        self._hash ^= self._unit_keys.pop(unit)
+
+    def _place(self, unit: Unit, destination: GridPosition) -> None:
+        destination = self.positions.intern(destination)
+        displaced = self.units.get(destination)
+        if self._journal is not None:
+            self._journal.append((_PLACE, unit, destination, displaced, unit.loc))
+        if displaced is not None and displaced is not unit:
+            self._unstamp(displaced)
+            self._hash_out(displaced)
+            self.spatial.remove(displaced, destination)
+            self.bitboards.remove(displaced, destination)
+        self.units[destination] = unit
+        unit.loc = destination
+        self._stamp(unit)
+        self._hash_in(unit)
+        if displaced is not unit:
+            self.spatial.insert(unit, destination)
+        self.bitboards.place(unit, destination)
+        for zone in self._zones_of.get(destination, ()):
+            zone.occupy(destination)
+
+    def _remove(self, position: GridPosition) -> Unit:
+        unit = self.units.pop(position)
+        if self._journal is not None:
+            self._journal.append((_REMOVE, unit, position))
+        self._unstamp(unit)
+        self._hash_out(unit)
+        self.spatial.remove(unit, position)
+        self.bitboards.remove(unit, position)
+        for zone in self._zones_of.get(position, ()):
+            zone.release(position)
+        return unit
+
+    def add_zone(self, name: str, cells: list[GridPosition]) -> FreeCellIndex:
+        """Register a zone whose free cells are tracked as units move, attack and die"""
+        cells = [self.positions.intern(pos) for pos in cells]
+        zone = FreeCellIndex([pos for pos in cells if pos not in self.units])
+        for pos in cells:
+            self._zones_of.setdefault(pos, []).append(zone)
+        self._zones[name] = zone
+        return zone
+
+    def zone(self, name: str) -> FreeCellIndex:
+        return self._zones[name]
+
+    def edge_cells(self, edge: str) -> list[GridPosition]:
+        """The cells along one edge of the board: 'bottom', 'top', 'left' or 'right'"""
+        if edge == 'bottom':
+            return [self.positions.get(x, 0) for x in range(self.COL_NUM)]
+        if edge == 'top':
+            return [self.positions.get(x, self.ROW_NUM - 1) for x in range(self.COL_NUM)]
+        if edge == 'left':
+            return [self.positions.get(0, y) for y in range(self.ROW_NUM)]
+        if edge == 'right':
+            return [self.positions.get(self.COL_NUM - 1, y) for y in range(self.ROW_NUM)]
+        raise ValueError(f"Unknown edge: {edge!r}")
+
+    def is_placed(self, unit: Unit) -> bool:
+        return self.units.get(unit.loc) is unit
 
     def move(self, unit: Unit, destination: GridPosition) -> None:
         # remove unit from old position
         if unit.loc in self.units:
-            del self.units[unit.loc]
-        # add unit to new position
-        self.units[destination] = unit
-        # update unit's location
-        unit.loc = destination
+            self._remove(unit.loc)
+        # add unit to new position and update unit's location
+        self._place(unit, destination)
+
+    def move_all(self, moves: dict[GridPosition, Unit]) -> None:
+        """
+        Move several units at once, e.g. a resolved turn where units swap places.
+        Every unit leaves its cell before any unit enters one.
+        """
+        for unit in moves.values():
+            if self.units.get(unit.loc) is unit:
+                self._remove(unit.loc)
+        for destination, unit in moves.items():
+            self._place(unit, destination)
 
     def attack(self, destination: GridPosition, damage: int) -> None:
         # Check if the destination is valid and has a unit
         if destination in self.units:
             unit = self.units[destination]
+            if self._journal is not None:
+                self._journal.append((_HEALTH, unit, unit.health))
             # Apply damage to the unit
             unit.health -= damage
             # If the unit's health drops to 0 or below, remove it from the grid
             if unit.health <= 0:
-                del self.units[destination]
+                self._remove(destination)
+            else:
+                self._hash_in(unit)
+                if self.board is not None:
+                    self.board.sync_unit(unit)
+
+    def set_face(self, unit: Unit, face: GridPosition) -> None:
+        """Turn a unit, keeping the attack/defense grids in sync if it is on the board"""
+        if self._journal is not None:
+            self._journal.append((_FACE, unit, unit.face))
+        if self.is_placed(unit):
+            self._unstamp(unit)
+            unit.face = face
+            self._stamp(unit)
+            self._hash_in(unit)
+        else:
+            unit.face = face
+        if self.board is not None:
+            self.board.sync_unit(unit)
+
+    def set_marching(self, unit: Unit, is_marching: bool) -> None:
+        if self._journal is not None:
+            self._journal.append((_MARCH, unit, unit.is_marching))
+        unit.is_marching = is_marching
+        if unit in self._unit_keys:
+            self._hash_in(unit)
+            self.bitboards.set_marching(unit.loc, is_marching)
+        if self.board is not None:
+            self.board.sync_unit(unit)
+
+    def checkpoint(self) -> int:
+        """
+        Start recording changes, if not already, and return a mark for rollback().
+
+        Every placement, removal, damage, face and marching change made
+        through the grid is journaled, so a search can apply a turn and undo
+        it without copying the board. Checkpoints nest. Only the board is
+        covered; Simulation.checkpoint() also restores the game around it.
+        """
+        if self._journal is None:
+            self._journal = []
+        return len(self._journal)
+
+    def rollback(self, mark: int) -> None:
+        """Undo every change recorded since checkpoint() returned mark"""
+        journal = self._journal
+        # undoing goes through the same primitives, which must not journal again
+        self._journal = None
+        try:
+            while len(journal) > mark:
+                entry = journal.pop()
+                kind, unit = entry[0], entry[1]
+                if kind is _PLACE:
+                    _, _, destination, displaced, loc = entry
+                    self._remove(destination)
+                    if displaced is not None and displaced is not unit:
+                        self._place(displaced, destination)
+                    unit.loc = loc
+                elif kind is _REMOVE:
+                    self._place(unit, entry[2])
+                elif kind is _HEALTH:
+                    unit.health = entry[2]
+                    if self.is_placed(unit):
+                        self._hash_in(unit)
+                        if self.board is not None:
+                            self.board.sync_unit(unit)
+                elif kind is _FACE:
+                    self.set_face(unit, entry[2])
+                else:
+                    self.set_marching(unit, entry[2])
+        finally:
+            self._journal = journal
+
+    @property
+    def state_hash(self) -> int:
+        """
+        Zobrist hash of the units on the board (cell, type, clan, face,
+        marching, health), updated in O(1) by every change.
+        """
+        return self._hash
+
+    def hash_with(self, units: list[Unit], face: GridPosition, is_marching: bool) -> int:
+        """The state_hash the board would have if the given units on it had this face and marching state"""
+        value = self._hash
+        for unit in units:
+            value ^= self._unit_keys[unit] ^ zobrist_key(unit, face, is_marching)
+        return value
+
+    @property
+    def journaling(self) -> bool:
+        return self._journal is not None
+
+    def end_journal(self) -> None:
+        """Stop recording; changes made so far can no longer be rolled back"""
+        self._journal = None
 
     def to_string(self) -> str:
         """Convert the grid to a string representation"""
@@ -66,149 +431,104 @@ class LevelGrid:
 
 
     def get_surrounding_grid_cells(self, grid_position: GridPosition) -> list[GridPosition]:
-        """Get the surrounding grid cells of a given position"""
-        surrounding_cells = []
-        for dx in [-1, 0, 1]:
-            for dy in [-1, 0, 1]:
-                if dx == 0 and dy == 0:
-                    continue
-                new_pos = GridPosition(grid_position.x + dx, grid_position.y + dy)
-                if 0 <= new_pos.x < self.COL_NUM and 0 <= new_pos.y < self.ROW_NUM:
-                    surrounding_cells.append(new_pos)
-        return surrounding_cells
+        """Get the surrounding grid cells of a given position (shared list, do not mutate)"""
+        return self.positions.neighbours(grid_position)
+
     def count_surrounding_opponents(self, unit: Unit) -> int:
-        cells = self.get_surrounding_grid_cells(unit.loc)
-        count = 0
-        for cell in cells:
-            if cell in self.units and self.units[cell].unit_clan != unit.unit_clan:
-                count += 1
-        return count
+        opponent = UnitClan.Enemy if unit.unit_clan == UnitClan.Ally else UnitClan.Ally
+        return self.spatial.count_in(self.get_surrounding_grid_cells(unit.loc), opponent)
 
+    def positions_of(self, chunk: tuple[int, int], bitboard: int) -> list[GridPosition]:
+        """The cells set in a chunk bitboard of this grid, row by row"""
+        get = self.positions.get
+        return [get(x, y) for x, y in self.bitboards.cells(chunk, bitboard)]
 
     @property
-    def ally_attack_grid(self) -> dict[GridPosition, int]:
-        """Get a dictionary of positions and attack counts for ally units"""
-        attack_grid = defaultdict(lambda: 0)
-        for unit in self.units.values():
-            if unit.unit_clan == UnitClan.Ally:
-                for attack_pos in unit.attack_range:
-                    attack_grid[attack_pos] += unit.attack
-            elif unit.unit_clan == UnitClan.Enemy and unit.friendly_fire:
-                for attack_pos in unit.attack_range:
-                    attack_grid[attack_pos] += unit.attack
-        return attack_grid
+    def active_chunks(self) -> set[tuple[int, int]]:
+        """Chunks of the board holding at least one unit (see world.py)"""
+        return self.bitboards.active_chunks()
+
+    def units_in_rect(self, x0: int, y0: int, x1: int, y1: int, clan: UnitClan | None = None) -> list[Unit]:
+        """Units of a clan (or both clans if None) inside the rectangle from (x0, y0) to (x1, y1) inclusive"""
+        return self.spatial.in_rect(x0, y0, x1, y1, clan)
+
+    def units_in_radius(self, center: GridPosition, radius: float, clan: UnitClan | None = None) -> list[Unit]:
+        """Units of a clan (or both clans if None) within Euclidean distance radius of center"""
+        return self.spatial.in_radius(center, radius, clan)
+
 
     @property
-    def ally_defense_grid(self) -> dict[GridPosition, int]:
-        """Get a dictionary of positions and defense counts for ally units"""
-        defense_grid = defaultdict(lambda: 0)
-        for unit in self.units.values():
-            if unit.unit_clan == UnitClan.Ally:
-                for defense_pos in unit.defense_range:
-                    defense_grid[defense_pos] += unit.guardian_defense
-                if unit.self_defense > 0:
-                    defense_grid[unit.loc] += unit.self_defense  # add self defense
-        return defense_grid
+    def ally_attack_grid(self) -> dict[GridPosition, int]:
+        """Positions and summed attack of ally units (live view, do not mutate)"""
+        return self._ally_attack.values
 
     @property
-    def ally_attack_result_grid(self) -> dict[GridPosition, int]:
-        ally_attack_grid = self.ally_attack_grid
-        enemy_defense_grid = self.enemy_defense_grid
-
-        # remove attack positions with no unit
-        keys_to_remove = []
-        for attack_pos, damage in ally_attack_grid.items():
-            if attack_pos not in self.units or self.units[attack_pos].unit_clan == UnitClan.Ally:
-                keys_to_remove.append(attack_pos)
-        for key in keys_to_remove:
-            del ally_attack_grid[key]
-
-        # defense
-        keys_to_remove = []
-        for attack_pos, damage in ally_attack_grid.items():
-            if attack_pos in enemy_defense_grid:
-                damage -= enemy_defense_grid[attack_pos]
-                ally_attack_grid[attack_pos] = damage
-            if damage < 0:
-                keys_to_remove.append(attack_pos)
-        for key in keys_to_remove:
-            del ally_attack_grid[key]
-
-        # coop: if the unit under attack is surrounded by 2 opponent units, damage plus 1; if 3 or more, damage plus 2
-        for attack_pos, damage in ally_attack_grid.items():
-            unit_under_attack = self.units.get(attack_pos)
-            surrounding_opponent_count = self.count_surrounding_opponents(unit_under_attack)
-            if surrounding_opponent_count == 2:
-                damage += 1
-                ally_attack_grid[attack_pos] = damage
-            elif surrounding_opponent_count >= 3:
-                damage += 2
-                ally_attack_grid[attack_pos] = damage
-
-        return ally_attack_grid
+    def ally_defense_grid(self) -> dict[GridPosition, int]:
+        """Positions and summed defense of ally units (live view, do not mutate)"""
+        return self._ally_defense.values
 
     @property
     def enemy_attack_grid(self) -> dict[GridPosition, int]:
-        """Get a dictionary of positions and attack counts for enemy units"""
-        attack_grid = defaultdict(lambda: 0)
-        for unit in self.units.values():
-            if unit.unit_clan == UnitClan.Enemy:
-                for attack_pos in unit.attack_range:
-                    attack_grid[attack_pos] += unit.attack
-            elif unit.unit_clan == UnitClan.Ally and unit.friendly_fire:
-                for attack_pos in unit.attack_range:
-                    attack_grid[attack_pos] += unit.attack
-        return attack_grid
+        """Positions and summed attack of enemy units (live view, do not mutate)"""
+        return self._enemy_attack.values
 
     @property
     def enemy_defense_grid(self) -> dict[GridPosition, int]:
-        """Get a dictionary of positions and defense counts for enemy units"""
-        defense_grid = defaultdict(lambda: 0)
-        for unit in self.units.values():
-            if unit.unit_clan == UnitClan.Enemy:
-                for defense_pos in unit.defense_range:
-                    defense_grid[defense_pos] += unit.guardian_defense
-                if unit.self_defense > 0:
-                    # add self defense
-                    defense_grid[unit.loc] += unit.self_defense
-        return defense_grid
+        """Positions and summed defense of enemy units (live view, do not mutate)"""
+        return self._enemy_defense.values
+
+    def _memoized(self, name: str, compute) -> dict[GridPosition, int]:
+        grid = self._derived.get(name)
+        if grid is None:
+            self.cache_misses += 1
+            grid = compute()
+            self._derived[name] = grid
+        else:
+            self.cache_hits += 1
+        return grid
+
+    @property
+    def cache_stats(self) -> dict[str, int]:
+        """Hits and misses of the derived result grid cache"""
+        return {'hits': self.cache_hits, 'misses': self.cache_misses}
+
+    @property
+    def ally_attack_result_grid(self) -> dict[GridPosition, int]:
+        """Damage ally attacks deal to each enemy (shared until the board changes, do not mutate)"""
+        return self._memoized('ally_attack_result', self._ally_attack_result_grid)
 
     @property
     def enemy_attack_result_grid(self) -> dict[GridPosition, int]:
-        enemy_attack_grid = self.enemy_attack_grid
-        ally_defense_grid = self.ally_defense_grid
-
-        # remove attack positions with no unit
-        keys_to_remove = []
-        for attack_pos, damage in enemy_attack_grid.items():
-            if attack_pos not in self.units or self.units[attack_pos].unit_clan == UnitClan.Enemy:
-                keys_to_remove.append(attack_pos)
-        for key in keys_to_remove:
-            del enemy_attack_grid[key]
-
-        # defense
-        keys_to_remove = []
-        for attack_pos, damage in enemy_attack_grid.items():
-            if attack_pos in ally_defense_grid:
-                damage -= ally_defense_grid[attack_pos]
-                enemy_attack_grid[attack_pos] = damage
-            if damage < 0:
-                keys_to_remove.append(attack_pos)
-        for key in keys_to_remove:
-            del enemy_attack_grid[key]
-
-        # coop: if the unit under attack is surrounded by 2 opponent units, damage plus 1; if 3 or more, damage plus 2
-        for attack_pos, damage in enemy_attack_grid.items():
-            unit_under_attack = self.units.get(attack_pos)
-            surrounding_opponent_count = self.count_surrounding_opponents(unit_under_attack)
-            if surrounding_opponent_count == 2:
-                damage += 1
-                enemy_attack_grid[attack_pos] = damage
-            elif surrounding_opponent_count >= 3:
-                damage += 2
-                enemy_attack_grid[attack_pos] = damage
-
-        return enemy_attack_grid
+        """Damage enemy attacks deal to each ally (shared until the board changes, do not mutate)"""
+        return self._memoized('enemy_attack_result', self._enemy_attack_result_grid)
+
+    def _ally_attack_result_grid(self) -> dict[GridPosition, int]:
+        return self._attack_result_grid(UnitClan.Ally, self.ally_attack_grid, self.enemy_defense_grid)
+
+    def _enemy_attack_result_grid(self) -> dict[GridPosition, int]:
+        return self._attack_result_grid(UnitClan.Enemy, self.enemy_attack_grid, self.ally_defense_grid)
+
+    def _attack_result_grid(self, clan: UnitClan, attack_grid: dict[GridPosition, int],
+                            defense_grid: dict[GridPosition, int]) -> dict[GridPosition, int]:
+        """Damage the clan's attacks deal to each opponent, after defense and the coop bonus"""
+        opponent = UnitClan.Enemy if clan == UnitClan.Ally else UnitClan.Ally
+        bitboards = self.bitboards
+
+        # only attacked cells holding an opponent take damage, so only chunks with opponents are visited
+        targets = []
+        for chunk, opponents in bitboards.occupied[opponent].items():
+            cells = bitboards.coverage(clan, chunk) & opponents
+            if cells:
+                targets.extend(self.positions_of(chunk, cells))
+
+        result_grid = {}
+        for attack_pos in targets:
+            damage = hit_damage(attack_grid[attack_pos], defense_grid.get(attack_pos, 0),
+                                self.count_surrounding_opponents(self.units[attack_pos]))
+            if damage is not None:
+                result_grid[attack_pos] = damage
+
+        return result_grid
 
     @property
     def movement_request(self) -> dict[GridPosition, list[Unit]]:
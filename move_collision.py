@@ -1,122 +1,129 @@
 """
 Module for handling movement collisions in the grid game.
-Contains stateless functions to resolve each collision case.
+Contains stateless functions that resolve every collision case in one pass
+over the "who moves into whom" graph.
 """
 import random
 from typing import List, Tuple, Dict, Optional
 from grid_position import GridPosition
 from Unit import Unit
 from enums import UnitClan
+from events import DEBUG, EventKind, EventLog, active
 
 
-def resolve_boundary_collision(
+def pick_movement_winners(
         movement_requests: Dict[GridPosition, List[Unit]],
         grid_rows: int,
-        grid_cols: int
-) -> Dict[GridPosition, List[Unit]]:
+        grid_cols: int,
+        events: Optional[EventLog] = None,
+        rng: Optional[random.Random] = None
+) -> Dict[Unit, GridPosition]:
     """
+    First phase of resolve_movement_collision: build the "who moves into
+    whom" graph by keeping the highest priority requester of each in-bounds
+    destination (random among ties).
 
+    Returns:
+        Dict of each winning unit to its destination
     """
-    keys_to_remove = []
-    for destination, unit_list in list(movement_requests.items()):
-        # Check if the destination is out of bounds
-        if not destination.check_bounds(grid_rows, grid_cols):
-            # Remove the destination from the movement requests
-            keys_to_remove.append(destination)
-
-    # Remove invalid destinations from the movement requests
-    for key in keys_to_remove:
-        print(f"Removing out of bounds destination: {key} from movement requests")
-        del movement_requests[key]
-
-
-    return movement_requests
-
-
-def resolve_occupied_cell_collision(
-        movement_requests: Dict[GridPosition, List[Unit]],
-        units: Dict[GridPosition, Unit]
-) -> Dict[GridPosition, List[Unit]]:
-    """
-    """
-
-    keys_to_remove = []
+    log = active(events, DEBUG)
+    choice = (rng or random).choice
 
+    targets: Dict[Unit, GridPosition] = {}
     for destination, unit_list in movement_requests.items():
-        if destination in units:
-            occupying_unit = units[destination]
-            if not occupying_unit.is_marching \
-                    or occupying_unit.move_destination not in movement_requests\
-                    or occupying_unit not in movement_requests[occupying_unit.move_destination]:
-                keys_to_remove.append(destination)
-
-    # Remove invalid destinations from the movement requests
-    for key in keys_to_remove:
-        print(f"Removing occupied destination: {key} from movement requests")
-        del movement_requests[key]
-    return movement_requests
-
-
-def resolve_multiple_units_collision(
-        movement_requests: Dict[GridPosition, List[Unit]]
-) -> Dict[GridPosition, Unit]:
-    result_dict = {}
-    for destination, unit_list in movement_requests.items():
-        max_priority = max(unit.priority for unit in unit_list)
-        filtered_unit_list = [unit for unit in unit_list if unit.priority == max_priority]
-        chosen_unit = random.choice(filtered_unit_list)
-        result_dict[destination] = chosen_unit
+        if not destination.check_bounds(grid_rows, grid_cols):
+            if log is not None:
+                for unit in unit_list:
+                    log.emit(EventKind.CollisionDropped, destination, unit.name, 'out-of-bounds')
+            continue
+        chosen_unit = unit_list[0]
         if len(unit_list) > 1:
-            print(f"Resolving multiple units collision at {destination}: Chose unit {chosen_unit.name} with priority {chosen_unit.priority}")
-    return result_dict
+            max_priority = max(unit.priority for unit in unit_list)
+            chosen_unit = choice([unit for unit in unit_list if unit.priority == max_priority])
+            if log is not None:
+                log.emit(EventKind.TieBroken, destination, chosen_unit.name, len(unit_list))
+        # a unit moves at most once; keep its first destination
+        targets.setdefault(chosen_unit, destination)
+    return targets
 
 
-def resolve_opposite_clan_collision(
-        movement_requests_single: Dict[GridPosition, Unit],
+def resolve_movement_chains(
+        targets: Dict[Unit, GridPosition],
         units: Dict[GridPosition, Unit],
+        events: Optional[EventLog] = None
 ) -> Dict[GridPosition, Unit]:
     """
-    """
-    # find pairs that are opposite clans and bump into each other
-
-    keys_to_remove = set()
+    Second phase of resolve_movement_collision: follow each winner's chain
+    until it reaches a resolved unit, an empty cell, a unit that stays put
+    or closes a cycle, and settle the whole chain or cycle at once.
 
-    for destination, unit in movement_requests_single.items():
-        if destination in keys_to_remove:
+    Returns:
+        Dict of destination to the unit that moves there
+    """
+    log = active(events, DEBUG)
+    moves: Dict[Unit, bool] = {}
+    for start in targets:
+        if start in moves:
             continue
-
-        origin = unit.loc
-        unit2 = units.get(destination)
-        # if the destination is occupied by a unit of the opposite clan
-        if unit2 and unit2.unit_clan != unit.unit_clan:
-            # if the opponent is marching towards the unit
-            if unit2.is_marching and movement_requests_single.get(origin) == unit2:
-                keys_to_remove.add(destination)
-                keys_to_remove.add(origin)
-
-    # Remove invalid destinations from the movement requests
-    for key in keys_to_remove:
-        print(f"Removing opposite clan collision at {key} from movement requests")
-        del movement_requests_single[key]
-    return movement_requests_single
+        path = [start]
+        on_path = {start}
+        reason = 'blocked'  # why the chain's head cannot move
+        while True:
+            occupant = units.get(targets[path[-1]])
+            if occupant is None:
+                outcome = True
+                break
+            if occupant in moves:
+                outcome = moves[occupant]
+                break
+            if occupant not in targets:
+                outcome, reason = False, 'occupied'
+                break
+            if occupant in on_path:
+                cycle = path[path.index(occupant):]
+                outcome = len(cycle) != 2 or cycle[0].unit_clan == cycle[1].unit_clan
+                reason = None
+                break
+            path.append(occupant)
+            on_path.add(occupant)
+        for unit in path:
+            moves[unit] = outcome
+        if log is not None and not outcome:
+            for unit in path:
+                if reason is None:
+                    log.emit(EventKind.OppositeClanBlocked, targets[unit], unit.name)
+                else:
+                    log.emit(EventKind.CollisionDropped, targets[unit], unit.name,
+                             reason if unit is path[-1] else 'blocked')
+
+    return {targets[unit]: unit for unit, moved in moves.items() if moved}
 
 
 def resolve_movement_collision(
         movement_requests: Dict[GridPosition, List[Unit]],
         units: Dict[GridPosition, Unit],
         grid_rows: int,
-        grid_cols: int
+        grid_cols: int,
+        events: Optional[EventLog] = None,
+        rng: Optional[random.Random] = None
 ) -> Dict[GridPosition, Unit]:
     """
+    Resolve all movement requests in one pass over the "who moves into whom" graph.
+
+    Each in-bounds destination keeps its highest priority requester (random
+    among ties). A winner moving into an occupied cell depends on the
+    occupant: since every cell has at most one winner, these dependencies
+    form simple chains and cycles. A chain moves if its head reaches an
+    empty cell and stops as a whole if the head is blocked; a cycle rotates,
+    except two units of opposite clans bumping into each other.
+    The two phases are pick_movement_winners and resolve_movement_chains.
+
+    Dropped moves, broken ties and opposite-clan blocks are reported to events.
+    Ties are broken with rng, or the global random module if none is given.
+
+    Returns:
+        Dict of destination to the unit that moves there. Moving every unit
+        out and then into its destination never displaces a unit that stays.
     """
-    # Step 1: Remove keys
-    movement_requests = resolve_boundary_collision(movement_requests, grid_rows, grid_cols)
-    movement_requests = resolve_occupied_cell_collision(movement_requests, units)
-
-    # Step 2: Shrink the movement requests into a single unit
-    movement_requests_single = resolve_multiple_units_collision(movement_requests)
-
-    # Step 3: Remove opposite clan collisions
-    movement_requests_single = resolve_opposite_clan_collision(movement_requests_single, units)
-
-    return movement_requests_single
+    targets = pick_movement_winners(movement_requests, grid_rows, grid_cols, events, rng)
+    return resolve_movement_chains(targets, units, events)
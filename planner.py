@@ -0,0 +1,352 @@
+"""
+Lookahead planner for unit group orders.
+
+For one group the planner tries every order a player can give it (a face
+direction and a marching state), plays a few turns ahead with the real
+movement and attack rules, and keeps the order with the best score: damage
+dealt minus damage taken by the group's clan. Later turns branch over the
+group's orders again; other units keep their current orders.
+
+Turns are applied and undone through the LevelGrid undo journal, depth grows
+by iterative deepening until the time budget runs out, and evaluated board
+states are cached so orders and turn sequences that reach the same board are
+only played once. The last turn searched only needs its damage, so it is
+scored on a scratch copy of the board without applying anything, and the
+orders that hold the group in place share one movement resolution.
+"""
+from __future__ import annotations
+
+import time
+from collections import defaultdict
+from typing import NamedTuple
+
+from enums import UnitClan
+from grid_position import GridPosition
+from level_grid import LevelGrid, hit_damage
+from move_collision import resolve_movement_collision
+from simulation import play_attacks, play_movement
+from Unit import Unit
+from Unit.Unit import FACES
+
+# Every (face, marching) order a group can be given
+ORDERS = [(face, marching) for face in FACES for marching in (True, False)]
+
+
+class Plan(NamedTuple):
+    group_id: int
+    face: GridPosition
+    marching: bool
+    score: int
+    depth: int  # turns looked ahead by the deepest completed search
+
+
+class _FirstChoice:
+    """Collision tie breaker that always keeps the first candidate, so evaluations repeat exactly"""
+
+    @staticmethod
+    def choice(candidates: list[Unit]) -> Unit:
+        return candidates[0]
+
+
+class _Timeout(Exception):
+    pass
+
+
+class Planner:
+    def __init__(self, level_grid: LevelGrid, max_depth: int = 3, cache_size: int = 200000) -> None:
+        """
+        Args:
+            level_grid: Board to plan on; it is left unchanged
+            max_depth: Most turns to look ahead
+            cache_size: Evaluated states kept before the cache is cleared
+        """
+        self.level_grid = level_grid
+        self.max_depth = max_depth
+        self.cache_size = cache_size
+        self.cache: dict[tuple[int, int, int], int] = {}
+        self.hits = 0
+        self.misses = 0
+        self._deadline = 0.0
+
+    def group_units(self, group_id: int) -> list[Unit]:
+        return [unit for unit in self.level_grid.units.values() if unit.group_id == group_id]
+
+    def plan(self, group_id: int, time_budget: float = 0.01) -> Plan | None:
+        """
+        Find the best order for a group within time_budget seconds.
+
+        Returns:
+            The best order of the deepest search that finished (depth 1 is
+            always searched), or None if the group has no units on the board
+        """
+        units = self.group_units(group_id)
+        if not units:
+            return None
+        clan = units[0].unit_clan
+        self._deadline = time.perf_counter() + time_budget
+
+        level_grid = self.level_grid
+        owns_journal = not level_grid.journaling
+        best = None
+        try:
+            for depth in range(1, self.max_depth + 1):
+                try:
+                    score, order = self._best_order(group_id, clan, depth, depth > 1)
+                except _Timeout:
+                    break
+                best = Plan(group_id, order[0], order[1], score, depth)
+        finally:
+            if owns_journal:
+                level_grid.end_journal()
+        return best
+
+    def plan_groups(self, group_ids: list[int], time_budget: float = 0.05) -> dict[int, Plan]:
+        """Plan each group in turn, splitting time_budget between them"""
+        deadline = time.perf_counter() + time_budget
+        plans = {}
+        for i, group_id in enumerate(group_ids):
+            # time a group leaves unused goes to the groups after it
+            share = (deadline - time.perf_counter()) / (len(group_ids) - i)
+            plan = self.plan(group_id, max(share, 0.0))
+            if plan is not None:
+                plans[group_id] = plan
+        return plans
+
+    def apply(self, plan: Plan) -> None:
+        """Give a planned order to the units of its group"""
+        for unit in self.group_units(plan.group_id):
+            self.level_grid.set_face(unit, plan.face)
+            self.level_grid.set_marching(unit, plan.marching)
+
+    def _best_order(self, group_id: int, clan: UnitClan, depth: int,
+                    timed: bool) -> tuple[int, tuple[GridPosition, bool]]:
+        """Best (score, order) for the group over depth turns from the current board"""
+        level_grid = self.level_grid
+        units = self.group_units(group_id)
+        if depth == 1:
+            scores = self._last_turn_scores(group_id, clan, units, timed)
+        else:
+            scores = {}
+            for order in ORDERS:
+                if not order[1]:
+                    continue
+                if timed and time.perf_counter() > self._deadline:
+                    raise _Timeout
+                mark = level_grid.checkpoint()
+                try:
+                    _give_order(level_grid, units, order)
+                    scores[order] = self._play(group_id, clan, depth, timed)
+                finally:
+                    level_grid.rollback(mark)
+            scores.update(self._hold_scores(group_id, clan, units, depth, timed))
+
+        # ties go to the first order in ORDERS
+        best_order = max(ORDERS, key=lambda order: (scores[order], -ORDERS.index(order)))
+        return scores[best_order], best_order
+
+    def _last_turn_scores(self, group_id: int, clan: UnitClan, units: list[Unit],
+                          timed: bool) -> dict[tuple[GridPosition, bool], int]:
+        """
+        Scores of every order on the last turn searched. Only its damage
+        matters, so the board is left alone: the order goes into the movement
+        requests and the faces of the scratch board of _damage_after, and the
+        cache key is the hash the board would have with the order given.
+        """
+        level_grid = self.level_grid
+        group = set(units)
+        scores = {}
+        hold_moves = None
+        for order in ORDERS:
+            face, marching = order
+            key = (level_grid.hash_with(units, face, marching), group_id, 1)
+            score = self.cache.get(key)
+            if score is not None:
+                self.hits += 1
+                scores[order] = score
+                continue
+            if timed and time.perf_counter() > self._deadline:
+                raise _Timeout
+            self.misses += 1
+            if marching:
+                moves = _resolve_movement(level_grid, group, face)
+            else:
+                # units that do not march move the same way whatever they face
+                if hold_moves is None:
+                    hold_moves = _resolve_movement(level_grid, group, None)
+                moves = hold_moves
+            damage = _damage_after(level_grid, moves, {unit: face for unit in units})
+            scores[order] = self._store(key, damage[clan] - damage[_opponent(clan)])
+        return scores
+
+    def _hold_scores(self, group_id: int, clan: UnitClan, units: list[Unit], depth: int,
+                     timed: bool) -> dict[tuple[GridPosition, bool], int]:
+        """
+        Scores of the orders that hold the group in place, before the last
+        turn. Units that do not march move the same way whatever they face, so
+        the turn's movement is played once and only the faces change after it.
+        """
+        level_grid = self.level_grid
+        scores, keys = {}, {}
+        mark = level_grid.checkpoint()
+        try:
+            for order in ORDERS:
+                if order[1]:
+                    continue
+                key = (level_grid.hash_with(units, order[0], False), group_id, depth)
+                score = self.cache.get(key)
+                if score is None:
+                    keys[order] = key
+                else:
+                    self.hits += 1
+                    scores[order] = score
+            if not keys:
+                return scores
+
+            for unit in units:
+                level_grid.set_marching(unit, False)
+            play_movement(level_grid, rng=_FirstChoice)
+            for order, key in keys.items():
+                if timed and time.perf_counter() > self._deadline:
+                    raise _Timeout
+                self.misses += 1
+                turned = level_grid.checkpoint()
+                try:
+                    for unit in units:
+                        level_grid.set_face(unit, order[0])
+                    scores[order] = self._store(key, self._score_turn(group_id, clan, depth, timed))
+                finally:
+                    level_grid.rollback(turned)
+        finally:
+            level_grid.rollback(mark)
+        return scores
+
+    def _play(self, group_id: int, clan: UnitClan, depth: int, timed: bool) -> int:
+        """Score of playing depth (2 or more) turns from the current board, the first with the current orders"""
+        key = (self.level_grid.state_hash, group_id, depth)
+        score = self.cache.get(key)
+        if score is not None:
+            self.hits += 1
+            return score
+        self.misses += 1
+
+        level_grid = self.level_grid
+        mark = level_grid.checkpoint()
+        try:
+            play_movement(level_grid, rng=_FirstChoice)
+            score = self._score_turn(group_id, clan, depth, timed)
+        finally:
+            level_grid.rollback(mark)
+        return self._store(key, score)
+
+    def _score_turn(self, group_id: int, clan: UnitClan, depth: int, timed: bool) -> int:
+        """Score of the attacks of a turn whose movement has been played, and of the depth - 1 turns after it"""
+        level_grid = self.level_grid
+        damage = play_attacks(level_grid, level_grid.ally_attack_result_grid, level_grid.enemy_attack_result_grid)
+        score = damage[clan] - damage[_opponent(clan)]
+        if self.group_units(group_id):
+            score += self._best_order(group_id, clan, depth - 1, timed)[0]
+        return score
+
+    def _store(self, key: tuple[int, int, int], score: int) -> int:
+        if len(self.cache) >= self.cache_size:
+            self.cache.clear()
+        self.cache[key] = score
+        return score
+
+
+def _give_order(level_grid: LevelGrid, units: list[Unit], order: tuple[GridPosition, bool]) -> None:
+    face, marching = order
+    for unit in units:
+        level_grid.set_face(unit, face)
+        level_grid.set_marching(unit, marching)
+
+
+def _resolve_movement(level_grid: LevelGrid, group: set[Unit], face: GridPosition | None) -> dict[GridPosition, Unit]:
+    """
+    Resolve the turn's movement as if the group were marching towards face,
+    or holding if face is None, without changing the board.
+
+    Returns:
+        Dict of destination to the unit that would move there
+    """
+    movement_requests = defaultdict(list)
+    for unit in level_grid.units.values():
+        if unit in group:
+            if face is None:
+                continue
+            destination = unit.loc + face
+        elif unit.is_marching:
+            destination = unit.move_destination
+        else:
+            continue
+        movement_requests[destination].append(unit)
+    return resolve_movement_collision(movement_requests, level_grid.units, level_grid.ROW_NUM, level_grid.COL_NUM,
+                                      rng=_FirstChoice)
+
+
+def _damage_after(level_grid: LevelGrid, moves: dict[GridPosition, Unit],
+                  faces: dict[Unit, GridPosition] | None = None) -> dict[UnitClan, int]:
+    """
+    The damage play_attacks would deal after the given moves, computed on a
+    scratch copy of the unit positions instead of moving the units. Coverage
+    is stamped like LevelGrid._stamp, each hit goes through hit_damage like
+    LevelGrid's attack result grids and counts for at most its target's
+    health like in play_attacks; tests check the result against playing
+    the turn on random boards.
+
+    Args:
+        moves: Destination of each moving unit, as returned by _resolve_movement
+        faces: Faces to use instead of the current ones, by unit
+    """
+    faces = faces or {}
+    board = dict(level_grid.units)
+    for unit in moves.values():
+        if board.get(unit.loc) is unit:
+            del board[unit.loc]
+    board.update(moves)
+
+    ally, enemy = UnitClan.Ally, UnitClan.Enemy
+    ally_attack, enemy_attack, ally_defense, enemy_defense = {}, {}, {}, {}
+    ally_cells, enemy_cells = set(), set()
+    for pos, unit in board.items():
+        x, y = pos
+        face = faces.get(unit, unit.face)
+        is_ally = unit.unit_clan is ally
+        (ally_cells if is_ally else enemy_cells).add(pos)
+        attack_range = unit._attack_rotations[face]
+        if attack_range:
+            amount = unit.attack
+            for clan in unit.attacking_clans:
+                grid = ally_attack if clan is ally else enemy_attack
+                for dx, dy in attack_range:
+                    cell = (x + dx, y + dy)
+                    grid[cell] = grid.get(cell, 0) + amount
+        grid = ally_defense if is_ally else enemy_defense
+        for dx, dy in unit._defense_rotations[face]:
+            cell = (x + dx, y + dy)
+            grid[cell] = grid.get(cell, 0) + unit.guardian_defense
+        if unit.self_defense > 0:
+            grid[pos] = grid.get(pos, 0) + unit.self_defense
+
+    neighbours = level_grid.get_surrounding_grid_cells
+    damage_dealt = {}
+    for clan, attack, defense, attackers, opponent in ((ally, ally_attack, enemy_defense, ally_cells, enemy),
+                                                       (enemy, enemy_attack, ally_defense, enemy_cells, ally)):
+        total = 0
+        for cell, amount in attack.items():
+            target = board.get(cell)
+            if target is None or target.unit_clan is not opponent:
+                continue
+            surrounding = 0
+            for pos in neighbours(cell):
+                if pos in attackers:
+                    surrounding += 1
+            damage = hit_damage(amount, defense.get(cell, 0), surrounding)
+            if damage is not None:
+                total += min(damage, target.health)
+        damage_dealt[clan] = total
+    return damage_dealt
+
+
+def _opponent(clan: UnitClan) -> UnitClan:
+    return UnitClan.Enemy if clan == UnitClan.Ally else UnitClan.Ally
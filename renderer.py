@@ -0,0 +1,236 @@
+"""
+Pygame rendering layer.
+
+pygame is imported and initialized on first use, so importing this module
+(or game_state) does not open a window or start SDL.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from camera import Camera
+from colors import GameColor
+from world import ChunkedGrid
+
+_pygame = None
+_screen = None
+_background = None  # retained copy of the drawn board
+_background_view = None  # camera view the background was drawn for
+_minimap_surface = None
+_fonts = {}
+
+
+def get_pygame():
+    """Import and initialize pygame on first use"""
+    global _pygame
+    if _pygame is None:
+        import pygame
+        pygame.init()
+        _pygame = pygame
+    return _pygame
+
+
+def get_screen(width: int, height: int):
+    """Open the game window on first use, or resize it, and return its surface"""
+    global _screen
+    if _screen is None or _screen.get_size() != (width, height):
+        pygame = get_pygame()
+        _screen = pygame.display.set_mode((width, height))
+        pygame.display.set_caption("Grid Game")
+    return _screen
+
+
+def get_font(size: int):
+    """Return the default font at the given size, loading it on first use"""
+    font = _fonts.get(size)
+    if font is None:
+        font = get_pygame().font.Font(None, size)
+        _fonts[size] = font
+    return font
+
+
+class TextCache:
+    """
+    LRU cache of rendered text surfaces keyed by (text, size, color).
+
+    Cell labels come from a small vocabulary, so steady-state frames reuse
+    surfaces instead of rasterising them again. Any font size is supported.
+    """
+
+    def __init__(self, maxsize: int = 512) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._surfaces: OrderedDict = OrderedDict()
+
+    def render(self, text: str, size: int, color: tuple[int, int, int]):
+        key = (text, size, color)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = get_font(size).render(text, True, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.maxsize:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+    def clear(self) -> None:
+        self._surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# shared by every cell the renderer draws
+text_cache = TextCache()
+
+# smallest font size drawn when zoomed out
+MIN_TEXT_SIZE = 8
+
+
+def _draw_cell(surface, i: int, j: int, color: tuple[int, int, int], text: str, text_size: int,
+               cell_size: int):
+    """
+    Draw one cell: background, border and centered text.
+    Drawing is clipped to the cell so a cell can be redrawn on its own.
+    """
+    pygame = get_pygame()
+    rect = (j * cell_size, i * cell_size, cell_size, cell_size)
+    surface.set_clip(rect)
+
+    # Draw cell background
+    pygame.draw.rect(surface, color, rect)
+
+    # Draw cell border
+    pygame.draw.rect(surface, GameColor.BLACK.value, rect, 1)
+
+    surface.set_clip(None)
+    _draw_text(surface, i, j, text, text_size, cell_size)
+
+
+def _draw_text(surface, i: int, j: int, text: str, text_size: int, cell_size: int):
+    """Draw a cell's text centered and clipped to the cell; text too small to read is left out"""
+    if text and text_size >= MIN_TEXT_SIZE:
+        surface.set_clip((j * cell_size, i * cell_size, cell_size, cell_size))
+        text_surface = text_cache.render(text, text_size, GameColor.BLACK.value)
+        text_rect = text_surface.get_rect(center=(j * cell_size + cell_size // 2,
+                                                  i * cell_size + cell_size // 2))
+        surface.blit(text_surface, text_rect)
+        surface.set_clip(None)
+
+
+def cell_pixels(colors: np.ndarray, cell_size: int, width: int, height: int) -> np.ndarray:
+    """
+    Expand an (rows, cols, 3) uint8 image of cell colors to a width x height
+    window of cells with black borders, as _draw_cell draws them, in
+    pygame.surfarray (x, y) order. Pixels past the last cell stay white.
+    """
+    rows, cols = colors.shape[:2]
+    pixels = np.full((height, width, 3), 255, dtype=np.uint8)
+    cells = colors.repeat(cell_size, axis=0).repeat(cell_size, axis=1)[:height, :width]
+    # first and last pixel of every cell, on each axis
+    edge = np.zeros(cell_size, dtype=bool)
+    edge[[0, -1]] = True
+    cells[np.tile(edge, rows)[:cells.shape[0]]] = GameColor.BLACK.value
+    cells[:, np.tile(edge, cols)[:cells.shape[1]]] = GameColor.BLACK.value
+    pixels[:cells.shape[0], :cells.shape[1]] = cells
+    return pixels.transpose(1, 0, 2)
+
+
+def draw_grid(grid_colors: ChunkedGrid, grid_texts: ChunkedGrid, grid_text_sizes: ChunkedGrid, cell_size: int,
+              dirty_cells: set[tuple[int, int]] | None = None, camera: Camera | None = None,
+              view_colors: np.ndarray | None = None) -> list:
+    """
+    Draw the grid with colors and text.
+
+    Only the cells in the camera's view are drawn, into a window the size of
+    the camera; without a camera the whole board is drawn at cell_size.
+    Cells are drawn onto a persistent background surface. The first call,
+    dirty_cells=None or a moved camera draws every cell in view, blitting the
+    view's colors as one array and then the texts; later calls redraw only
+    the dirty cells in view.
+
+    Args:
+        view_colors: (rows, cols, 3) uint8 colors of the cells in the camera's
+            view, top row first, read instead of grid_colors when given
+
+    Returns:
+        Screen rects that changed, for pygame.display.update()
+    """
+    global _background, _background_view
+    pygame = get_pygame()
+    rows, cols = grid_colors.shape
+    if camera is None:
+        camera = Camera(rows, cols, cols * cell_size, rows * cell_size, cell_size)
+    screen = get_screen(camera.width, camera.height)
+    cell_size = camera.cell_size
+
+    if _background is None or _background.get_size() != screen.get_size() or _background_view != camera.view:
+        _background = pygame.Surface(screen.get_size())
+        _background_view = camera.view
+        dirty_cells = None
+
+    row0, col0, row1, col1 = camera.visible()
+    if dirty_cells is None:
+        colors = view_colors
+        if colors is None:
+            colors = np.array(grid_colors.get_block(row0, col0, row1, col1), dtype=np.uint8)
+        pygame.surfarray.blit_array(_background, cell_pixels(colors, cell_size, camera.width, camera.height))
+        for i, j in grid_texts.cells_not(''):
+            if camera.contains(i, j):
+                si, sj = camera.screen_cell(i, j)
+                _draw_text(_background, si, sj, grid_texts.get(i, j), camera.text_size(grid_text_sizes.get(i, j)),
+                           cell_size)
+        screen.blit(_background, (0, 0))
+        return [screen.get_rect()]
+
+    rects = []
+    for i, j in dirty_cells:
+        if not camera.contains(i, j):
+            continue
+        si, sj = camera.screen_cell(i, j)
+        if view_colors is None:
+            color = grid_colors.get(i, j)
+        else:
+            color = tuple(view_colors[i - row0, j - col0].tolist())
+        _draw_cell(_background, si, sj, color, grid_texts.get(i, j),
+                   camera.text_size(grid_text_sizes.get(i, j)), cell_size)
+        rect = pygame.Rect(sj * cell_size, si * cell_size, cell_size, cell_size)
+        screen.blit(_background, rect, rect)
+        rects.append(rect)
+    return rects
+
+
+def draw_minimap(colors, camera: Camera, margin: int = 8):
+    """
+    Draw a minimap in the bottom-right corner of the window, with the
+    camera's view outlined.
+
+    Args:
+        colors: (width, height, 3) uint8 array of minimap pixels, blitted in one call
+
+    Returns:
+        Screen rect of the minimap
+    """
+    global _minimap_surface
+    pygame = get_pygame()
+    screen = get_screen(camera.width, camera.height)
+    width, height = colors.shape[:2]
+    if _minimap_surface is None or _minimap_surface.get_size() != (width, height):
+        _minimap_surface = pygame.Surface((width, height))
+    pygame.surfarray.blit_array(_minimap_surface, colors)
+
+    rect = pygame.Rect(camera.width - width - margin, camera.height - height - margin, width, height)
+    screen.blit(_minimap_surface, rect)
+    row0, col0, row1, col1 = camera.visible()
+    view = pygame.Rect(rect.x + col0 * width // camera.cols, rect.y + row0 * height // camera.rows,
+                       max(1, (col1 - col0) * width // camera.cols), max(1, (row1 - row0) * height // camera.rows))
+    pygame.draw.rect(screen, GameColor.RED.value, view, 1)
+    pygame.draw.rect(screen, GameColor.BLACK.value, rect.inflate(2, 2), 1)
+    return rect.inflate(2, 2)
@@ -0,0 +1,289 @@
+"""
+Replay recording and headless playback.
+
+A replay holds everything needed to play a game again: the board size and
+engine options, the seed, the starting layout and the stream of player
+commands (group select, face, march toggle, move step, attack step). Since
+every random choice of the rules comes from the seeded simulation
+generator, feeding the same commands to a new Simulation plays the exact
+same game.
+
+Binary format (little endian):
+
+    header   b'TQRP', version (B), flags (B), rows (H), cols (H), seed (Q),
+             unit count (I)
+    units    unit type (B), clan (B), x (H), y (H), face (B), group (h),
+             name length (B), name (UTF-8)
+    commands one opcode byte each until the end of the file; SELECT is
+             followed by the group id (h)
+
+ReplayPlayer re-simulates a replay without rendering and keeps a keyframe
+(a copy of the simulation) every few turns, so seek() can jump to any turn
+by playing forward from the nearest keyframe instead of from the start.
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import struct
+import time
+
+from enums import UnitClan, UnitType
+from events import OFF, EventLog
+from simulation import DIRECTIONS, Simulation
+from Unit import UNIT_CLASSES
+
+MAGIC = b'TQRP'
+VERSION = 1
+
+# Opcodes
+MOVE = 0
+ATTACK = 1
+MARCH = 2
+SELECT = 3
+FACE = 4  # FACE + index of the key in FACE_KEYS
+
+# Keys of Simulation.update_selected_units_face
+FACE_KEYS = 'WASD'
+
+# Header flags
+DENSE = 1
+VECTORIZED_COMBAT = 2
+PATROL = 4
+
+UNIT_TYPES = list(UnitType)
+CLANS = list(UnitClan)
+FACE_LETTERS = list(DIRECTIONS)
+
+_HEADER = struct.Struct('<4sBBHHQI')
+_UNIT = struct.Struct('<BBHHBhB')
+_GROUP = struct.Struct('<h')
+
+
+class Replay:
+    """
+    A recorded game. While attached to a simulation (see record()) it is the
+    simulation's recorder and appends every command the simulation receives.
+    """
+
+    def __init__(self, row_num: int, col_num: int, seed: int, flags: int = 0,
+                 layout: list[dict] | None = None, commands: bytes = b'') -> None:
+        if not 0 <= seed < 2 ** 64:
+            raise ValueError(f"Replay seeds must fit in 64 bits, got {seed}")
+        self.row_num = row_num
+        self.col_num = col_num
+        self.seed = seed
+        self.flags = flags
+        self.layout = list(layout) if layout else []
+        self.commands = bytearray(commands)
+
+    def new_simulation(self, events: EventLog | None = None) -> Simulation:
+        """A simulation set up like the recorded one at its start, with the layout loaded"""
+        simulation = Simulation(self.row_num, self.col_num, dense=bool(self.flags & DENSE),
+                                vectorized_combat=bool(self.flags & VECTORIZED_COMBAT),
+                                events=events, seed=self.seed, patrol=bool(self.flags & PATROL))
+        simulation.load_layout(self.layout)
+        return simulation
+
+    # Recorder interface, called by Simulation
+
+    def loaded(self, layout: list[dict]) -> None:
+        if self.commands:
+            raise ValueError("Layouts can only be recorded before the first command")
+        for unit_config in layout:
+            unit_type = UnitType(unit_config['unit_type'])
+            clan = UnitClan(unit_config.get('clan', 'Ally'))
+            # store every field with the default load_layout would use
+            self.layout.append({
+                'unit_type': unit_type.value,
+                'clan': clan.value,
+                'x': unit_config['x'],
+                'y': unit_config['y'],
+                'face': unit_config.get('face', 'N'),
+                'group': unit_config.get('group', -1 if clan == UnitClan.Enemy else 1),
+                'name': unit_config.get('name', UNIT_CLASSES[unit_type].__name__[0]),
+            })
+
+    def selected(self, group_id: int) -> None:
+        self.commands.append(SELECT)
+        self.commands += _GROUP.pack(group_id)
+
+    def faced(self, direction: str) -> None:
+        self.commands.append(FACE + FACE_KEYS.index(direction))
+
+    def toggled_marching(self) -> None:
+        self.commands.append(MARCH)
+
+    def moved(self) -> None:
+        self.commands.append(MOVE)
+
+    def attacked(self) -> None:
+        self.commands.append(ATTACK)
+
+    # Encoding
+
+    def to_bytes(self) -> bytes:
+        parts = [_HEADER.pack(MAGIC, VERSION, self.flags, self.row_num, self.col_num,
+                              self.seed, len(self.layout))]
+        for unit_config in self.layout:
+            name = unit_config['name'].encode('utf-8')
+            parts.append(_UNIT.pack(UNIT_TYPES.index(UnitType(unit_config['unit_type'])),
+                                    CLANS.index(UnitClan(unit_config['clan'])),
+                                    unit_config['x'], unit_config['y'],
+                                    FACE_LETTERS.index(unit_config['face']),
+                                    unit_config['group'], len(name)))
+            parts.append(name)
+        parts.append(bytes(self.commands))
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Replay:
+        magic, version, flags, row_num, col_num, seed, count = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a replay file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported replay version {version}")
+
+        offset = _HEADER.size
+        layout = []
+        for _ in range(count):
+            unit_type, clan, x, y, face, group, name_length = _UNIT.unpack_from(data, offset)
+            offset += _UNIT.size
+            name = data[offset:offset + name_length].decode('utf-8')
+            offset += name_length
+            layout.append({
+                'unit_type': UNIT_TYPES[unit_type].value,
+                'clan': CLANS[clan].value,
+                'x': x,
+                'y': y,
+                'face': FACE_LETTERS[face],
+                'group': group,
+                'name': name,
+            })
+        return cls(row_num, col_num, seed, flags, layout, data[offset:])
+
+    def save(self, path: str) -> None:
+        with open(path, 'wb') as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> Replay:
+        with open(path, 'rb') as file:
+            return cls.from_bytes(file.read())
+
+
+def record(simulation: Simulation) -> Replay:
+    """
+    Start recording a simulation: everything loaded and commanded from now on
+    goes into the returned replay. The simulation must be seeded and not
+    have started yet.
+    """
+    if simulation.seed is None:
+        raise ValueError("Only seeded simulations can be recorded")
+    if simulation.counter or simulation.level_grid.units:
+        raise ValueError("Recording must start before the game does")
+    flags = 0
+    if simulation.level_grid.board is not None:
+        flags |= DENSE
+    if simulation.vectorized_combat:
+        flags |= VECTORIZED_COMBAT
+    if simulation.patrol:
+        flags |= PATROL
+    replay = Replay(simulation.level_grid.ROW_NUM, simulation.level_grid.COL_NUM, simulation.seed, flags)
+    simulation.recorder = replay
+    return replay
+
+
+class ReplayPlayer:
+    def __init__(self, replay: Replay, keyframe_interval: int = 500, events: EventLog | None = None) -> None:
+        """
+        Args:
+            replay: Game to play
+            keyframe_interval: Turns between keyframes
+            events: Log of the replayed game; defaults to one at OFF for speed
+        """
+        self.replay = replay
+        self.keyframe_interval = keyframe_interval
+        self.simulation = replay.new_simulation(events if events is not None else EventLog(OFF))
+        self.cursor = 0  # offset of the next command
+        # turn -> (cursor, simulation copy) right after the step that reached that turn
+        self.keyframes: dict[int, tuple[int, Simulation]] = {0: (0, copy.deepcopy(self.simulation))}
+
+    @property
+    def turn(self) -> int:
+        return self.simulation.counter
+
+    @property
+    def finished(self) -> bool:
+        return self.cursor >= len(self.replay.commands)
+
+    def step(self) -> bool:
+        """Apply the next command; False once there are none left"""
+        commands = self.replay.commands
+        if self.cursor >= len(commands):
+            return False
+        simulation = self.simulation
+        op = commands[self.cursor]
+        self.cursor += 1
+        if op == MOVE:
+            simulation.process_movement_requests()
+        elif op == ATTACK:
+            simulation.process_attacks()
+        elif op == MARCH:
+            simulation.toggle_selected_units_marching()
+        elif op == SELECT:
+            group_id, = _GROUP.unpack_from(commands, self.cursor)
+            self.cursor += _GROUP.size
+            simulation.select_units_by_group(group_id)
+        elif FACE <= op < FACE + len(FACE_KEYS):
+            simulation.update_selected_units_face(FACE_KEYS[op - FACE])
+        else:
+            raise ValueError(f"Unknown replay opcode {op} at offset {self.cursor - 1}")
+
+        if op in (MOVE, ATTACK) and simulation.counter % self.keyframe_interval == 0 \
+                and simulation.counter not in self.keyframes:
+            self.keyframes[simulation.counter] = (self.cursor, copy.deepcopy(simulation))
+        return True
+
+    def play(self) -> None:
+        """Play to the end of the replay"""
+        while self.step():
+            pass
+
+    def seek(self, turn: int) -> None:
+        """
+        Jump to right after the step that reached turn (or the end of the
+        replay if it is shorter), restoring the nearest keyframe at or before
+        it when that is closer than playing on from the current turn.
+        """
+        start = max(t for t in self.keyframes if t <= turn)
+        if turn < self.turn or start > self.turn:
+            cursor, simulation = self.keyframes[start]
+            self.cursor = cursor
+            # the keyframe itself stays untouched for later seeks
+            self.simulation = copy.deepcopy(simulation)
+        while self.turn < turn and self.step():
+            pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Play a replay file headless and report the result.")
+    parser.add_argument('path', help="Replay file")
+    parser.add_argument('--turn', type=int, default=None, help="Stop at this turn instead of the end")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.path)
+    player = ReplayPlayer(replay)
+    start = time.perf_counter()
+    if args.turn is None:
+        player.play()
+    else:
+        player.seek(args.turn)
+    elapsed = time.perf_counter() - start
+
+    print(f"turn {player.turn} reached in {elapsed:.2f} s")
+    print(player.simulation.level_grid.to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+"""
+Headless game engine.
+
+Simulation owns the rules state (level grid, enemies, turn counter and the
+current selection) and runs movement and combat turns without importing
+pygame, so it can be used from tests, worker processes and batch jobs.
+Rendering lives in game_state / renderer on top of this.
+"""
+import random
+
+from grid_position import GridPosition
+from level_grid import LevelGrid
+from Enemy import Enemy
+from Unit import Unit, UNIT_CLASSES
+from enums import UnitClan, UnitType
+from move_collision import resolve_movement_collision
+from events import INFO, EventKind, EventLog, active
+
+# Compass directions used by layouts
+DIRECTIONS = {
+    'N': GridPosition(0, 1),
+    'E': GridPosition(1, 0),
+    'S': GridPosition(0, -1),
+    'W': GridPosition(-1, 0),
+}
+
+# Starting layout of a new game; each entry has 'unit_type', 'clan', 'x', 'y',
+# 'face' (a DIRECTIONS key), 'group' and 'name'
+DEFAULT_LAYOUT = [
+    {'unit_type': 'Guardian', 'clan': 'Ally', 'x': 1, 'y': 1, 'face': 'N', 'group': 1, 'name': 'G'},
+    {'unit_type': 'Shield', 'clan': 'Ally', 'x': 2, 'y': 2, 'face': 'E', 'group': 2, 'name': 'S'},
+    {'unit_type': 'Captain', 'clan': 'Ally', 'x': 3, 'y': 3, 'face': 'E', 'group': 3, 'name': 'C'},
+    {'unit_type': 'Bow', 'clan': 'Ally', 'x': 4, 'y': 4, 'face': 'E', 'group': 4, 'name': 'B'},
+    {'unit_type': 'Warrior', 'clan': 'Ally', 'x': 5, 'y': 5, 'face': 'E', 'group': 5, 'name': 'W'},
+]
+
+
+def play_movement(level_grid: LevelGrid, events: EventLog | None = None,
+                  rng: random.Random | None = None) -> dict[GridPosition, Unit]:
+    """
+    Resolve the level grid's movement requests and move the units.
+
+    Returns:
+        Dict of destination to the unit that moved there
+    """
+    # Get movement requests
+    movement_requests = level_grid.movement_request
+    # Resolve movement collision
+    movement_requests_single = resolve_movement_collision(movement_requests, level_grid.units,
+                                                          level_grid.ROW_NUM, level_grid.COL_NUM, events, rng)
+
+    # Process each movement request
+    level_grid.move_all(movement_requests_single)
+
+    return movement_requests_single
+
+
+def play_attacks(level_grid: LevelGrid, ally_attack_grid: dict[GridPosition, int],
+                 enemy_attack_grid: dict[GridPosition, int], events: EventLog | None = None) -> dict[UnitClan, int]:
+    """
+    Apply the damage of both clans' attack result grids.
+
+    Returns:
+        Damage dealt by each clan; a hit counts for at most the health its target had left
+    """
+    damage_dealt = {UnitClan.Ally: 0, UnitClan.Enemy: 0}
+    log = active(events, INFO)
+
+    # Process ally attacks
+    for position, attack_count in ally_attack_grid.items():
+        if position in level_grid.units:
+            unit = level_grid.units[position]
+            if unit.unit_clan == UnitClan.Enemy:
+                # Apply damage based on attack count
+                damage_dealt[UnitClan.Ally] += min(attack_count, unit.health)
+                level_grid.attack(position, attack_count)
+                if log is not None:
+                    _log_damage(log, position, unit, attack_count)
+
+    # Process enemy attacks
+    for position, attack_count in enemy_attack_grid.items():
+        if position in level_grid.units:
+            unit = level_grid.units[position]
+            if unit.unit_clan == UnitClan.Ally:
+                # Apply damage based on attack count
+                damage_dealt[UnitClan.Enemy] += min(attack_count, unit.health)
+                level_grid.attack(position, attack_count)
+                if log is not None:
+                    _log_damage(log, position, unit, attack_count)
+
+    return damage_dealt
+
+
+def _log_damage(log: EventLog, position: GridPosition, unit: Unit, damage: int) -> None:
+    log.emit(EventKind.DamageApplied, position, unit.name, damage)
+    if unit.health <= 0:
+        log.emit(EventKind.UnitDied, position, unit.name)
+
+
+class Simulation:
+    level_grid: LevelGrid
+    enemies: Enemy
+    counter: int
+    selected_units: list[Unit]
+    events: EventLog
+    rng: random.Random
+
+    def __init__(self, row_num: int = 15, col_num: int = 15, dense: bool = False,
+                 vectorized_combat: bool = False, events: EventLog | None = None,
+                 seed: int | None = None, patrol: bool = False) -> None:
+        """
+        Args:
+            row_num: Number of rows in the grid
+            col_num: Number of columns in the grid
+            dense: Store the board in NumPy arrays (see dense_board.py)
+            vectorized_combat: Resolve attacks with combat.py instead of the LevelGrid result grids
+            events: Log receiving collision and combat events; defaults to an INFO-level EventLog
+            seed: Seed of this simulation's random generator; the same seed replays the same game
+            patrol: Advance enemy patrols (Enemy.update) every turn
+        """
+        self.level_grid = LevelGrid(row_num, col_num, dense)
+        self.counter = 0
+        self.selected_units = []
+        self.vectorized_combat = vectorized_combat
+        self.events = events if events is not None else EventLog()
+        self.seed = seed
+        # every random choice of the rules goes through this generator, never the global one
+        self.rng = random.Random(seed)
+        self.enemies = Enemy(self.level_grid, self.rng)
+        self.patrol = patrol
+        # receives every layout and command while a game is recorded (see replay.record)
+        self.recorder = None
+        # one snapshot per checkpoint(); see rollback()
+        self._checkpoints = []
+
+    def initialize_game(self, layout: list[dict] = DEFAULT_LAYOUT) -> None:
+        """Initialize the game state with units and their positions"""
+        self.load_layout(layout)
+
+        # Select group 1 initially
+        self.select_units_by_group(1)
+
+    def load_layout(self, layout: list[dict]) -> list[Unit]:
+        """Place the units described by a layout (see DEFAULT_LAYOUT) on the grid"""
+        if self.recorder is not None:
+            self.recorder.loaded(layout)
+        placed = []
+        for unit_config in layout:
+            unit_class = UNIT_CLASSES[UnitType(unit_config['unit_type'])]
+            clan = UnitClan(unit_config.get('clan', 'Ally'))
+            pos = GridPosition(unit_config['x'], unit_config['y'])
+            face = DIRECTIONS[unit_config.get('face', 'N')]
+
+            unit = unit_class(unit_config.get('name', unit_class.__name__[0]), clan, pos, face)
+            unit.set_group_id(unit_config.get('group', -1 if clan == UnitClan.Enemy else 1))
+            self.level_grid.move(unit, unit.loc)
+            if clan == UnitClan.Enemy:
+                self.enemies.add(unit)
+            placed.append(unit)
+        return placed
+
+    def select_units_by_group(self, group_id: int) -> list[Unit]:
+        """Select all units that belong to the specified group"""
+        if self.recorder is not None:
+            self.recorder.selected(group_id)
+        self.selected_units = [unit for unit in self.level_grid.units.values() if unit.group_id == group_id]
+        return self.selected_units
+
+    def update_selected_units_face(self, direction: str) -> None:
+        """Update the face direction of all selected units"""
+        if not self.selected_units:
+            return
+
+        # Update the face direction based on the input
+        if direction == 'W':  # North
+            new_face = GridPosition(0, 1)
+        elif direction == 'S':  # South
+            new_face = GridPosition(0, -1)
+        elif direction == 'A':  # West
+            new_face = GridPosition(-1, 0)
+        elif direction == 'D':  # East
+            new_face = GridPosition(1, 0)
+        else:
+            return
+
+        if self.recorder is not None:
+            self.recorder.faced(direction)
+        for unit in self.selected_units:
+            self.level_grid.set_face(unit, new_face)
+
+    def toggle_selected_units_marching(self) -> None:
+        """Toggle the marching state of all selected units"""
+        if self.recorder is not None:
+            self.recorder.toggled_marching()
+        for unit in self.selected_units:
+            self.level_grid.set_marching(unit, not unit.is_marching)
+
+    def process_movement_requests(self) -> None:
+        """Process movement requests from the level grid"""
+        if self.recorder is not None:
+            self.recorder.moved()
+        play_movement(self.level_grid, self.events, self.rng)
+        self._advance_counter()
+
+    def process_attacks(self) -> dict[UnitClan, int]:
+        """
+        Process attack requests from both ally and enemy units.
+
+        Returns:
+            Damage dealt by each clan this turn
+        """
+        if self.recorder is not None:
+            self.recorder.attacked()
+        level_grid = self.level_grid
+
+        # Get attack grids
+        if self.vectorized_combat:
+            # imported here so the default path does not pay for numpy
+            from combat import compute_attack_results
+            ally_attack_grid, enemy_attack_grid = compute_attack_results(level_grid)
+        else:
+            ally_attack_grid = level_grid.ally_attack_result_grid
+            enemy_attack_grid = level_grid.enemy_attack_result_grid
+
+        damage_dealt = play_attacks(level_grid, ally_attack_grid, enemy_attack_grid, self.events)
+        self._advance_counter()
+        return damage_dealt
+
+    def _advance_counter(self) -> None:
+        self.counter += 1
+        self.events.turn = self.counter
+        if self.patrol:
+            self.enemies.update()
+        if self.counter % 6 == 0:
+            self.enemies.remove_dead()
+            self.randomize_enemy_direction()
+            self.spawn_enemy()
+
+    def checkpoint(self) -> int:
+        """
+        Start recording changes and return a mark for rollback().
+
+        The board is journaled by the level grid (see LevelGrid.checkpoint);
+        the turn counter, selection, enemy manager and random generators are
+        snapshotted here, so rolling back across a spawn also drops the
+        spawned enemies. The event log is not rolled back.
+        """
+        self._checkpoints.append((self.level_grid.checkpoint(), self.counter, self.events.turn,
+                                  list(self.selected_units), self.enemies.state(), self.rng.getstate()))
+        return len(self._checkpoints) - 1
+
+    def rollback(self, mark: int) -> None:
+        """Undo everything done since checkpoint() returned mark; later marks are dropped"""
+        grid_mark, self.counter, self.events.turn, selected_units, enemies, rng_state = self._checkpoints[mark]
+        del self._checkpoints[mark + 1:]
+        self.level_grid.rollback(grid_mark)
+        self.selected_units = list(selected_units)
+        self.enemies.restore(enemies)
+        self.rng.setstate(rng_state)
+
+    def end_checkpoints(self) -> None:
+        """Stop recording; changes made so far can no longer be rolled back"""
+        self._checkpoints = []
+        self.level_grid.end_journal()
+
+    def spawn_enemy(self, count: int = 1, zone: str = 'bottom') -> list[Unit]:
+        """Spawn up to count enemies on a board edge; see Enemy.spawn_enemy"""
+        return self.enemies.spawn_enemy(count, zone)
+
+    def randomize_enemy_direction(self) -> None:
+        self.enemies.randomize_directions()
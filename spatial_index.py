@@ -0,0 +1,96 @@
+"""
+Spatial index of the units on a level grid.
+
+Units are kept per clan in two structures: the set of cells the clan
+occupies, for neighbour counts with one set lookup per surrounding cell, and
+a uniform grid of square buckets, so radius and rectangle queries only visit
+the buckets that overlap the query instead of every unit on the board.
+
+LevelGrid updates the index whenever a unit is placed or removed.
+"""
+from __future__ import annotations
+
+from enums import UnitClan
+from grid_position import GridPosition
+from Unit import Unit
+
+
+class SpatialIndex:
+    def __init__(self, bucket_size: int = 8) -> None:
+        """
+        Args:
+            bucket_size: Side of the square buckets, in cells
+        """
+        self.bucket_size = bucket_size
+        self.cells: dict[UnitClan, set[GridPosition]] = {clan: set() for clan in UnitClan}
+        self._buckets: dict[UnitClan, dict[tuple[int, int], dict[GridPosition, Unit]]] = {
+            clan: {} for clan in UnitClan}
+
+    def insert(self, unit: Unit, pos: GridPosition) -> None:
+        size = self.bucket_size
+        self.cells[unit.unit_clan].add(pos)
+        buckets = self._buckets[unit.unit_clan]
+        key = (pos[0] // size, pos[1] // size)
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = {}
+        bucket[pos] = unit
+
+    def remove(self, unit: Unit, pos: GridPosition) -> None:
+        size = self.bucket_size
+        self.cells[unit.unit_clan].discard(pos)
+        buckets = self._buckets[unit.unit_clan]
+        key = (pos[0] // size, pos[1] // size)
+        bucket = buckets[key]
+        del bucket[pos]
+        if not bucket:
+            del buckets[key]
+
+    def count_in(self, cells: list[GridPosition], clan: UnitClan) -> int:
+        """Number of the given cells occupied by units of a clan"""
+        occupied = self.cells[clan]
+        count = 0
+        for cell in cells:
+            if cell in occupied:
+                count += 1
+        return count
+
+    def in_rect(self, x0: int, y0: int, x1: int, y1: int, clan: UnitClan | None = None) -> list[Unit]:
+        """Units of a clan (or both clans if None) with x0 <= x <= x1 and y0 <= y <= y1"""
+        size = self.bucket_size
+        bx0, by0, bx1, by1 = x0 // size, y0 // size, x1 // size, y1 // size
+        span = (bx1 - bx0 + 1) * (by1 - by0 + 1)
+        found = []
+        for buckets in self._clan_buckets(clan):
+            # visit whichever is fewer: the buckets under the rectangle or the non-empty ones
+            if span <= len(buckets):
+                keys = [(bx, by) for bx in range(bx0, bx1 + 1) for by in range(by0, by1 + 1)]
+            else:
+                keys = [key for key in buckets if bx0 <= key[0] <= bx1 and by0 <= key[1] <= by1]
+            for bx, by in keys:
+                bucket = buckets.get((bx, by))
+                if bucket is None:
+                    continue
+                # buckets wholly inside the rectangle need no per-unit check
+                if bx * size >= x0 and (bx + 1) * size - 1 <= x1 and by * size >= y0 and (by + 1) * size - 1 <= y1:
+                    found.extend(bucket.values())
+                else:
+                    found.extend(unit for (x, y), unit in bucket.items()
+                                 if x0 <= x <= x1 and y0 <= y <= y1)
+        return found
+
+    def in_radius(self, center: GridPosition, radius: float, clan: UnitClan | None = None) -> list[Unit]:
+        """Units of a clan (or both clans if None) within Euclidean distance radius of center"""
+        cx, cy = center
+        reach = int(radius)
+        limit = radius * radius
+        return [unit for unit in self.in_rect(cx - reach, cy - reach, cx + reach, cy + reach, clan)
+                if (unit.loc[0] - cx) ** 2 + (unit.loc[1] - cy) ** 2 <= limit]
+
+    def _clan_buckets(self, clan: UnitClan | None) -> list[dict[tuple[int, int], dict[GridPosition, Unit]]]:
+        if clan is None:
+            return list(self._buckets.values())
+        return [self._buckets[clan]]
+
+    def __len__(self) -> int:
+        return sum(len(cells) for cells in self.cells.values())
@@ -0,0 +1,46 @@
+"""
+Unit tests for the batch_runner module.
+"""
+
+import unittest
+from batch_runner import play_game, run_batch
+from simulation import DEFAULT_LAYOUT
+
+
+class TestBatchRunner(unittest.TestCase):
+    def test_same_seed_same_outcome(self):
+        first = run_batch(DEFAULT_LAYOUT, "MA" * 20, range(3), workers=1)
+        second = run_batch(DEFAULT_LAYOUT, "MA" * 20, range(3), workers=1)
+        self.assertEqual(first['results'], second['results'])
+        self.assertEqual(first['games'], 3)
+        self.assertEqual([result['seed'] for result in first['results']], [0, 1, 2])
+
+    def test_wipe_stops_game(self):
+        # a lone enemy sword facing away is cut down by the ally warrior
+        layout = [
+            {'unit_type': 'Warrior', 'clan': 'Ally', 'x': 2, 'y': 2, 'face': 'N', 'group': 1},
+            {'unit_type': 'Sword', 'clan': 'Enemy', 'x': 2, 'y': 3, 'face': 'N'},
+        ]
+        result = play_game(layout, "A" * 10, seed=0, row_num=5, col_num=5)
+        self.assertEqual(result['turns_to_wipe'], {'Ally': None, 'Enemy': result['turns']})
+        self.assertEqual(result['survivors']['Enemy'], 0)
+        self.assertEqual(result['damage_dealt']['Ally'], 5)
+
+    def test_damage_dealt_excludes_overkill(self):
+        # three 2-damage spear hits on a 5-health sword only deal the 5 it had
+        layout = [
+            {'unit_type': 'Spear', 'clan': 'Ally', 'x': 2, 'y': 2, 'face': 'N', 'group': 1},
+            {'unit_type': 'Sword', 'clan': 'Enemy', 'x': 2, 'y': 3, 'face': 'N'},
+        ]
+        result = play_game(layout, "A" * 10, seed=0, row_num=5, col_num=5)
+        self.assertEqual(result['turns_to_wipe']['Enemy'], 3)
+        self.assertEqual(result['damage_dealt']['Ally'], 5)
+
+    def test_pool_matches_inline(self):
+        inline = run_batch(DEFAULT_LAYOUT, "MA" * 10, range(4), workers=1)
+        pooled = run_batch(DEFAULT_LAYOUT, "MA" * 10, range(4), workers=2)
+        self.assertEqual(inline['results'], pooled['results'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+Unit tests for the turn pipeline benchmark.
+"""
+
+import os
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_generated_boards_are_seeded(self):
+        def layout(seed):
+            simulation = benchmark.generate_board(20, 0.2, seed)
+            return sorted((pos, type(unit).__name__, unit.unit_clan.value, unit.face, unit.is_marching)
+                          for pos, unit in simulation.level_grid.units.items())
+
+        self.assertEqual(len(layout(1)), 80)
+        self.assertEqual(layout(1), layout(1))
+        self.assertNotEqual(layout(1), layout(2))
+
+    def test_seeded_turns_are_reproducible(self):
+        def final_hash(seed):
+            simulation = benchmark.generate_board(30, 0.3, seed)
+            benchmark.game_state.set_simulation(simulation)
+            timings = {stage: [] for stage in benchmark.STAGES}
+            for _ in range(10):
+                benchmark.run_turn(simulation, timings)
+            return simulation.level_grid.state_hash
+
+        self.assertEqual(final_hash(3), final_hash(3))
+
+    def test_bench_board_reports_every_stage(self):
+        result = benchmark.bench_board(15, 0.2, turns=3, seed=0)
+
+        self.assertEqual(set(result['stages']), set(benchmark.STAGES))
+        for stats in list(result['stages'].values()) + [result['turn']]:
+            self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+        self.assertGreater(result['peak_memory_bytes'], 0)
+
+
+    def test_bench_planner_reports_search_time(self):
+        result = benchmark.bench_planner(0, runs=1, time_budget=1.0)
+        self.assertGreater(result['depth_2_search']['mean_ms'], 0)
+        self.assertGreaterEqual(result['min_depth_in_budget'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
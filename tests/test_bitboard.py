@@ -0,0 +1,92 @@
+"""
+Unit tests for the bitboard module.
+"""
+
+import unittest
+from benchmark import generate_board
+from bitboard import Bitboards, bit_indices
+from enums import UnitClan
+from grid_position import GridPosition
+from level_grid import LevelGrid
+from Unit.SwordUnit import SwordUnit
+
+
+def cells(bitboards, chunk_bits):
+    return {cell for chunk, bits in chunk_bits.items() for cell in bitboards.cells(chunk, bits)}
+
+
+def on_board(cells, level_grid):
+    return {(x, y) for x, y in cells if 0 <= x < level_grid.COL_NUM and 0 <= y < level_grid.ROW_NUM}
+
+
+class TestBitboards(unittest.TestCase):
+    def assert_matches_board(self, level_grid):
+        bitboards = level_grid.bitboards
+        units = level_grid.units
+        for clan in UnitClan:
+            self.assertEqual(cells(bitboards, bitboards.occupied[clan]),
+                             {(pos.x, pos.y) for pos, unit in units.items() if unit.unit_clan == clan})
+            coverage = {chunk: bitboards.coverage(clan, chunk) for chunk in bitboards.coverage_chunks(clan)}
+            attack_grid = level_grid.ally_attack_grid if clan == UnitClan.Ally else level_grid.enemy_attack_grid
+            self.assertEqual(cells(bitboards, coverage), on_board(attack_grid, level_grid))
+        self.assertEqual(cells(bitboards, bitboards.marching),
+                         {(pos.x, pos.y) for pos, unit in units.items() if unit.is_marching})
+        self.assertEqual(level_grid.active_chunks, {(pos.x // 64, pos.y // 64) for pos in units})
+
+    def test_bitboards_follow_turns_and_rollback(self):
+        # several chunks with partial ones on the right and top edges
+        simulation = generate_board(150, 0.1, seed=2)
+        level_grid = simulation.level_grid
+        self.assert_matches_board(level_grid)
+
+        mark = level_grid.checkpoint()
+        for turn in range(6):
+            simulation.process_movement_requests()
+            simulation.process_attacks()
+            unit = list(level_grid.units.values())[turn]
+            level_grid.set_marching(unit, not unit.is_marching)
+            self.assert_matches_board(level_grid)
+
+        level_grid.rollback(mark)
+        level_grid.end_journal()
+        self.assert_matches_board(level_grid)
+
+    def test_shift_drops_cells_leaving_the_chunk(self):
+        bitboards = Bitboards(10, 10, chunk_size=4)
+        chunk, first = bitboards.locate(GridPosition(4, 4))
+        corners = first | bitboards.locate(GridPosition(7, 6))[1]
+        self.assertEqual(chunk, (1, 1))
+        self.assertEqual(bitboards.cells(chunk, bitboards.shift(corners, 1, 0)), [(5, 4)])
+        self.assertEqual(bitboards.cells(chunk, bitboards.shift(corners, -1, 0)), [(6, 6)])
+        self.assertEqual(bitboards.cells(chunk, bitboards.shift(corners, 0, 1)), [(4, 5), (7, 7)])
+        self.assertEqual(bitboards.cells(chunk, bitboards.shift(corners, -3, -2)), [(4, 4)])
+        self.assertEqual(bitboards.shift(corners, 4, 0), 0)
+        self.assertEqual(bitboards.locate(GridPosition(10, 0)), (None, 0))
+        # the top right chunk only has 2 x 2 cells on the board
+        self.assertEqual(bitboards.cells((2, 2), bitboards.board_mask((2, 2))), [(8, 8), (9, 8), (8, 9), (9, 9)])
+
+    def test_rect_mask_clips_to_the_chunk(self):
+        bitboards = Bitboards(10, 10, chunk_size=4)
+        self.assertEqual(bitboards.cells((1, 1), bitboards.rect_mask((1, 1), 2, 6, 5, 9)),
+                         [(4, 6), (5, 6), (4, 7), (5, 7)])
+        self.assertEqual(bitboards.rect_mask((0, 0), 5, 5, 9, 9), 0)
+        self.assertEqual(bitboards.rect_mask((0, 0), 0, 0, 9, 9), bitboards.full)
+
+    def test_coverage_crosses_chunk_borders(self):
+        level_grid = LevelGrid(10, 10)
+        level_grid.bitboards = Bitboards(10, 10, chunk_size=4)
+        unit = SwordUnit("S", UnitClan.Ally, GridPosition(3, 3), GridPosition(1, 0))
+        level_grid.move(unit, unit.loc)
+        bitboards = level_grid.bitboards
+        coverage = {chunk: bitboards.coverage(UnitClan.Ally, chunk) for chunk in bitboards.coverage_chunks(UnitClan.Ally)}
+        self.assertEqual(cells(bitboards, coverage), on_board(level_grid.ally_attack_grid, level_grid))
+        self.assertEqual({chunk for chunk, bits in coverage.items() if bits}, {(0, 0), (1, 0), (0, 1)})
+
+    def test_bit_indices(self):
+        self.assertEqual(bit_indices(0), [])
+        self.assertEqual(bit_indices(0b101001), [0, 3, 5])
+        self.assertEqual(bit_indices(1 << 500), [500])
+
+
+if __name__ == '__main__':
+    unittest.main()
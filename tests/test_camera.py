@@ -0,0 +1,54 @@
+"""
+Unit tests for the camera module.
+"""
+
+import unittest
+
+from camera import Camera
+
+
+class TestCamera(unittest.TestCase):
+    def test_small_board_is_wholly_visible(self):
+        camera = Camera(15, 15, 600, 600, 40)
+        self.assertEqual(camera.visible(), (0, 0, 15, 15))
+        self.assertTrue(camera.covers_board())
+        camera.pan(3, 3)
+        self.assertEqual(camera.view, (0, 0, 40))
+
+    def test_pan_stops_at_board_edges(self):
+        camera = Camera(100, 200, 1200, 800, 40)
+        self.assertEqual(camera.visible(), (0, 0, 20, 30))
+        camera.pan(5, 10)
+        self.assertEqual(camera.visible(), (5, 10, 25, 40))
+        self.assertTrue(camera.contains(5, 39))
+        self.assertFalse(camera.contains(4, 39))
+        self.assertEqual(camera.screen_cell(6, 12), (1, 2))
+
+        camera.pan(1000, 1000)
+        self.assertEqual(camera.visible(), (80, 170, 100, 200))
+        camera.pan(-1000, -1000)
+        self.assertEqual(camera.visible(), (0, 0, 20, 30))
+
+    def test_zoom_keeps_center_and_limits(self):
+        camera = Camera(1000, 1000, 1200, 800, 40)
+        camera.center_on(500, 500)
+        camera.zoom(0.5)
+        self.assertEqual(camera.cell_size, 20)
+        row0, col0, row1, col1 = camera.visible()
+        self.assertEqual(((row0 + row1) // 2, (col0 + col1) // 2), (500, 500))
+        self.assertEqual(camera.text_size(24), 12)
+
+        camera.zoom(0.01)
+        self.assertEqual(camera.cell_size, camera.min_cell_size)
+        camera.zoom(100)
+        self.assertEqual(camera.cell_size, camera.max_cell_size)
+
+    def test_partly_visible_cells_are_included(self):
+        camera = Camera(100, 100, 1000, 700, 30)
+        self.assertEqual((camera.view_rows, camera.view_cols), (24, 34))
+        camera.pan(1000, 1000)
+        self.assertEqual(camera.visible(), (77, 67, 100, 100))
+
+
+if __name__ == '__main__':
+    unittest.main()
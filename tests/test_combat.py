@@ -0,0 +1,61 @@
+"""
+Unit tests for the combat module.
+"""
+
+import random
+import unittest
+from grid_position import GridPosition
+from Unit.BowUnit import BowUnit
+from Unit.CaptainUnit import CaptainUnit
+from Unit.GuardianUnit import GuardianUnit
+from Unit.ShieldUnit import ShieldUnit
+from Unit.SwordUnit import SwordUnit
+from Unit.WarriorUnit import WarriorUnit
+from Unit import SpearUnit
+from enums import UnitClan
+from level_grid import LevelGrid
+from combat import compute_attack_results
+
+UNIT_CLASSES = [BowUnit, CaptainUnit, GuardianUnit, ShieldUnit, SwordUnit, WarriorUnit, SpearUnit]
+FACES = [GridPosition(0, 1), GridPosition(1, 0), GridPosition(0, -1), GridPosition(-1, 0)]
+
+
+def random_grid(seed: int, dense: bool) -> LevelGrid:
+    rng = random.Random(seed)
+    level_grid = LevelGrid(row_num=8, col_num=8, dense=dense)
+    for i in range(30):
+        unit_class = rng.choice(UNIT_CLASSES)
+        unit = unit_class(f"u{i}", rng.choice([UnitClan.Ally, UnitClan.Enemy]),
+                          GridPosition(rng.randrange(8), rng.randrange(8)), rng.choice(FACES))
+        if unit.loc not in level_grid.units:
+            level_grid.move(unit, unit.loc)
+    return level_grid
+
+
+class TestCombat(unittest.TestCase):
+    def test_matches_result_grids(self):
+        for dense in [False, True]:
+            for seed in range(20):
+                level_grid = random_grid(seed, dense)
+                ally_result, enemy_result = compute_attack_results(level_grid)
+                self.assertEqual(ally_result, level_grid.ally_attack_result_grid)
+                self.assertEqual(enemy_result, level_grid.enemy_attack_result_grid)
+
+    def test_coop_and_defense(self):
+        level_grid = LevelGrid(row_num=5, col_num=5)
+        target = SwordUnit("T", UnitClan.Enemy, GridPosition(2, 2), GridPosition(0, -1))
+        shield = ShieldUnit("S", UnitClan.Enemy, GridPosition(2, 3), GridPosition(0, 1))
+        attacker1 = SwordUnit("A1", UnitClan.Ally, GridPosition(2, 1), GridPosition(0, 1))
+        attacker2 = SwordUnit("A2", UnitClan.Ally, GridPosition(1, 2), GridPosition(1, 0))
+        attacker3 = SwordUnit("A3", UnitClan.Ally, GridPosition(3, 2), GridPosition(-1, 0))
+        for unit in [target, shield, attacker1, attacker2, attacker3]:
+            level_grid.move(unit, unit.loc)
+
+        ally_result, _ = compute_attack_results(level_grid)
+        # 3 damage, 2 guardian defense from the shield behind, +2 coop for 3 surrounding allies
+        self.assertEqual(ally_result[target.loc], 3)
+        self.assertEqual(ally_result, level_grid.ally_attack_result_grid)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Unit tests for the Enemy manager.
+"""
+
+import random
+import unittest
+from Enemy import Enemy, FACE_LETTERS
+from enums import UnitClan
+from level_grid import LevelGrid
+from simulation import Simulation
+
+
+class TestEnemy(unittest.TestCase):
+    def test_patrol_turns_around_at_threshold(self):
+        level_grid = LevelGrid(row_num=10, col_num=10)
+        enemies = Enemy(level_grid, random.Random(0))
+        [unit] = enemies.spawn_enemy_preset([{'unit_type': 'Sword', 'x': 5, 'y': 5, 'face': 'N'}])
+        threshold = int(enemies.threshold[0])
+        self.assertTrue(3 <= threshold <= 7)
+
+        for _ in range(threshold):
+            enemies.update_patrol()
+            self.assertEqual(unit.face, FACE_LETTERS['N'])
+        enemies.update_patrol()
+        self.assertEqual(unit.face, FACE_LETTERS['S'])
+        self.assertEqual(enemies.counter[0], 1)
+
+    def test_turns_follow_faces_set_elsewhere(self):
+        level_grid = LevelGrid(row_num=40, col_num=40)
+        enemies = Enemy(level_grid, random.Random(1), capacity=4)
+        enemies.spawn_enemy_preset([{'x': x, 'y': y, 'face': 'NESW'[(x + y) % 4]}
+                                    for x in range(0, 40, 4) for y in range(0, 40, 4)])
+        self.assertEqual(len(enemies), 100)
+
+        for turn in range(20):
+            enemies.update()
+            # faces set through the level grid, e.g. by the player or a rollback
+            mark = level_grid.checkpoint()
+            for unit in enemies:
+                level_grid.set_face(unit, FACE_LETTERS['E'])
+            if turn % 2:
+                level_grid.rollback(mark)
+            level_grid.end_journal()
+            expected = enemies.np_rng.bit_generator.state
+            enemies.randomize_directions()
+            enemies.np_rng.bit_generator.state = expected
+            codes = enemies.np_rng.integers(0, 4, len(enemies), dtype='int8')
+            for unit, code in zip(enemies, codes):
+                self.assertEqual(unit.face, list(FACE_LETTERS.values())[code])
+                self.assertEqual(level_grid.units[unit.loc], unit)
+
+    def test_patrol_reverses_the_current_face(self):
+        level_grid = LevelGrid(row_num=10, col_num=10)
+        enemies = Enemy(level_grid, random.Random(0))
+        [unit] = enemies.spawn_enemy_preset([{'x': 5, 'y': 5, 'face': 'N'}])
+        level_grid.set_face(unit, FACE_LETTERS['E'])
+        for _ in range(int(enemies.threshold[0]) + 1):
+            enemies.update_patrol()
+        self.assertEqual(unit.face, FACE_LETTERS['W'])
+
+    def test_remove_dead_compacts_state(self):
+        level_grid = LevelGrid(row_num=5, col_num=5)
+        enemies = Enemy(level_grid, random.Random(2))
+        units = enemies.spawn_enemy(count=5)
+        thresholds = {unit.name: int(threshold) for unit, threshold in zip(units, enemies.threshold)}
+
+        for unit in units[::2]:
+            level_grid.attack(unit.loc, unit.health)
+        self.assertEqual(enemies.remove_dead(), 3)
+        self.assertEqual(list(enemies), units[1::2])
+        self.assertEqual([int(threshold) for threshold in enemies.threshold[:2]],
+                         [thresholds[unit.name] for unit in units[1::2]])
+        self.assertEqual(enemies.get_all_units(), {unit.loc: unit for unit in units[1::2]})
+
+    def test_patrolling_simulation_is_reproducible(self):
+        def play(seed):
+            simulation = Simulation(15, 15, seed=seed, patrol=True)
+            simulation.initialize_game()
+            simulation.spawn_enemy(count=10, zone='top')
+            for _ in range(12):
+                simulation.process_movement_requests()
+                simulation.process_attacks()
+            return sorted((pos, unit.name, unit.face, unit.is_marching)
+                          for pos, unit in simulation.level_grid.units.items()
+                          if unit.unit_clan == UnitClan.Enemy)
+
+        self.assertEqual(play(3), play(3))
+
+
+if __name__ == '__main__':
+    unittest.main()
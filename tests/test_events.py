@@ -0,0 +1,41 @@
+"""
+Unit tests for the events module.
+"""
+
+import unittest
+from events import DEBUG, INFO, OFF, Event, EventKind, EventLog
+from grid_position import GridPosition
+
+
+class TestEventLog(unittest.TestCase):
+    def test_levels_filter_kinds(self):
+        log = EventLog(INFO)
+        log.emit(EventKind.TieBroken, GridPosition(1, 1), "a", 2)
+        log.emit(EventKind.DamageApplied, GridPosition(1, 1), "a", 3)
+        self.assertEqual([event.kind for event in log], [EventKind.DamageApplied])
+        self.assertTrue(log.enabled(INFO))
+        self.assertFalse(log.enabled(DEBUG))
+
+        log = EventLog(OFF)
+        log.emit(EventKind.UnitDied, GridPosition(1, 1), "a")
+        self.assertEqual(len(log), 0)
+
+    def test_ring_buffer_keeps_latest(self):
+        log = EventLog(DEBUG, capacity=3)
+        for damage in range(5):
+            log.emit(EventKind.DamageApplied, GridPosition(0, 0), "a", damage)
+        self.assertEqual([event.value for event in log], [2, 3, 4])
+
+        self.assertEqual(len(log.drain()), 3)
+        self.assertEqual(len(log), 0)
+
+    def test_sinks_receive_records(self):
+        received = []
+        log = EventLog(sinks=[received.append])
+        log.turn = 7
+        log.emit(EventKind.UnitDied, GridPosition(2, 3), "S")
+        self.assertEqual(received, [Event(7, EventKind.UnitDied, GridPosition(2, 3), "S", None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
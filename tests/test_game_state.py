@@ -0,0 +1,253 @@
+"""
+Unit tests for the game_state painting and rendering layer.
+"""
+
+import os
+import random
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+
+import game_state
+import renderer
+from enums import UnitClan
+from grid_position import GridPosition
+from simulation import Simulation
+
+
+def random_layout(rows: int, cols: int, count: int, seed: int) -> list[dict]:
+    """count units of random type, clan and face on distinct cells"""
+    rng = random.Random(seed)
+    cells = rng.sample([(x, y) for x in range(cols) for y in range(rows)], count)
+    return [{'unit_type': rng.choice(['Sword', 'Spear', 'Bow', 'Captain', 'Shield', 'Warrior', 'Guardian']),
+             'clan': rng.choice(['Ally', 'Enemy']), 'x': x, 'y': y, 'face': rng.choice('NESW')}
+            for x, y in cells]
+
+
+class TestGameState(unittest.TestCase):
+    def setUp(self):
+        # fresh engine and painted board for every test
+        game_state.set_simulation(Simulation(15, 15))
+        game_state.initialize_game()
+        game_state.paint_board()
+        game_state.dirty_cells.clear()
+
+    def test_unchanged_board_has_no_dirty_cells(self):
+        game_state.paint_board()
+        self.assertEqual(game_state.dirty_cells, set())
+
+    def test_face_change_marks_only_changed_cells(self):
+        game_state.select_units_by_group(3)
+        game_state.dirty_cells.clear()
+        game_state.update_selected_units_face('W')
+        game_state.paint_board()
+
+        # the captain at (3, 3) now attacks (3, 4) instead of (4, 3)
+        captain_cell = GridPosition(3, 4).to_python(game_state.GRID_M)
+        old_cell = GridPosition(4, 3).to_python(game_state.GRID_M)
+        self.assertIn(captain_cell, game_state.dirty_cells)
+        self.assertIn(old_cell, game_state.dirty_cells)
+        self.assertLess(len(game_state.dirty_cells), 10)
+
+    def test_incremental_frames_match_full_redraw(self):
+        import pygame
+        game_state.draw_grid()
+        for direction in ['W', 'A', 'S', 'D']:
+            game_state.update_selected_units_face(direction)
+            game_state.process_movement_requests()
+            game_state.paint_board()
+            game_state.draw_grid()
+        incremental = pygame.surfarray.array3d(renderer.get_screen(game_state.WINDOW_WIDTH,
+                                                                   game_state.WINDOW_HEIGHT)).copy()
+
+        renderer.draw_grid(game_state.grid_colors, game_state.grid_texts, game_state.grid_text_sizes,
+                           game_state.CELL_SIZE, view_colors=game_state.view_colors)
+        full = pygame.surfarray.array3d(renderer.get_screen(game_state.WINDOW_WIDTH, game_state.WINDOW_HEIGHT))
+        self.assertTrue((incremental == full).all())
+        self.assertEqual(game_state.draw_grid(), [])
+
+    def test_paint_cell_blends_with_composited_view(self):
+        row, col = GridPosition(3, 3).to_python(game_state.GRID_M)
+        before = game_state.cell_color(row, col)
+        new_color = random.Random(1).choice(game_state.AVAILABLE_COLORS)
+        game_state.paint_cell(GridPosition(3, 3), random.Random(1))
+        self.assertEqual(game_state.cell_color(row, col), game_state.combine_colors(new_color, before, 0.5))
+        self.assertEqual(game_state.dirty_cells, {(row, col)})
+        self.assertEqual(game_state.grid_colors.get(row, col), game_state.GameColor.WHITE.value)
+
+    def test_attack_paint_matches_per_cell_paint(self):
+        game_state.simulation.spawn_enemy(count=5, zone='top')
+        for _ in range(4):
+            game_state.process_movement_requests()
+        level_grid = game_state.level_grid
+        bitboards = level_grid.bitboards
+        light_blue, orange = game_state.GameColor.LIGHT_BLUE.value, game_state.GameColor.ORANGE.value
+
+        def paint(first, second, painter):
+            game_state.grid_colors.detach()
+            painter(first, light_blue, True)
+            painter(second, orange, False)
+            return [[game_state.grid_colors.get(i, j) for j in range(game_state.GRID_N)]
+                    for i in range(game_state.GRID_M)]
+
+        def empty_covered(clan):
+            return [cell for chunk in bitboards.coverage_chunks(clan)
+                    for cell in bitboards.cells(chunk, bitboards.coverage(clan, chunk) & ~bitboards.occupied_any(chunk))]
+
+        # cell by cell from the attack grids, and from the bitboards
+        per_cell = paint(level_grid.ally_attack_grid, level_grid.enemy_attack_grid, game_state._paint_range)
+        bitwise = paint(empty_covered(UnitClan.Ally), empty_covered(UnitClan.Enemy), game_state._paint_cells)
+        self.assertEqual(bitwise, per_cell)
+        self.assertIn(orange, [color for row in per_cell for color in row])
+
+    def test_large_board_stores_only_painted_chunks(self):
+        simulation = Simulation(2000, 2000, seed=1)
+        game_state.set_simulation(simulation)
+        simulation.load_layout([
+            {'unit_type': 'Sword', 'clan': 'Ally', 'x': 10, 'y': 10, 'group': 1},
+            {'unit_type': 'Sword', 'clan': 'Enemy', 'x': 1500, 'y': 1800, 'face': 'S'},
+        ])
+        game_state.select_units_by_group(1)
+        game_state.camera.center_on(2000 - 10 - 1, 10)
+        game_state.paint_board()
+        self.assertLessEqual(len(game_state.grid_colors.chunks), 2)
+        self.assertEqual(game_state.grid_texts.get(2000 - 10 - 1, 10), "S: 5")
+        self.assertEqual(game_state.grid_text_sizes.get(2000 - 10 - 1, 10), 36)
+        # the enemy is out of view
+        self.assertEqual(game_state.grid_texts.get(2000 - 1800 - 1, 1500), '')
+
+        game_state.dirty_cells.clear()
+        game_state.paint_board()
+        self.assertEqual(game_state.dirty_cells, set())
+
+    def test_view_paint_matches_whole_board_paint(self):
+        simulation = Simulation(100, 100, seed=3)
+        game_state.set_simulation(simulation)
+        simulation.load_layout(random_layout(100, 100, 600, seed=3))
+        rows, cols = game_state.GRID_M, game_state.GRID_N
+
+        def painted(i0, j0, i1, j1):
+            return [[(game_state.cell_color(i, j), game_state.grid_texts.get(i, j)) for j in range(j0, j1)]
+                    for i in range(i0, i1)]
+
+        # zoomed out far enough to see the whole board
+        game_state.camera.zoom(0.2)
+        self.assertTrue(game_state.camera.covers_board())
+        game_state.paint_board()
+        whole = painted(0, 0, rows, cols)
+
+        game_state.camera.zoom(5)
+        game_state.camera.center_on(50, 50)
+        game_state.paint_board()
+        i0, j0, i1, j1 = game_state.camera.visible()
+        self.assertEqual(painted(i0, j0, i1, j1), [row[j0:j1] for row in whole[i0:i1]])
+        # nothing outside the view was painted
+        self.assertEqual(game_state.cell_color(0, 0), game_state.GameColor.WHITE.value)
+        self.assertEqual(len(list(game_state.grid_texts.cells_not(''))), len(game_state.level_grid.units_in_rect(
+            j0, rows - i1, j1 - 1, rows - i0 - 1)))
+
+    def test_composited_colors_match_per_cell_paint(self):
+        for dense in (False, True):
+            simulation = Simulation(100, 100, dense=dense, seed=4)
+            game_state.set_simulation(simulation)
+            units = simulation.load_layout(random_layout(100, 100, 1500, seed=4))
+            for unit in units[::3]:
+                game_state.level_grid.set_marching(unit, False)
+            camera = game_state.camera
+
+            for zoom, center in ((1, (50, 50)), (0.2, (50, 50)), (0.6, (97, 3))):
+                camera.zoom(zoom)
+                camera.center_on(*center)
+                game_state.paint_board()
+                self.assertEqual(game_state.view_colors_rect, camera.visible())
+                composited = [list(map(tuple, row)) for row in game_state.view_colors.tolist()]
+                game_state.paint_board(vectorized=False)
+                self.assertIsNone(game_state.view_colors)
+                self.assertEqual(composited, game_state.grid_colors.get_block(*camera.visible()))
+
+        rng = random.Random(4)
+        colors = [tuple(rng.randrange(256) for _ in range(3)) for _ in range(200)]
+        blended = game_state.combine_color_arrays(colors[0], np.array(colors, dtype=np.uint8), 0.7)
+        self.assertEqual([tuple(color) for color in blended.tolist()],
+                         [game_state.combine_colors(colors[0], color, 0.7) for color in colors])
+
+    def test_array_redraw_matches_per_cell_draw(self):
+        import pygame
+        simulation = Simulation(100, 100, seed=5)
+        game_state.set_simulation(simulation)
+        simulation.load_layout(random_layout(100, 100, 800, seed=5))
+        camera = game_state.camera
+        for zoom in (0.8, 0.3):
+            # cell sizes that leave a partly visible last row and column
+            camera.zoom(zoom)
+            game_state.paint_board()
+            layers = (game_state.grid_colors, game_state.grid_texts, game_state.grid_text_sizes, camera.cell_size)
+            renderer.draw_grid(*layers, None, camera, game_state.view_colors)
+            screen = renderer.get_screen(camera.width, camera.height)
+            blitted = pygame.surfarray.array3d(screen).copy()
+
+            row0, col0, row1, col1 = camera.visible()
+            cells = {(i, j) for i in range(row0, row1) for j in range(col0, col1)}
+            renderer.draw_grid(*layers, cells, camera, game_state.view_colors)
+            self.assertTrue((pygame.surfarray.array3d(screen) == blitted).all())
+            # and the same pixels from the per-cell paint
+            game_state.paint_board(vectorized=False)
+            renderer.draw_grid(*layers, cells, camera)
+            self.assertTrue((pygame.surfarray.array3d(screen) == blitted).all())
+
+    def test_view_is_drawn_with_minimap(self):
+        import pygame
+        simulation = Simulation(300, 300, seed=2)
+        game_state.set_simulation(simulation)
+        simulation.load_layout([dict(unit, clan='Ally') for unit in random_layout(300, 300, 50, seed=2)])
+        game_state.paint_board()
+        rects = game_state.draw_grid()
+        screen = renderer.get_screen(game_state.WINDOW_WIDTH, game_state.WINDOW_HEIGHT)
+        self.assertEqual(screen.get_size(), (game_state.MAX_WINDOW_WIDTH, game_state.MAX_WINDOW_HEIGHT))
+        self.assertEqual(len(rects), 2)
+
+        minimap = game_state.minimap_colors()
+        self.assertEqual(minimap.shape, (game_state.MINIMAP_SIZE, game_state.MINIMAP_SIZE, 3))
+        blue = game_state.UNIT_COLORS[UnitClan.Ally, True]
+        for unit in game_state.level_grid.units.values():
+            i, j = unit.loc.to_python(game_state.GRID_M)
+            self.assertEqual(tuple(minimap[j * 160 // 300, i * 160 // 300]), blue)
+        self.assertEqual(int((minimap != 255).any(axis=2).sum()), 50)
+        # the array is blitted into the bottom-right corner as is, apart from the view outline at the top-left
+        pixels = pygame.surfarray.array3d(screen)
+        x, y = rects[1].x + 1, rects[1].y + 1
+        self.assertTrue((pixels[x + 20:x + 160, y + 20:y + 160] == minimap[20:, 20:]).all())
+
+        # panning redraws the whole view; nothing has changed afterwards
+        game_state.pan_camera(10, 10)
+        self.assertEqual(game_state.draw_grid()[0], screen.get_rect())
+        self.assertEqual(game_state.draw_grid(), [])
+
+    def test_text_cache_reuses_surfaces(self):
+        cache = renderer.TextCache(maxsize=2)
+        first = cache.render("G: 5", 24, (0, 0, 0))
+        self.assertIs(cache.render("G: 5", 24, (0, 0, 0)), first)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        cache.render("G: 5", 48, (0, 0, 0))
+        cache.render("S: 5", 24, (0, 0, 0))
+        # least recently used entry was evicted
+        self.assertEqual(len(cache), 2)
+        self.assertIsNot(cache.render("G: 5", 24, (0, 0, 0)), first)
+        self.assertEqual(cache.misses, 4)
+
+    def test_steady_state_frames_do_not_rasterise(self):
+        renderer.text_cache.clear()
+        renderer.draw_grid(game_state.grid_colors, game_state.grid_texts, game_state.grid_text_sizes,
+                           game_state.CELL_SIZE)
+        misses = renderer.text_cache.misses
+        renderer.draw_grid(game_state.grid_colors, game_state.grid_texts, game_state.grid_text_sizes,
+                           game_state.CELL_SIZE)
+        self.assertEqual(renderer.text_cache.misses, misses)
+        self.assertGreater(renderer.text_cache.hits, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
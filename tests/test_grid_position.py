@@ -1,5 +1,7 @@
+import copy
+import pickle
 import unittest
-from grid_position import GridPosition
+from grid_position import GridPosition, PositionTable
 
 class TestGridPosition(unittest.TestCase):
     def test_creation(self):
@@ -87,5 +89,27 @@ class TestGridPosition(unittest.TestCase):
         python_top_right = top_right.to_python(max_row)
         self.assertEqual(python_top_right, (1, 4))  # Should be top row
 
+    def test_immutable_and_hashable(self):
+        """Positions are immutable values usable as dict keys"""
+        pos = GridPosition(3, 4)
+        with self.assertRaises(AttributeError):
+            pos.x = 5
+        self.assertEqual({pos: 1}[GridPosition(3, 4)], 1)
+        self.assertEqual(repr(pos), "GridPosition(3, 4)")
+        self.assertEqual(pickle.loads(pickle.dumps(pos)), pos)
+        self.assertIsInstance(copy.copy(pos), GridPosition)
+
+    def test_position_table_interns_cells(self):
+        """In-bounds cells have exactly one object per table"""
+        table = PositionTable(row_num=4, col_num=5)
+        self.assertIs(table.get(2, 3), table.intern(GridPosition(2, 3)))
+        self.assertEqual(table.get(7, 1), GridPosition(7, 1))
+
+        corner = table.neighbours(GridPosition(0, 0))
+        self.assertEqual(sorted(corner), [GridPosition(0, 1), GridPosition(1, 0), GridPosition(1, 1)])
+        self.assertIs(corner[0], table.intern(corner[0]))
+        self.assertEqual(len(table.neighbours(GridPosition(2, 2))), 8)
+
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,272 @@
+"""
+Unit tests for the level_grid module.
+"""
+
+import random
+import unittest
+from collections import defaultdict
+from grid_position import GridPosition
+from Unit.Unit import Unit
+from Unit.GuardianUnit import GuardianUnit
+from Unit.ShieldUnit import ShieldUnit
+from Unit.WarriorUnit import WarriorUnit
+from enums import UnitClan
+from level_grid import LevelGrid, _state_key, zobrist_key
+from simulation import Simulation
+
+
+def rebuild_grids(level_grid: LevelGrid) -> tuple[dict, dict, dict, dict]:
+    """Recompute the attack/defense grids from scratch for comparison"""
+    ally_attack, enemy_attack = defaultdict(int), defaultdict(int)
+    ally_defense, enemy_defense = defaultdict(int), defaultdict(int)
+    for unit in level_grid.units.values():
+        if unit.unit_clan == UnitClan.Ally or unit.friendly_fire:
+            for pos in unit.attack_range:
+                ally_attack[pos] += unit.attack
+        if unit.unit_clan == UnitClan.Enemy or unit.friendly_fire:
+            for pos in unit.attack_range:
+                enemy_attack[pos] += unit.attack
+        defense = ally_defense if unit.unit_clan == UnitClan.Ally else enemy_defense
+        for pos in unit.defense_range:
+            defense[pos] += unit.guardian_defense
+        if unit.self_defense > 0:
+            defense[unit.loc] += unit.self_defense
+    return dict(ally_attack), dict(enemy_attack), dict(ally_defense), dict(enemy_defense)
+
+
+class TestLevelGrid(unittest.TestCase):
+    def assertGridsConsistent(self, level_grid: LevelGrid):
+        ally_attack, enemy_attack, ally_defense, enemy_defense = rebuild_grids(level_grid)
+        self.assertEqual(level_grid.ally_attack_grid, ally_attack)
+        self.assertEqual(level_grid.enemy_attack_grid, enemy_attack)
+        self.assertEqual(level_grid.ally_defense_grid, ally_defense)
+        self.assertEqual(level_grid.enemy_defense_grid, enemy_defense)
+
+    def test_grids_follow_move_face_and_death(self):
+        level_grid = LevelGrid(row_num=6, col_num=6)
+        guardian = GuardianUnit("G", UnitClan.Ally, GridPosition(1, 1), GridPosition(0, 1))
+        shield = ShieldUnit("S", UnitClan.Ally, GridPosition(2, 1), GridPosition(0, 1))
+        warrior = WarriorUnit("W", UnitClan.Enemy, GridPosition(2, 3), GridPosition(0, -1))
+        sword = Unit("U", UnitClan.Enemy, GridPosition(1, 3), GridPosition(0, -1))
+        for unit in [guardian, shield, warrior, sword]:
+            level_grid.move(unit, unit.loc)
+        self.assertGridsConsistent(level_grid)
+
+        level_grid.move(warrior, GridPosition(3, 3))
+        self.assertGridsConsistent(level_grid)
+
+        level_grid.set_face(guardian, GridPosition(1, 0))
+        level_grid.set_face(warrior, GridPosition(-1, 0))
+        self.assertGridsConsistent(level_grid)
+
+        level_grid.attack(sword.loc, 10)
+        self.assertNotIn(sword.loc, level_grid.units)
+        self.assertGridsConsistent(level_grid)
+
+    def test_zero_amount_cells_are_kept(self):
+        """A covered cell stays in the grid even when its summed amount is 0"""
+        level_grid = LevelGrid(row_num=5, col_num=5)
+        unit = Unit("U", UnitClan.Ally, GridPosition(2, 2), GridPosition(0, 1))
+        unit.attack = 0
+        level_grid.move(unit, unit.loc)
+        self.assertEqual(level_grid.ally_attack_grid[GridPosition(2, 3)], 0)
+
+        level_grid.move(unit, GridPosition(0, 0))
+        self.assertNotIn(GridPosition(2, 3), level_grid.ally_attack_grid)
+        self.assertGridsConsistent(level_grid)
+
+    def test_displaced_unit_is_removed_from_grids(self):
+        level_grid = LevelGrid(row_num=5, col_num=5)
+        unit1 = Unit("unit1", UnitClan.Ally, GridPosition(1, 1), GridPosition(0, 1))
+        unit2 = Unit("unit2", UnitClan.Enemy, GridPosition(2, 2), GridPosition(0, 1))
+        level_grid.move(unit1, unit1.loc)
+        level_grid.move(unit2, unit2.loc)
+
+        # two units moved onto the same off-board cell; the second displaces the first
+        level_grid.move(unit1, GridPosition(-1, -1))
+        level_grid.move(unit2, GridPosition(-1, -1))
+        level_grid.move(unit1, GridPosition(3, 3))
+        level_grid.move(unit2, GridPosition(4, 4))
+        self.assertEqual(set(level_grid.units), {GridPosition(3, 3), GridPosition(4, 4)})
+        self.assertGridsConsistent(level_grid)
+
+    def test_dense_board_matches_dict_board(self):
+        grids = [LevelGrid(row_num=6, col_num=6), LevelGrid(row_num=6, col_num=6, dense=True)]
+        for level_grid in grids:
+            guardian = GuardianUnit("G", UnitClan.Ally, GridPosition(1, 1), GridPosition(0, 1))
+            warrior = WarriorUnit("W", UnitClan.Enemy, GridPosition(2, 3), GridPosition(0, -1))
+            sword = Unit("U", UnitClan.Enemy, GridPosition(1, 2), GridPosition(0, -1))
+            ally = Unit("A", UnitClan.Ally, GridPosition(2, 2), GridPosition(0, 1))
+            for unit in [guardian, warrior, sword, ally]:
+                level_grid.move(unit, unit.loc)
+            level_grid.set_face(guardian, GridPosition(1, 0))
+            level_grid.move(warrior, GridPosition(-1, -1))
+            level_grid.move(warrior, GridPosition(3, 3))
+            level_grid.attack(ally.loc, 2)
+            self.assertGridsConsistent(level_grid)
+
+        dict_grid, dense_grid = grids
+        self.assertEqual({pos: unit.name for pos, unit in dict_grid.units.items()},
+                         {pos: unit.name for pos, unit in dense_grid.units.items()})
+        self.assertEqual(dict_grid.ally_attack_result_grid, dense_grid.ally_attack_result_grid)
+        self.assertEqual(dict_grid.enemy_attack_result_grid, dense_grid.enemy_attack_result_grid)
+        for pos, unit in dense_grid.units.items():
+            self.assertEqual(dense_grid.count_surrounding_opponents(unit),
+                             dict_grid.count_surrounding_opponents(dict_grid.units[pos]))
+
+        board = dense_grid.board
+        ally = dense_grid.units[GridPosition(2, 2)]
+        self.assertEqual(board.health[2, 2], ally.health)
+        self.assertEqual(board.occupant[3, 3], board._slot_of[dense_grid.units[GridPosition(3, 3)]])
+        self.assertEqual(board.occupant[0, 0], -1)
+        self.assertEqual(len(dense_grid.units), 4)
+
+    def test_zone_free_cells_follow_moves_and_deaths(self):
+        for dense in (False, True):
+            level_grid = LevelGrid(row_num=5, col_num=5, dense=dense)
+            blocker = Unit("X", UnitClan.Ally, GridPosition(2, 0), GridPosition(0, 1))
+            level_grid.move(blocker, blocker.loc)
+            zone = level_grid.add_zone('bottom', level_grid.edge_cells('bottom'))
+            self.assertEqual(sorted(zone.cells), [(0, 0), (1, 0), (3, 0), (4, 0)])
+
+            rng = random.Random(0)
+            units = [blocker]
+            for i in range(200):
+                unit = rng.choice(units)
+                if rng.random() < 0.1 and unit in level_grid.units.values():
+                    level_grid.attack(unit.loc, unit.health)
+                elif len(units) < 8 and rng.random() < 0.3:
+                    unit = Unit(f"U{i}", UnitClan.Enemy, GridPosition(rng.randrange(5), rng.randrange(2)),
+                                GridPosition(0, 1))
+                    if unit.loc not in level_grid.units:
+                        level_grid.move(unit, unit.loc)
+                        units.append(unit)
+                elif unit in level_grid.units.values():
+                    destination = GridPosition(rng.randrange(5), rng.randrange(2))
+                    if destination not in level_grid.units:
+                        level_grid.move(unit, destination)
+
+                free = {pos for pos in level_grid.edge_cells('bottom') if pos not in level_grid.units}
+                self.assertEqual(set(zone.cells), free)
+                self.assertEqual(len(zone), len(free))
+
+    def test_full_zone_samples_none(self):
+        level_grid = LevelGrid(row_num=3, col_num=2)
+        zone = level_grid.add_zone('left', level_grid.edge_cells('left'))
+        for y in range(3):
+            unit = Unit(f"U{y}", UnitClan.Enemy, GridPosition(0, y), GridPosition(1, 0))
+            level_grid.move(unit, unit.loc)
+        self.assertIsNone(zone.sample(random.Random(0)))
+
+    def test_rollback_restores_board(self):
+        for dense in (False, True):
+            simulation = Simulation(10, 10, dense=dense, seed=4)
+            simulation.initialize_game()
+            simulation.spawn_enemy(count=6, zone='top')
+            level_grid = simulation.level_grid
+            level_grid.add_zone('bottom', level_grid.edge_cells('bottom'))
+
+            def state():
+                return ({pos: (unit.name, unit.loc, unit.face, unit.is_marching, unit.health)
+                         for pos, unit in level_grid.units.items()},
+                        rebuild_grids(level_grid), sorted(level_grid.zone('bottom').cells))
+
+            before = state()
+            mark = level_grid.checkpoint()
+            for step in range(8):
+                for unit in list(level_grid.units.values())[::2]:
+                    level_grid.set_face(unit, GridPosition(0, -1) if step % 2 else GridPosition(1, 0))
+                    level_grid.set_marching(unit, True)
+                simulation.process_movement_requests()
+                simulation.process_attacks()
+            inner = level_grid.checkpoint()
+            after = state()
+            self.assertNotEqual(after, before)
+            level_grid.attack(next(iter(level_grid.units)), 100)
+
+            level_grid.rollback(inner)
+            self.assertEqual(state(), after)
+            self.assertGridsConsistent(level_grid)
+            level_grid.rollback(mark)
+            self.assertEqual(state(), before)
+            self.assertGridsConsistent(level_grid)
+            level_grid.end_journal()
+
+    def test_state_hash_follows_changes(self):
+        def recomputed(level_grid):
+            value = 0
+            for unit in level_grid.units.values():
+                value ^= zobrist_key(unit)
+            return value
+
+        simulation = Simulation(10, 10, seed=5)
+        simulation.initialize_game()
+        simulation.spawn_enemy(count=6, zone='top')
+        level_grid = simulation.level_grid
+        start = level_grid.state_hash
+        self.assertEqual(start, recomputed(level_grid))
+
+        mark = level_grid.checkpoint()
+        hashes = set()
+        for step in range(10):
+            unit = list(level_grid.units.values())[step % len(level_grid.units)]
+            level_grid.set_face(unit, GridPosition(1, 0))
+            level_grid.set_marching(unit, step % 3 != 0)
+            simulation.process_movement_requests()
+            simulation.process_attacks()
+            self.assertEqual(level_grid.state_hash, recomputed(level_grid))
+            hashes.add(level_grid.state_hash)
+        self.assertGreater(len(hashes), 1)
+
+        level_grid.rollback(mark)
+        level_grid.end_journal()
+        self.assertEqual(level_grid.state_hash, start)
+        # keys are recomputed identically once evicted from the bounded key cache
+        _state_key.cache_clear()
+        self.assertEqual(recomputed(level_grid), start)
+        self.assertIsNotNone(_state_key.cache_info().maxsize)
+
+    def test_state_hash_depends_on_board_not_history(self):
+        def build(order, health):
+            level_grid = LevelGrid(row_num=5, col_num=5)
+            units = [Unit("A", UnitClan.Ally, GridPosition(1, 1), GridPosition(0, 1)),
+                     WarriorUnit("B", UnitClan.Enemy, GridPosition(3, 3), GridPosition(0, -1))]
+            for unit in (units if order else units[::-1]):
+                level_grid.move(unit, unit.loc)
+            # a detour through another cell leaves no trace
+            level_grid.move(units[0], GridPosition(0, 0))
+            level_grid.move(units[0], GridPosition(1, 1))
+            level_grid.attack(GridPosition(3, 3), health)
+            return level_grid.state_hash
+
+        self.assertEqual(build(True, 1), build(False, 1))
+        self.assertNotEqual(build(True, 1), build(True, 2))
+
+    def test_result_grids_are_memoized_until_the_board_changes(self):
+        simulation = Simulation(10, 10, seed=3)
+        simulation.initialize_game()
+        simulation.spawn_enemy(count=6, zone='top')
+        level_grid = simulation.level_grid
+
+        first = level_grid.ally_attack_result_grid
+        self.assertIs(level_grid.ally_attack_result_grid, first)
+        level_grid.enemy_attack_result_grid
+        level_grid.enemy_attack_result_grid
+        self.assertEqual(level_grid.cache_stats, {'hits': 2, 'misses': 2})
+
+        # marching does not change the result grids, turning does
+        unit = next(iter(level_grid.units.values()))
+        level_grid.set_marching(unit, not unit.is_marching)
+        self.assertIs(level_grid.ally_attack_result_grid, first)
+        level_grid.set_face(unit, GridPosition(-unit.face.x, -unit.face.y))
+        self.assertIsNot(level_grid.ally_attack_result_grid, first)
+
+        for _ in range(8):
+            simulation.process_movement_requests()
+            simulation.process_attacks()
+            self.assertEqual(level_grid.ally_attack_result_grid, level_grid._ally_attack_result_grid())
+            self.assertEqual(level_grid.enemy_attack_result_grid, level_grid._enemy_attack_result_grid())
+
+
+if __name__ == '__main__':
+    unittest.main()
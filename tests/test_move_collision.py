@@ -7,114 +7,11 @@ from grid_position import GridPosition
 from Unit.Unit import Unit
 from enums import UnitClan
 from level_grid import LevelGrid
-from move_collision import (
-    resolve_boundary_collision,
-    resolve_occupied_cell_collision,
-    resolve_opposite_clan_collision,
-    resolve_multiple_units_collision,
-    resolve_movement_collision
-)
+from events import DEBUG, EventKind, EventLog
+from move_collision import resolve_movement_collision
 
 
 class TestMoveCollision(unittest.TestCase):
-    def test_resolve_boundary_collision(self):
-        placeholder_unit = Unit("placeholder", UnitClan.Ally, GridPosition(2, 2), GridPosition(0, 1))
-        row_num = 5
-        col_num = 5
-
-        movement_requests = {
-            # Valid
-            GridPosition(1, 1): [placeholder_unit],
-            # Out of bounds
-            GridPosition(10, 10): [placeholder_unit]
-        }
-        
-        result = resolve_boundary_collision(movement_requests, row_num, col_num)
-        assert result == {
-            GridPosition(1, 1): [placeholder_unit]
-        }
-    
-    def test_resolve_occupied_cell_collision(self):
-        # Create a level grid
-        level_grid = LevelGrid(row_num=5, col_num=5)
-        
-        # Create units
-        unit1 = Unit("unit1", UnitClan.Ally, GridPosition(1, 1), GridPosition(0, 1))
-        unit1.is_marching = True
-        unit2 = Unit("unit2", UnitClan.Ally, GridPosition(1, 2), GridPosition(0, 1))
-        unit2.is_marching = False
-        
-        # Add units to the grid
-        level_grid.move(unit1, unit1.loc)
-        level_grid.move(unit2, unit2.loc)
-
-        # Create a movement request to the occupied cell
-        occupied_pos = unit2.loc
-        empty_pos = GridPosition(3, 3)
-        
-        movement_requests = {
-            occupied_pos: [unit1],
-            empty_pos: [unit1]
-        }
-        
-        # Test occupied cell collision resolution
-        result = resolve_occupied_cell_collision(movement_requests, level_grid.units)
-        assert result == {
-            empty_pos: [unit1]
-        }
-    
-    def test_resolve_multiple_units_collision(self):
-        # Create units with different priorities
-        unit1 = Unit("unit1", UnitClan.Ally, GridPosition(0, 0), GridPosition(0, 1))
-        unit2 = Unit("unit2", UnitClan.Ally, GridPosition(0, 0), GridPosition(0, 1))
-        unit3 = Unit("unit3", UnitClan.Ally, GridPosition(0, 0), GridPosition(0, 1))
-        
-        unit1.set_priority(2)
-        unit2.set_priority(3)
-        unit3.set_priority(3)
-        
-        # Create a movement request with multiple units to the same destination
-        destination = GridPosition(1, 1)
-        
-        movement_requests = {
-            destination: [unit1, unit2, unit3]
-        }
-        
-        # Test multiple units collision resolution
-        result = resolve_multiple_units_collision(movement_requests)
-        
-        assert len(result) == 1
-        assert list(result.values())[0] == unit2 or list(result.values())[0] == unit3
-    
-    def test_resolve_opposite_clan_collision(self):
-        # Create a level grid
-        level_grid = LevelGrid(row_num=5, col_num=5)
-        
-        # Create units
-        ally_unit = Unit("ally", UnitClan.Ally, GridPosition(1, 1), GridPosition(0, 1))
-        enemy_unit = Unit("enemy", UnitClan.Enemy, GridPosition(2, 2), GridPosition(0, -1))
-        
-        # Add units to the grid
-        level_grid.move(ally_unit, ally_unit.loc)
-        level_grid.move(enemy_unit, enemy_unit.loc)
-        
-        # Set both units as marching
-        ally_unit.is_marching = True
-        enemy_unit.is_marching = True
-        
-        # Convert to single unit format
-        movement_requests_single = {
-            ally_unit.loc: enemy_unit,
-            enemy_unit.loc: ally_unit
-        }
-        
-        # Test opposite clan collision resolution
-        result = resolve_opposite_clan_collision(movement_requests_single, level_grid.units)
-        
-        # Both positions should be removed due to opposite clan collision
-        self.assertNotIn(ally_unit.loc, result)
-        self.assertNotIn(enemy_unit.loc, result)
-    
     def test_resolve_movement_collision(self):
         # Create a level grid
         level_grid = LevelGrid(row_num=5, col_num=5)
@@ -157,6 +54,81 @@ class TestMoveCollision(unittest.TestCase):
         self.assertNotIn(out_of_bounds_pos, result)
         self.assertNotIn(occupied_pos, result)
 
+    def _place_marching(self, level_grid, name, clan, loc, face, marching=True):
+        unit = Unit(name, clan, loc, face)
+        unit.is_marching = marching
+        level_grid.move(unit, unit.loc)
+        return unit
+
+    def _resolve(self, level_grid):
+        return resolve_movement_collision(level_grid.movement_request, level_grid.units,
+                                          level_grid.ROW_NUM, level_grid.COL_NUM)
+
+    def test_marching_column_moves_as_one(self):
+        level_grid = LevelGrid(row_num=10, col_num=5)
+        column = [self._place_marching(level_grid, f"u{y}", UnitClan.Ally, GridPosition(2, y), GridPosition(0, 1))
+                  for y in range(6)]
+
+        result = self._resolve(level_grid)
+
+        self.assertEqual(result, {GridPosition(2, y + 1): unit for y, unit in enumerate(column)})
+
+    def test_blocked_column_head_stops_the_column(self):
+        level_grid = LevelGrid(row_num=10, col_num=5)
+        self._place_marching(level_grid, "wall", UnitClan.Ally, GridPosition(2, 6), GridPosition(0, 1), False)
+        for y in range(6):
+            self._place_marching(level_grid, f"u{y}", UnitClan.Ally, GridPosition(2, y), GridPosition(0, 1))
+
+        events = EventLog(DEBUG)
+        result = resolve_movement_collision(level_grid.movement_request, level_grid.units,
+                                            level_grid.ROW_NUM, level_grid.COL_NUM, events)
+
+        self.assertEqual(result, {})
+        self.assertEqual(sorted((event.pos.y, event.value) for event in events),
+                         [(y, 'blocked') for y in range(1, 6)] + [(6, 'occupied')])
+        self.assertEqual({event.kind for event in events}, {EventKind.CollisionDropped})
+
+    def test_occupant_losing_its_own_move_blocks_follower(self):
+        level_grid = LevelGrid(row_num=5, col_num=5)
+        follower = self._place_marching(level_grid, "follower", UnitClan.Ally, GridPosition(0, 2), GridPosition(1, 0))
+        loser = self._place_marching(level_grid, "loser", UnitClan.Ally, GridPosition(1, 2), GridPosition(1, 0))
+        winner = self._place_marching(level_grid, "winner", UnitClan.Ally, GridPosition(2, 3), GridPosition(0, -1))
+        loser.set_priority(1)
+        winner.set_priority(2)
+
+        result = self._resolve(level_grid)
+
+        self.assertEqual(result, {GridPosition(2, 2): winner})
+        self.assertNotIn(follower, result.values())
+
+    def test_cycle_rotates(self):
+        level_grid = LevelGrid(row_num=5, col_num=5)
+        ring = [
+            self._place_marching(level_grid, "a", UnitClan.Ally, GridPosition(1, 1), GridPosition(0, 1)),
+            self._place_marching(level_grid, "b", UnitClan.Enemy, GridPosition(1, 2), GridPosition(1, 0)),
+            self._place_marching(level_grid, "c", UnitClan.Ally, GridPosition(2, 2), GridPosition(0, -1)),
+            self._place_marching(level_grid, "d", UnitClan.Enemy, GridPosition(2, 1), GridPosition(-1, 0)),
+        ]
+
+        result = self._resolve(level_grid)
+
+        self.assertEqual(result, {unit.move_destination: unit for unit in ring})
+
+    def test_opposite_clan_swap_blocks_chain_behind_it(self):
+        level_grid = LevelGrid(row_num=5, col_num=5)
+        self._place_marching(level_grid, "ally", UnitClan.Ally, GridPosition(1, 1), GridPosition(0, 1))
+        self._place_marching(level_grid, "enemy", UnitClan.Enemy, GridPosition(1, 2), GridPosition(0, -1))
+        self._place_marching(level_grid, "behind", UnitClan.Ally, GridPosition(1, 0), GridPosition(0, 1))
+
+        self.assertEqual(self._resolve(level_grid), {})
+
+    def test_same_clan_swap_is_allowed(self):
+        level_grid = LevelGrid(row_num=5, col_num=5)
+        unit1 = self._place_marching(level_grid, "unit1", UnitClan.Ally, GridPosition(1, 1), GridPosition(0, 1))
+        unit2 = self._place_marching(level_grid, "unit2", UnitClan.Ally, GridPosition(1, 2), GridPosition(0, -1))
+
+        self.assertEqual(self._resolve(level_grid), {GridPosition(1, 2): unit1, GridPosition(1, 1): unit2})
+
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
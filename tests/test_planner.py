@@ -0,0 +1,114 @@
+"""
+Unit tests for the lookahead planner.
+"""
+
+import copy
+import unittest
+from benchmark import generate_board
+from enums import UnitClan
+from events import OFF, EventLog
+from move_collision import resolve_movement_collision
+from planner import ORDERS, Planner, _damage_after, _give_order, _resolve_movement
+from simulation import Simulation, play_attacks, play_movement
+from Unit.Unit import FACES
+
+LAYOUT = [
+    {'unit_type': 'Warrior', 'clan': 'Ally', 'x': 3, 'y': 3, 'face': 'N', 'group': 1, 'name': 'W'},
+    {'unit_type': 'Bow', 'clan': 'Ally', 'x': 1, 'y': 1, 'face': 'E', 'group': 2, 'name': 'B'},
+    {'unit_type': 'Sword', 'clan': 'Enemy', 'x': 4, 'y': 3, 'face': 'N', 'name': 'S'},
+    {'unit_type': 'Sword', 'clan': 'Enemy', 'x': 1, 'y': 4, 'face': 'S', 'name': 'T'},
+]
+
+
+class FirstChoice:
+    @staticmethod
+    def choice(candidates):
+        return candidates[0]
+
+
+def board_state(level_grid):
+    return {pos: (unit.name, unit.face, unit.is_marching, unit.health) for pos, unit in level_grid.units.items()}
+
+
+class TestPlanner(unittest.TestCase):
+    def test_one_turn_plan_matches_brute_force(self):
+        simulation = Simulation(7, 7, events=EventLog(OFF))
+        simulation.load_layout(LAYOUT)
+
+        for group_id in (1, 2):
+            scores = []
+            for face, marching in ORDERS:
+                level_grid = copy.deepcopy(simulation.level_grid)
+                for unit in level_grid.units.values():
+                    if unit.group_id == group_id:
+                        level_grid.set_face(unit, face)
+                        level_grid.set_marching(unit, marching)
+                play_movement(level_grid, rng=FirstChoice)
+                damage = play_attacks(level_grid, level_grid.ally_attack_result_grid,
+                                      level_grid.enemy_attack_result_grid)
+                scores.append(damage[UnitClan.Ally] - damage[UnitClan.Enemy])
+
+            plan = Planner(simulation.level_grid, max_depth=1).plan(group_id)
+            self.assertEqual(plan.score, max(scores))
+            self.assertEqual(scores[ORDERS.index((plan.face, plan.marching))], max(scores))
+
+    def test_planning_leaves_board_unchanged(self):
+        simulation = Simulation(7, 7, events=EventLog(OFF))
+        simulation.load_layout(LAYOUT)
+        level_grid = simulation.level_grid
+        before = board_state(level_grid)
+        grids = (dict(level_grid.ally_attack_grid), dict(level_grid.enemy_defense_grid))
+
+        planner = Planner(level_grid)
+        plan = planner.plan(1, time_budget=1.0)
+        self.assertEqual(plan.depth, 3)
+        self.assertEqual(board_state(level_grid), before)
+        self.assertEqual((level_grid.ally_attack_grid, level_grid.enemy_defense_grid), grids)
+        self.assertFalse(level_grid.journaling)
+
+        # a second search of the same board is answered from the cache
+        misses = planner.misses
+        self.assertEqual(planner.plan(1, time_budget=1.0), plan)
+        self.assertEqual(planner.misses, misses)
+
+        planner.apply(plan)
+        for unit in planner.group_units(1):
+            self.assertEqual((unit.face, unit.is_marching), (plan.face, plan.marching))
+
+    def test_five_groups_within_evaluation_budget(self):
+        # wall-clock time is measured by the benchmark suite (benchmark.bench_planner);
+        # evaluations are what the search spends its time on, and do not depend on the machine
+        simulation = Simulation(15, 15, seed=0, events=EventLog(OFF))
+        simulation.initialize_game()
+        simulation.spawn_enemy(count=3, zone='top')
+
+        planner = Planner(simulation.level_grid, max_depth=2)
+        plans = planner.plan_groups([1, 2, 3, 4, 5], time_budget=60.0)
+
+        self.assertEqual(sorted(plans), [1, 2, 3, 4, 5])
+        self.assertTrue(all(plan.depth == 2 for plan in plans.values()), [plan.depth for plan in plans.values()])
+        self.assertLessEqual(planner.misses, 300)
+        self.assertGreater(planner.hits, 0)
+
+    def test_scratch_damage_matches_played_turns(self):
+        for seed in range(12):
+            simulation = generate_board(12, 0.3, seed)
+            simulation.events = EventLog(OFF)
+            level_grid = simulation.level_grid
+            group = set(Planner(level_grid).group_units(seed % 5 + 1))
+            for turn, face in enumerate(FACES):
+                if turn % 2:
+                    # the order the planner would give the group, without giving it
+                    moves = _resolve_movement(level_grid, group, face)
+                    expected = _damage_after(level_grid, moves, {unit: face for unit in group})
+                    _give_order(level_grid, list(group), (face, True))
+                else:
+                    moves = resolve_movement_collision(level_grid.movement_request, level_grid.units,
+                                                       level_grid.ROW_NUM, level_grid.COL_NUM, rng=FirstChoice)
+                    expected = _damage_after(level_grid, moves)
+                play_movement(level_grid, rng=FirstChoice)
+                self.assertEqual(simulation.process_attacks(), expected, (seed, turn))
+                group &= set(level_grid.units.values())
+
+if __name__ == '__main__':
+    unittest.main()
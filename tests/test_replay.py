@@ -0,0 +1,83 @@
+"""
+Unit tests for the replay module.
+"""
+
+import random
+import unittest
+from events import OFF, EventLog
+from replay import DENSE, PATROL, Replay, ReplayPlayer, record
+from simulation import DEFAULT_LAYOUT, Simulation
+
+
+def board(simulation):
+    return sorted((pos.x, pos.y, unit.name, unit.health, unit.face.x, unit.face.y, unit.is_marching)
+                  for pos, unit in simulation.level_grid.units.items())
+
+
+def play_recorded(steps, seed=7, **options):
+    """Record a game of random player commands; return the replay and the finished simulation"""
+    simulation = Simulation(15, 15, events=EventLog(OFF), seed=seed, **options)
+    replay = record(simulation)
+    simulation.initialize_game()
+    commands = random.Random(seed)
+    for _ in range(steps):
+        roll = commands.random()
+        if roll < 0.1:
+            simulation.select_units_by_group(commands.randint(1, 5))
+        elif roll < 0.2:
+            simulation.update_selected_units_face(commands.choice('WASD'))
+        elif roll < 0.3:
+            simulation.toggle_selected_units_marching()
+        elif roll < 0.65:
+            simulation.process_movement_requests()
+        else:
+            simulation.process_attacks()
+    return replay, simulation
+
+
+class TestReplay(unittest.TestCase):
+    def test_round_trip(self):
+        replay, _ = play_recorded(200, dense=True, patrol=True)
+        loaded = Replay.from_bytes(replay.to_bytes())
+        self.assertEqual(loaded.flags, DENSE | PATROL)
+        self.assertEqual(loaded.seed, 7)
+        self.assertEqual(loaded.layout, replay.layout)
+        self.assertEqual(loaded.commands, replay.commands)
+        self.assertEqual(len(loaded.layout), len(DEFAULT_LAYOUT))
+
+    def test_playback_matches_recorded_game(self):
+        for options in ({}, {'patrol': True}):
+            replay, simulation = play_recorded(500, **options)
+            player = ReplayPlayer(Replay.from_bytes(replay.to_bytes()), keyframe_interval=50)
+            player.play()
+            self.assertTrue(player.finished)
+            self.assertEqual(player.turn, simulation.counter)
+            self.assertEqual(board(player.simulation), board(simulation))
+            self.assertEqual(player.simulation.level_grid.state_hash, simulation.level_grid.state_hash)
+
+    def test_seek_matches_straight_playback(self):
+        replay, _ = play_recorded(600)
+        reference = ReplayPlayer(replay, keyframe_interval=10 ** 9)
+        expected = {0: board(reference.simulation)}
+        while reference.step():
+            expected.setdefault(reference.turn, board(reference.simulation))
+
+        player = ReplayPlayer(replay, keyframe_interval=40)
+        player.play()
+        self.assertGreater(len(player.keyframes), 5)
+        for turn in (250, 17, 333, 0, 100, 101):
+            player.seek(turn)
+            self.assertEqual(player.turn, turn)
+            self.assertEqual(board(player.simulation), expected[turn])
+
+    def test_recording_needs_a_seeded_fresh_game(self):
+        with self.assertRaises(ValueError):
+            record(Simulation(5, 5))
+        simulation = Simulation(5, 5, seed=1)
+        simulation.initialize_game()
+        with self.assertRaises(ValueError):
+            record(simulation)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+"""
+Unit tests for the headless simulation module.
+"""
+
+import random
+import subprocess
+import sys
+import unittest
+from grid_position import GridPosition
+from enums import UnitClan
+from events import DEBUG, OFF, EventKind, EventLog
+from simulation import Simulation
+
+
+class TestSimulation(unittest.TestCase):
+    def test_import_does_not_load_pygame(self):
+        code = "import sys, simulation, game_state; print('pygame' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), "False")
+
+    def test_initialize_and_select(self):
+        simulation = Simulation(15, 15)
+        simulation.initialize_game()
+        self.assertEqual(len(simulation.level_grid.units), 5)
+        self.assertEqual([unit.name for unit in simulation.selected_units], ["G"])
+
+        simulation.select_units_by_group(3)
+        simulation.update_selected_units_face('W')
+        self.assertEqual(simulation.selected_units[0].face, GridPosition(0, 1))
+
+        simulation.toggle_selected_units_marching()
+        self.assertFalse(simulation.selected_units[0].is_marching)
+
+    def test_turns_advance_counter_and_spawn(self):
+        simulation = Simulation(15, 15)
+        simulation.initialize_game()
+        for _ in range(3):
+            simulation.process_movement_requests()
+            simulation.process_attacks()
+        self.assertEqual(simulation.counter, 6)
+        self.assertEqual(len(simulation.enemies), 1)
+        self.assertEqual(simulation.enemies[0].unit_clan, UnitClan.Enemy)
+
+    def test_rollback_restores_simulation_state(self):
+        simulation = Simulation(15, 15, seed=5, events=EventLog(OFF), patrol=True)
+        simulation.initialize_game()
+        simulation.spawn_enemy(count=3, zone='top')
+
+        def state():
+            enemies = simulation.enemies
+            n = len(enemies)
+            return (simulation.counter, simulation.events.turn, [unit.name for unit in enemies],
+                    [unit.name for unit in simulation.selected_units],
+                    enemies.mode[:n].tolist(), enemies.counter[:n].tolist(), enemies.threshold[:n].tolist(),
+                    {pos: (unit.name, unit.face, unit.is_marching, unit.health)
+                     for pos, unit in simulation.level_grid.units.items()})
+
+        def play():
+            simulation.select_units_by_group(2)
+            simulation.toggle_selected_units_marching()
+            for _ in range(4):
+                simulation.process_movement_requests()
+                simulation.process_attacks()
+
+        before = state()
+        mark = simulation.checkpoint()
+        play()
+        after = state()
+        # the 6th turn spawned an enemy
+        self.assertEqual(simulation.counter, 8)
+        self.assertGreater(len(after[2]), len(before[2]))
+
+        simulation.rollback(mark)
+        self.assertEqual(state(), before)
+        self.assertEqual(simulation.enemies.get_all_units(),
+                         {unit.loc: unit for unit in simulation.level_grid.units.values()
+                          if unit.unit_clan == UnitClan.Enemy})
+        # the random generators are restored too, so the same turns play out the same way
+        play()
+        self.assertEqual(state(), after)
+        simulation.end_checkpoints()
+        self.assertFalse(simulation.level_grid.journaling)
+
+    def test_attacks_are_logged(self):
+        # the ally warrior cuts down the enemy sword in front of it
+        layout = [
+            {'unit_type': 'Warrior', 'clan': 'Ally', 'x': 2, 'y': 2, 'face': 'N', 'group': 1, 'name': 'W'},
+            {'unit_type': 'Sword', 'clan': 'Enemy', 'x': 2, 'y': 3, 'face': 'N', 'name': 'S'},
+        ]
+        simulation = Simulation(5, 5)
+        simulation.load_layout(layout)
+        while simulation.level_grid.units.get(GridPosition(2, 3)):
+            simulation.process_attacks()
+
+        damage = simulation.events.of_kind(EventKind.DamageApplied)
+        self.assertTrue(damage)
+        self.assertEqual({(event.pos, event.unit) for event in damage}, {(GridPosition(2, 3), 'S')})
+        self.assertEqual(sum(event.value for event in damage), 5)
+        self.assertEqual([(event.turn, event.unit) for event in simulation.events.of_kind(EventKind.UnitDied)],
+                         [(damage[-1].turn, 'S')])
+
+    def test_collisions_are_logged_at_debug_level(self):
+        layout = [
+            {'unit_type': 'Sword', 'clan': 'Ally', 'x': 2, 'y': 1, 'face': 'N', 'group': 1, 'name': 'A'},
+            {'unit_type': 'Sword', 'clan': 'Ally', 'x': 2, 'y': 3, 'face': 'S', 'group': 1, 'name': 'B'},
+        ]
+        info = Simulation(5, 5)
+        info.load_layout(layout)
+        info.process_movement_requests()
+        self.assertEqual(len(info.events), 0)
+
+        debug = Simulation(5, 5, events=EventLog(DEBUG))
+        debug.load_layout(layout)
+        debug.process_movement_requests()
+        [event] = debug.events
+        self.assertEqual(event.kind, EventKind.TieBroken)
+        self.assertEqual((event.pos, event.value), (GridPosition(2, 2), 2))
+
+    def test_disabled_log_records_nothing(self):
+        simulation = Simulation(15, 15, events=EventLog(OFF))
+        simulation.initialize_game()
+        for _ in range(10):
+            simulation.process_movement_requests()
+            simulation.process_attacks()
+        self.assertEqual(len(simulation.events), 0)
+
+    def test_seed_replays_game_without_global_random(self):
+        def play(seed):
+            simulation = Simulation(15, 15, seed=seed)
+            simulation.initialize_game()
+            for _ in range(12):
+                simulation.process_movement_requests()
+                simulation.process_attacks()
+            return sorted((pos, unit.name, unit.face, unit.health)
+                          for pos, unit in simulation.level_grid.units.items())
+
+        random.seed(1)
+        state = random.getstate()
+        first = play(7)
+        self.assertEqual(random.getstate(), state)
+        random.seed(2)
+        self.assertEqual(play(7), first)
+
+    def test_spawn_batch_until_zone_full(self):
+        simulation = Simulation(6, 4, seed=0)
+        spawned = simulation.spawn_enemy(count=3)
+        self.assertEqual(len(spawned), 3)
+        self.assertEqual({unit.loc.y for unit in spawned}, {0})
+        self.assertEqual({unit.face for unit in spawned}, {GridPosition(0, 1)})
+
+        # only one free cell is left on the bottom row
+        self.assertEqual(len(simulation.spawn_enemy(count=5)), 1)
+        self.assertEqual(simulation.spawn_enemy(), [])
+        self.assertEqual(len(simulation.enemies), 4)
+
+        left = simulation.spawn_enemy(count=10, zone='left')
+        self.assertEqual(len(left), 5)
+        self.assertEqual({unit.loc.x for unit in left}, {0})
+        self.assertEqual({unit.face for unit in left}, {GridPosition(1, 0)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Unit tests for the spatial_index module.
+"""
+
+import random
+import unittest
+from enums import UnitClan
+from events import OFF, EventLog
+from grid_position import GridPosition
+from simulation import Simulation
+from spatial_index import SpatialIndex
+from Unit.SwordUnit import SwordUnit
+
+
+def names(units):
+    return sorted(unit.name for unit in units)
+
+
+class TestSpatialIndex(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(4)
+        self.simulation = Simulation(40, 40, events=EventLog(OFF), seed=4)
+        level_grid = self.simulation.level_grid
+        for i in range(300):
+            pos = GridPosition(self.rng.randrange(40), self.rng.randrange(40))
+            if pos not in level_grid.units:
+                clan = self.rng.choice(list(UnitClan))
+                unit = SwordUnit(f"U{i}", clan, pos, GridPosition(0, 1))
+                unit.is_marching = self.rng.random() < 0.5
+                level_grid.move(unit, pos)
+
+    def assert_queries_match(self):
+        level_grid = self.simulation.level_grid
+        units = list(level_grid.units.values())
+        for _ in range(20):
+            x0, y0 = self.rng.randrange(-5, 40), self.rng.randrange(-5, 40)
+            x1, y1 = x0 + self.rng.randrange(20), y0 + self.rng.randrange(20)
+            clan = self.rng.choice([None, UnitClan.Ally, UnitClan.Enemy])
+            expected = [unit for unit in units if x0 <= unit.loc.x <= x1 and y0 <= unit.loc.y <= y1
+                        and clan in (None, unit.unit_clan)]
+            self.assertEqual(names(level_grid.units_in_rect(x0, y0, x1, y1, clan)), names(expected))
+
+            center, radius = GridPosition(x0, y0), self.rng.uniform(0, 12)
+            expected = [unit for unit in units
+                        if (unit.loc.x - x0) ** 2 + (unit.loc.y - y0) ** 2 <= radius ** 2
+                        and clan in (None, unit.unit_clan)]
+            self.assertEqual(names(level_grid.units_in_radius(center, radius, clan)), names(expected))
+
+        for unit in units:
+            expected = sum(1 for cell in level_grid.get_surrounding_grid_cells(unit.loc)
+                           if cell in level_grid.units and level_grid.units[cell].unit_clan != unit.unit_clan)
+            self.assertEqual(level_grid.count_surrounding_opponents(unit), expected)
+
+    def test_queries_follow_moves_and_deaths(self):
+        self.assert_queries_match()
+        for _ in range(10):
+            self.simulation.process_movement_requests()
+            self.simulation.process_attacks()
+            self.assert_queries_match()
+        self.assertEqual(len(self.simulation.level_grid.spatial), len(self.simulation.level_grid.units))
+
+    def test_rollback_restores_index(self):
+        level_grid = self.simulation.level_grid
+        before = {clan: set(cells) for clan, cells in level_grid.spatial.cells.items()}
+        mark = level_grid.checkpoint()
+        for _ in range(4):
+            self.simulation.process_movement_requests()
+            self.simulation.process_attacks()
+        level_grid.rollback(mark)
+        level_grid.end_journal()
+        self.assertEqual(level_grid.spatial.cells, before)
+        self.assert_queries_match()
+
+    def test_whole_board_query_on_sparse_index(self):
+        index = SpatialIndex(bucket_size=4)
+        unit = SwordUnit("S", UnitClan.Enemy, GridPosition(9000, 17), GridPosition(0, 1))
+        index.insert(unit, unit.loc)
+        self.assertEqual(index.in_rect(0, 0, 9999, 9999), [unit])
+        self.assertEqual(index.in_rect(0, 0, 9999, 9999, UnitClan.Ally), [])
+        index.remove(unit, unit.loc)
+        self.assertEqual(len(index), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
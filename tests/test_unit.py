@@ -1,5 +1,6 @@
 import unittest
-from Unit import Unit
+from Unit import Unit, GuardianUnit, SpearUnit
+from level_grid import LevelGrid
 from grid_position import GridPosition
 from enums import UnitClan
 
@@ -107,5 +108,37 @@ class TestUnit(unittest.TestCase):
         unit_north.is_marching = True
         self.assertEqual(unit_north.move_destination, expected_destination)
 
+    def test_range_cache_follows_loc_and_face(self):
+        """Cached attack/defense ranges are recomputed after loc or face changes"""
+        unit = GuardianUnit("Guard", UnitClan.Ally, GridPosition(2, 2), GridPosition(0, 1))
+        self.assertIs(unit.defense_range, unit.defense_range)
+        self.assertIn(GridPosition(2, 3), unit.defense_range)
+
+        unit.face = GridPosition(0, -1)
+        self.assertIn(GridPosition(2, 1), unit.defense_range)
+        self.assertNotIn(GridPosition(2, 3), unit.defense_range)
+
+        unit.loc = GridPosition(4, 4)
+        self.assertIn(GridPosition(4, 3), unit.defense_range)
+
+        # rotation tables are built once per class
+        self.assertIs(GuardianUnit._defense_rotations, type(unit)._defense_rotations)
+        self.assertEqual(len(GuardianUnit._defense_rotations[GridPosition(1, 0)]), 5)
+
+    def test_assigned_range_is_used(self):
+        """Assigning a range on a unit rotates it for that unit only"""
+        unit = SpearUnit("Spear", UnitClan.Ally, GridPosition(2, 2), GridPosition(1, 0))
+        unit.relative_attack_range = [GridPosition(0, 3)]
+        self.assertEqual(unit.attack_range, [GridPosition(5, 2)])
+        self.assertEqual(len(SpearUnit.relative_attack_range), 2)
+        self.assertEqual(SpearUnit("Other", UnitClan.Ally, GridPosition(2, 2), GridPosition(1, 0)).attack_range,
+                         [GridPosition(3, 2), GridPosition(4, 2)])
+
+        level_grid = LevelGrid(row_num=8, col_num=8)
+        level_grid.move(unit, unit.loc)
+        self.assertEqual(dict(level_grid.ally_attack_grid), {GridPosition(5, 2): 2})
+        self.assertEqual(level_grid.bitboards.cells((0, 0), level_grid.bitboards.coverage(UnitClan.Ally, (0, 0))),
+                         [(5, 2)])
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,125 @@
+"""
+Chunked storage for very large boards.
+
+A board is split into CHUNK_SIZE x CHUNK_SIZE chunks addressed by
+(cell // CHUNK_SIZE) on each axis. Chunks are allocated the first time
+something is stored in them, so memory follows the occupied part of the
+board instead of its size, and per-turn work can be limited to the chunks
+that hold units.
+
+LevelGrid keeps its bitboards per chunk (see bitboard.py); ChunkedGrid
+holds the per-cell paint layers of game_state.
+"""
+from __future__ import annotations
+
+from typing import Generic, Iterator, TypeVar
+
+CHUNK_SIZE = 64
+
+T = TypeVar('T')
+
+
+def chunk_neighbours(chunk: tuple[int, int]) -> list[tuple[int, int]]:
+    """The chunk and the eight chunks around it"""
+    cx, cy = chunk
+    return [(cx + dx, cy + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+
+class ChunkedGrid(Generic[T]):
+    """
+    A rows x cols grid of values addressed as grid.get(i, j) / grid.set(i, j, value).
+
+    Every cell starts at default. A chunk is a list of CHUNK_SIZE row lists
+    and only exists once a non-default value was written into it.
+    """
+
+    def __init__(self, rows: int, cols: int, default: T, chunk_size: int = CHUNK_SIZE) -> None:
+        self.shape = (rows, cols)
+        self.default = default
+        self.chunk_size = chunk_size
+        self.chunks: dict[tuple[int, int], list[list[T]]] = {}
+        self._default_row = [default] * chunk_size
+
+    def get(self, i: int, j: int) -> T:
+        size = self.chunk_size
+        chunk = self.chunks.get((i // size, j // size))
+        if chunk is None:
+            return self.default
+        return chunk[i % size][j % size]
+
+    def set(self, i: int, j: int, value: T) -> None:
+        size = self.chunk_size
+        key = (i // size, j // size)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            if value == self.default:
+                return
+            chunk = self.chunks[key] = [self._default_row[:] for _ in range(size)]
+        chunk[i % size][j % size] = value
+
+    def get_block(self, i0: int, j0: int, i1: int, j1: int) -> list[list[T]]:
+        """Rows i0 to i1 (exclusive) of the values in columns j0 to j1 (exclusive)"""
+        size = self.chunk_size
+        block = []
+        for i in range(i0, i1):
+            row = []
+            for cj in range(j0 // size, (j1 - 1) // size + 1):
+                start, end = max(j0 - cj * size, 0), min(j1 - cj * size, size)
+                chunk = self.chunks.get((i // size, cj))
+                row.extend((chunk[i % size] if chunk is not None else self._default_row)[start:end])
+            block.append(row)
+        return block
+
+    def set_block(self, i0: int, j0: int, block: list[list[T]]) -> None:
+        """Write rows of values with the top-left one at (i0, j0), a row slice per chunk"""
+        size = self.chunk_size
+        width = len(block[0]) if block else 0
+        for r, values in enumerate(block):
+            i = i0 + r
+            for cj in range(j0 // size, (j0 + width - 1) // size + 1):
+                start, end = max(j0, cj * size), min(j0 + width, (cj + 1) * size)
+                part = values[start - j0:end - j0]
+                key = (i // size, cj)
+                chunk = self.chunks.get(key)
+                if chunk is None:
+                    if part.count(self.default) == len(part):
+                        continue
+                    chunk = self.chunks[key] = [self._default_row[:] for _ in range(size)]
+                chunk[i % size][start - cj * size:end - cj * size] = part
+
+    def detach(self) -> dict[tuple[int, int], list[list[T]]]:
+        """Take the chunks out, leaving every cell at default, e.g. to compare against a repaint"""
+        chunks = self.chunks
+        self.chunks = {}
+        return chunks
+
+    def cells_not(self, value: T) -> Iterator[tuple[int, int]]:
+        """(i, j) of the stored cells whose value differs from value"""
+        size = self.chunk_size
+        for (ci, cj), chunk in self.chunks.items():
+            for r, row in enumerate(chunk):
+                # whole-row checks skip uniform rows cheaply
+                if row.count(value) == size:
+                    continue
+                for c, cell in enumerate(row):
+                    if cell != value:
+                        yield ci * size + r, cj * size + c
+
+    def changed_cells(self, previous: dict[tuple[int, int], list[list[T]]]) -> list[tuple[int, int]]:
+        """(i, j) of the cells that differ from previous, chunks as returned by detach()"""
+        size = self.chunk_size
+        default_chunk = [self._default_row] * size
+        changed = []
+        for key in self.chunks.keys() | previous.keys():
+            chunk = self.chunks.get(key, default_chunk)
+            old = previous.get(key, default_chunk)
+            ci, cj = key
+            for r in range(size):
+                row, old_row = chunk[r], old[r]
+                # whole-row comparisons skip unchanged rows cheaply
+                if row == old_row:
+                    continue
+                for c in range(size):
+                    if row[c] != old_row[c]:
+                        changed.append((ci * size + r, cj * size + c))
+        return changed